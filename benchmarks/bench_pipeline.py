@@ -0,0 +1,169 @@
+"""End-to-end pipeline benchmark against the local fake APIs in fake_api.py.
+
+    python benchmarks/bench_pipeline.py --sizes 10,100,1000 --latency-ms 5 --error-rate 0.02 --malformed-rate 0.05
+
+For every size it runs `run_pipeline` on a fresh database, then `summarize_videos --force` on the
+same database, then `NotionClient.upsert_daily_page` twice (create, then an in-place update), and
+prints one JSON report with wall-clock seconds, API call counts, injected faults and the peak
+Python heap (tracemalloc) of each scenario. The fake server runs in a child process so its
+memory is not counted. With --trace DIR, each run_pipeline also writes DIR/run-<size>.json, a
+Chrome/Perfetto timeline; compare wall_s with and without it for the tracing overhead.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import multiprocessing
+import os
+import sys
+import tempfile
+import threading
+import time
+import tracemalloc
+import urllib.request
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from fake_api import FakeConfig, start_server
+
+from ytbrief import logic, transport
+from ytbrief.gemini_client import GeminiClient
+from ytbrief.notion_client import NotionClient
+from ytbrief.youtube_client import YouTubeClient
+
+DATE = "2026-02-19"
+NOTION_DATE = "2026-02-20"  # not touched by run_pipeline, so the first upsert creates the page
+MODEL = "gemini-1.5-pro"
+
+
+def _serve(config: FakeConfig, ports: multiprocessing.Queue) -> None:
+    server, _ = start_server(config)  # already serving on a background thread
+    ports.put(server.server_port)
+    threading.Event().wait()
+
+
+def _call(base: str, path: str) -> dict:
+    method = "GET" if path == "/_stats" else "POST"
+    with urllib.request.urlopen(urllib.request.Request(base + path, method=method), timeout=10) as resp:
+        return json.loads(resp.read())
+
+
+def _point_clients_at(base: str, concurrency: int) -> None:
+    YouTubeClient.BASE_URL = f"{base}/youtube/v3/search"
+    YouTubeClient.VIDEOS_URL = f"{base}/youtube/v3/videos"
+    GeminiClient.BASE_URL = f"{base}/v1beta"
+    NotionClient.BASE_URL = f"{base}/v1"
+    # Measure our own overhead, not the production rate limits; keep the retry path fast.
+    for name in ("youtube", "gemini", "notion"):
+        transport.DEFAULT_POLICIES[name] = transport.TransportPolicy(
+            rate=10_000, burst=10_000, max_concurrency=max(concurrency, 4), max_backoff=0.01
+        )
+    for key in ("YOUTUBE_API_KEY", "GEMINI_API_KEY", "NOTION_TOKEN", "NOTION_DATABASE_ID"):
+        os.environ[key] = "bench"
+
+
+def _measure(base: str, fn) -> dict:
+    _call(base, "/_reset")
+    tracemalloc.start()
+    began = time.perf_counter()
+    try:
+        result = fn()
+        error = None
+    except Exception as exc:
+        result, error = None, f"{type(exc).__name__}: {exc}"
+    wall = time.perf_counter() - began
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    stats = _call(base, "/_stats")
+    report = {
+        "wall_s": round(wall, 3),
+        "peak_mb": round(peak / 2**20, 2),
+        "calls": stats["calls"],
+        "faults": stats["faults"],
+        "result": result,
+    }
+    if error:
+        report["error"] = error
+    return report
+
+
+def _digest(n: int, tag: str) -> dict:
+    return {
+        "one_liner": f"{tag} 반도체 주도의 반등",
+        "consensus": ["금리 동결 기대", "외국인 순매수", f"{tag} 강세"],
+        "differences": ["환율 전망", "2차전지 바닥 논쟁", "중국 경기"],
+        "checklist": ["CPI", "옵션 만기", "실적 발표"],
+        "top_topics": ["반도체"],
+        "sources": [{"title": f"모닝브리핑 {i}", "url": f"https://www.youtube.com/watch?v=vid{i:06d}", "channel": "채널"} for i in range(n)],
+    }
+
+
+def bench_size(n: int, args: argparse.Namespace) -> dict:
+    config = FakeConfig(n, args.latency_ms, args.error_rate, args.malformed_rate, args.notion_page_size)
+    ports: multiprocessing.Queue = multiprocessing.Queue()
+    server = multiprocessing.Process(target=_serve, args=(config, ports), daemon=True)
+    server.start()
+    base = f"http://127.0.0.1:{ports.get(timeout=10)}"
+    _point_clients_at(base, args.concurrency)
+    try:
+        with tempfile.TemporaryDirectory() as tmp:
+            db = os.path.join(tmp, "bench.db")
+
+            def run():
+                trace = os.path.join(args.trace, f"run-{n}.json") if args.trace else None
+                result = logic.run_pipeline(db, DATE, n, MODEL, concurrency=args.concurrency, use_cache=False, trace=trace)
+                return {"found": result.found, "ok": result.summarized_success, "failed": result.summarized_failed}
+
+            def summarize():
+                ok, failed = logic.summarize_videos(db, DATE, MODEL, concurrency=args.concurrency, use_cache=False, force=True)
+                return {"ok": ok, "failed": failed}
+
+            notion = NotionClient(token="bench", database_id="bench-db")
+            page: dict[str, str] = {}
+
+            def notion_create():
+                page["id"] = notion.upsert_daily_page(NOTION_DATE, _digest(n, "first"), n)
+                return {"blocks": len(notion.build_payload(NOTION_DATE, _digest(n, "first"), n)["children"])}
+
+            def notion_update():
+                notion.upsert_daily_page(NOTION_DATE, _digest(n, "second"), n, page_id=page.get("id"))
+                return {"blocks": len(notion.build_payload(NOTION_DATE, _digest(n, "second"), n)["children"])}
+
+            return {
+                "run_pipeline": _measure(base, run),
+                "summarize_videos": _measure(base, summarize),
+                "notion_create": _measure(base, notion_create),
+                "notion_update": _measure(base, notion_update),
+            }
+    finally:
+        server.terminate()
+        server.join()
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="10,100,1000")
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency-ms", type=float, default=5.0)
+    parser.add_argument("--error-rate", type=float, default=0.02)
+    parser.add_argument("--malformed-rate", type=float, default=0.05)
+    parser.add_argument("--notion-page-size", type=int, default=100)
+    parser.add_argument("--output", help="also write the JSON report to this file")
+    parser.add_argument("--trace", help="directory for a timeline trace of each run_pipeline")
+    args = parser.parse_args()
+
+    logic.console.quiet = True
+    report = {
+        "config": {k: v for k, v in vars(args).items() if k not in ("output", "trace")},
+        "sizes": {str(n): bench_size(n, args) for n in (int(s) for s in args.sizes.split(","))},
+    }
+    text = json.dumps(report, indent=2, ensure_ascii=False)
+    if args.output:
+        Path(args.output).write_text(text + "\n", encoding="utf-8")
+    print(text)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,90 @@
+"""Per-request latency of the pooled requests_compat.Session vs. one urlopen per call.
+
+    python benchmarks/bench_requests_compat.py --requests 300 --latency-ms 0
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+import urllib.request
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from ytbrief.requests_compat import Session
+
+PAYLOAD = json.dumps({"items": [{"id": {"videoId": f"v{i}"}, "snippet": {"title": "모닝브리핑 " * 8}} for i in range(50)]}).encode()
+
+
+def make_handler(latency_s: float):
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def do_GET(self):
+            if latency_s:
+                time.sleep(latency_s)
+            self.send_response(200)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(PAYLOAD)))
+            self.end_headers()
+            self.wfile.write(PAYLOAD)
+
+        def log_message(self, *args):
+            pass
+
+    return Handler
+
+
+def legacy_get(url: str) -> bytes:
+    # The pre-pooling implementation: a fresh connection per call via urlopen.
+    with urllib.request.urlopen(urllib.request.Request(url, method="GET"), timeout=30) as resp:
+        return resp.read()
+
+
+def measure(fn, n: int) -> dict:
+    samples = []
+    for _ in range(n):
+        start = time.perf_counter()
+        fn()
+        samples.append((time.perf_counter() - start) * 1000)
+    samples.sort()
+    return {
+        "mean_ms": round(statistics.fmean(samples), 4),
+        "p50_ms": round(samples[len(samples) // 2], 4),
+        "p95_ms": round(samples[int(len(samples) * 0.95) - 1], 4),
+    }
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=300)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), make_handler(args.latency_ms / 1000))
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    url = f"http://127.0.0.1:{server.server_port}/youtube/v3/search?q=x"
+    session = Session()
+    try:
+        legacy = measure(lambda: legacy_get(url), args.requests)
+        pooled = measure(lambda: session.get(url).content, args.requests)
+    finally:
+        session.close()
+        server.shutdown()
+    report = {
+        "requests": args.requests,
+        "legacy_urlopen": legacy,
+        "pooled_session": pooled,
+        "saved_per_request_ms": round(legacy["mean_ms"] - pooled["mean_ms"], 4),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
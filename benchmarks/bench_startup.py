@@ -0,0 +1,69 @@
+"""CLI startup cost: `python -X importtime -c "import ytbrief.cli"` and `ytbrief --help` wall time.
+
+    python benchmarks/bench_startup.py --runs 10
+
+Reports the median cumulative import time of ytbrief.cli, the slowest modules it pulls in and
+whether any module that should stay lazy (HTTP clients, pydantic) was loaded.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import time
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+LAZY_MODULES = ("pydantic", "requests", "dotenv", "ytbrief.logic", "ytbrief.schemas", "ytbrief.gemini_client", "ytbrief.youtube_client")
+
+
+def importtime(module: str) -> dict[str, int]:
+    # Maps each imported module to its cumulative import time in microseconds.
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], env=env, capture_output=True, text=True, check=True
+    )
+    timings: dict[str, int] = {}
+    for line in proc.stderr.splitlines():
+        if not line.startswith("import time:") or "cumulative" in line:
+            continue
+        _, cumulative, name = (part.strip() for part in line[len("import time:") :].split("|"))
+        timings[name] = int(cumulative)
+    return timings
+
+
+def help_wall_ms() -> float:
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    began = time.perf_counter()
+    subprocess.run([sys.executable, "-m", "ytbrief.cli", "--help"], env=env, capture_output=True, check=True)
+    return (time.perf_counter() - began) * 1000
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=10)
+    parser.add_argument("--top", type=int, default=10)
+    args = parser.parse_args()
+
+    importtime("ytbrief.cli")  # warm the bytecode cache
+    runs = [importtime("ytbrief.cli") for _ in range(args.runs)]
+    last = runs[-1]
+    report = {
+        "runs": args.runs,
+        "import_ytbrief_cli_ms": round(statistics.median(r["ytbrief.cli"] for r in runs) / 1000, 2),
+        "help_wall_ms": round(statistics.median(help_wall_ms() for _ in range(args.runs)), 2),
+        "slowest_modules_ms": {
+            name: round(us / 1000, 2)
+            for name, us in sorted(last.items(), key=lambda kv: -kv[1])[: args.top]
+            if name != "ytbrief.cli"
+        },
+        "lazy_modules_loaded": sorted(m for m in last if m.split(".")[0] in LAZY_MODULES or m in LAZY_MODULES),
+    }
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
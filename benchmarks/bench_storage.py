@@ -0,0 +1,123 @@
+"""Per-date Storage query latency as history grows, with and without the query indexes.
+
+    python benchmarks/bench_storage.py --days 30,365,1095 --per-day 40
+
+Grows one synthetic database to each size in turn (videos, summaries, one digest per day) and
+times the per-date reads the pipeline makes. Each query runs once with the composite indexes
+from the latest migration and once with them dropped. With the indexes the latency should stay
+flat as days are added.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import statistics
+import sys
+import tempfile
+import time
+from datetime import date, timedelta
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parents[1] / "src"))
+
+from ytbrief.storage import Storage
+
+QUERY_INDEXES = {
+    "idx_videos_date_published": "CREATE INDEX idx_videos_date_published ON videos(date, published_at)",
+    "idx_video_summaries_date_status": "CREATE INDEX idx_video_summaries_date_status ON video_summaries(date, status)",
+}
+START = date(2023, 1, 1)
+
+
+def _summary(i: int) -> str:
+    return json.dumps(
+        {
+            "one_liner": f"요약 {i}",
+            "market_drivers": ["금리", "환율", "수급"],
+            "key_events": [{"event": "FOMC", "why": "금리 경로"}],
+            "sectors_assets": [{"name": "반도체", "direction": "up", "why": "수급"}],
+            "numbers": [{"metric": "코스피", "value": "2600", "context": "종가"}],
+            "tickers_mentions": [{"ticker": "NVDA", "context": "실적"}],
+            "what_to_watch": ["CPI", "옵션 만기", "실적"],
+            "confidence": "medium",
+        },
+        ensure_ascii=False,
+    )
+
+
+def grow(store: Storage, first_day: int, last_day: int, per_day: int) -> None:
+    for offset in range(first_day, last_day):
+        day = (START + timedelta(days=offset)).isoformat()
+        videos = [
+            {
+                "video_id": f"{day}-{i}",
+                "date": day,
+                "title": f"모닝브리핑 {i}",
+                "channel": f"채널{i % 13}",
+                "published_at": f"{day}T{i % 24:02d}:{i % 60:02d}:00Z",
+                "url": f"https://www.youtube.com/watch?v={day}-{i}",
+                "fetched_at": day,
+            }
+            for i in range(per_day)
+        ]
+        store.upsert_videos(videos)
+        # Leave a few videos per day failed or unsummarized, like real runs.
+        store.upsert_video_summaries(
+            [(v["video_id"], day, _summary(i), "success" if i % 10 else "failed") for i, v in enumerate(videos[:-2])]
+        )
+        store.upsert_daily_digest(day, "{}", "success")
+
+
+def time_queries(store: Storage, days: int, samples: int) -> dict[str, float]:
+    rng = random.Random(days)
+    picks = [(START + timedelta(days=rng.randrange(days))).isoformat() for _ in range(samples)]
+    queries = {
+        "list_videos_by_date": store.list_videos_by_date,
+        "list_pending_videos": store.list_pending_videos,
+        "list_successful_summaries": store.list_successful_summaries,
+    }
+    result = {}
+    for name, query in queries.items():
+        timings = []
+        for day in picks:
+            began = time.perf_counter()
+            query(day)
+            timings.append((time.perf_counter() - began) * 1000)
+        result[name] = round(statistics.median(timings), 4)
+    return result
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--days", default="30,365,1095")
+    parser.add_argument("--per-day", type=int, default=40)
+    parser.add_argument("--samples", type=int, default=50)
+    args = parser.parse_args()
+
+    report = {"per_day": args.per_day, "median_ms": {}}
+    with tempfile.TemporaryDirectory() as tmp:
+        store = Storage(str(Path(tmp) / "history.db"))
+        built = 0
+        for days in sorted(int(d) for d in args.days.split(",")):
+            grow(store, built, days, args.per_day)
+            built = days
+            store.conn.execute("ANALYZE")
+            indexed = time_queries(store, days, args.samples)
+            for name in QUERY_INDEXES:
+                store.conn.execute(f"DROP INDEX {name}")
+            unindexed = time_queries(store, days, args.samples)
+            for sql in QUERY_INDEXES.values():
+                store.conn.execute(sql)
+            store.conn.commit()
+            report["median_ms"][str(days)] = {
+                "videos": days * args.per_day,
+                "indexed": indexed,
+                "without_query_indexes": unindexed,
+            }
+        store.close()
+    print(json.dumps(report, indent=2))
+
+
+if __name__ == "__main__":
+    main()
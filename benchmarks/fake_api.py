@@ -0,0 +1,361 @@
+"""Local stand-in for the YouTube Data, Gemini and Notion APIs used by the benchmarks.
+
+    python benchmarks/fake_api.py --port 8765 --videos 100 --latency-ms 20 --error-rate 0.02 --malformed-rate 0.05
+
+GET /_stats returns per-endpoint call counts and injected faults; POST /_reset clears them.
+Notion pages live in memory for the lifetime of the server.
+"""
+from __future__ import annotations
+
+import argparse
+import json
+import random
+import re
+import threading
+import time
+import urllib.parse
+import uuid
+from dataclasses import dataclass
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+# Faults seen from real models: the first three are JSON syntax errors, the last one parses but
+# fails the schema (too few market_drivers) and so needs the model to repair it.
+MALFORMED_KINDS = ("fenced", "trailing_comma", "truncated", "schema")
+SECTORS = ("반도체", "2차전지", "바이오", "자동차", "은행", "조선")
+TICKERS = ("005930", "000660", "373220", "NVDA", "TSLA", "AAPL")
+
+
+@dataclass
+class FakeConfig:
+    videos: int = 100
+    latency_ms: float = 0.0
+    error_rate: float = 0.0  # share of requests answered with 429 or 503
+    malformed_rate: float = 0.0  # share of summary responses that are not valid VideoSummary JSON
+    notion_page_size: int = 100
+    seed: int = 7
+
+
+class FakeState:
+    def __init__(self, config: FakeConfig):
+        self.config = config
+        self.lock = threading.Lock()
+        self.pages: dict[str, dict] = {}  # page_id -> {"date": str, "title": str, "blocks": list}
+        self.blocks: dict[str, str] = {}  # block_id -> page_id
+        self.reset()
+
+    def reset(self) -> None:
+        with self.lock:
+            self.random = random.Random(self.config.seed)
+            self.calls: dict[str, int] = {}
+            self.faults: dict[str, int] = {}
+
+    def count(self, bucket: dict[str, int], key: str) -> None:
+        with self.lock:
+            bucket[key] = bucket.get(key, 0) + 1
+
+    def roll(self, rate: float) -> bool:
+        with self.lock:
+            return rate > 0 and self.random.random() < rate
+
+    def choice(self, options: tuple[str, ...]) -> str:
+        with self.lock:
+            return self.random.choice(options)
+
+
+def _video_id(i: int) -> str:
+    return f"vid{i:06d}"
+
+
+def _summary(video_id: str) -> dict:
+    n = int(video_id[3:])
+    sector = SECTORS[n % len(SECTORS)]
+    ticker = TICKERS[n % len(TICKERS)]
+    return {
+        "one_liner": f"{sector} 중심으로 외국인 순매수가 이어지며 지수가 반등했다 ({video_id})",
+        "market_drivers": ["미국 금리 동결 기대", f"{sector} 업황 개선", "환율 안정"],
+        "key_events": [{"event": "FOMC 의사록 공개", "why": "금리 경로 확인"}],
+        "sectors_assets": [{"name": sector, "direction": ("up", "down", "mixed")[n % 3], "why": "수급 개선"}],
+        "numbers": [{"metric": "코스피", "value": f"{2500 + n % 100}", "context": "전일 대비 상승"}],
+        "tickers_mentions": [{"ticker": ticker, "context": "실적 기대"}],
+        "what_to_watch": ["CPI 발표", "옵션 만기", f"{sector} 수출 지표"],
+        "confidence": "medium",
+    }
+
+
+def _malformed(result: dict, kind: str) -> str:
+    text = json.dumps(result, ensure_ascii=False)
+    if kind == "fenced":
+        return f"```json\n{text}\n```"
+    if kind == "trailing_comma":
+        return text[:-1] + ",}"
+    if kind == "truncated":
+        return text[: len(text) * 2 // 3]
+    return json.dumps({"one_liner": result["one_liner"], "market_drivers": ["only one"]}, ensure_ascii=False)
+
+
+def _embedded_json(prompt: str, field: str) -> list[dict]:
+    match = re.search(rf"^{field}=(.*)$", prompt, re.M)
+    return json.loads(match.group(1)) if match else []
+
+
+def _digest(prompt: str) -> dict:
+    date = re.search(r"^date=(\S+)$", prompt, re.M)
+    sources: dict[str, dict] = {}
+    # Recursive map-reduce feeds partial digests back in as "summaries".
+    for item in _embedded_json(prompt, "summaries") + _embedded_json(prompt, "partial_digests"):
+        for src in [item["source"]] if "source" in item else item.get("sources", []):
+            sources.setdefault(src["url"], src)
+    return {
+        "date": date.group(1) if date else "",
+        "one_liner": f"{len(sources)}개 영상 기준 반도체 주도의 반등",
+        "consensus": ["금리 동결 기대", "외국인 순매수", "반도체 강세"],
+        "differences": ["환율 전망", "2차전지 바닥 논쟁", "중국 경기"],
+        "checklist": ["CPI", "옵션 만기", "실적 발표"],
+        "top_topics": list(SECTORS[:3]),
+        "sources": list(sources.values()),
+    }
+
+
+def make_handler(state: FakeState):
+    config = state.config
+
+    class Handler(BaseHTTPRequestHandler):
+        protocol_version = "HTTP/1.1"
+        disable_nagle_algorithm = True
+
+        def log_message(self, *args):
+            pass
+
+        def _send(self, status: int, body: object, headers: dict | None = None) -> None:
+            raw = json.dumps(body, ensure_ascii=False).encode("utf-8")
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(raw)))
+            for key, value in (headers or {}).items():
+                self.send_header(key, value)
+            self.end_headers()
+            self.wfile.write(raw)
+
+        def _body(self) -> dict:
+            length = int(self.headers.get("Content-Length") or 0)
+            return json.loads(self.rfile.read(length) or b"{}") if length else {}
+
+        def _dispatch(self, method: str) -> None:
+            parts = urllib.parse.urlsplit(self.path)
+            path, query = parts.path, dict(urllib.parse.parse_qsl(parts.query))
+            body = self._body() if method in ("POST", "PATCH") else {}
+            if path == "/_stats":
+                with state.lock:
+                    return self._send(200, {"calls": dict(state.calls), "faults": dict(state.faults)})
+            if path == "/_reset":
+                state.reset()
+                return self._send(200, {})
+            route = _route(method, path)
+            state.count(state.calls, route)
+            if config.latency_ms:
+                time.sleep(config.latency_ms / 1000)
+            if state.roll(config.error_rate):
+                throttled = state.roll(0.5)
+                state.count(state.faults, f"{route} {'429' if throttled else '503'}")
+                return self._send(429 if throttled else 503, {"error": "injected"}, {"Retry-After": "0"})
+            handler = getattr(self, "_" + route.replace(" ", "_").replace(".", "_"), None)
+            if handler is None:
+                return self._send(404, {"error": f"no route for {method} {path}"})
+            handler(path, query, body)
+
+        def do_GET(self):
+            self._dispatch("GET")
+
+        def do_POST(self):
+            self._dispatch("POST")
+
+        def do_PATCH(self):
+            self._dispatch("PATCH")
+
+        def do_DELETE(self):
+            self._dispatch("DELETE")
+
+        # YouTube
+
+        def _youtube_search(self, path, query, body):
+            offset = int(query.get("pageToken") or 0)
+            size = int(query.get("maxResults", 5))
+            day = query.get("publishedAfter", "2026-01-01")[:10]
+            items = [
+                {
+                    "id": {"videoId": _video_id(i)},
+                    "snippet": {"title": f"모닝브리핑 {i}", "channelTitle": f"채널{i % 17}", "publishedAt": f"{day}T{i % 24:02d}:00:00Z"},
+                }
+                for i in range(offset, min(offset + size, config.videos))
+            ]
+            data = {"items": items}
+            if offset + size < config.videos:
+                data["nextPageToken"] = str(offset + size)
+            self._send(200, data)
+
+        def _youtube_videos(self, path, query, body):
+            items = [
+                {
+                    "id": vid,
+                    "snippet": {"liveBroadcastContent": "none"},
+                    "contentDetails": {"duration": f"PT{5 + int(vid[3:]) % 30}M"},
+                    "statistics": {"viewCount": str(1000 + int(vid[3:]))},
+                }
+                for vid in query.get("id", "").split(",")
+                if vid
+            ]
+            self._send(200, {"items": items})
+
+        # Gemini
+
+        def _gemini_generate(self, path, query, body):
+            prompt = body["contents"][0]["parts"][0]["text"]
+            repair = prompt.startswith(("Your previous output was invalid", "Fix this to valid JSON"))
+            video = re.search(r"vid\d{6}", prompt)
+            if repair and video:
+                result = _summary(video.group(0))
+            elif repair:
+                result = _digest(prompt.split("\n", 1)[1])
+            elif "partial_digests=" in prompt or "summaries=" in prompt:
+                result = _digest(prompt)
+            else:
+                result = _summary(video.group(0) if video else _video_id(0))
+            text = json.dumps(result, ensure_ascii=False)
+            if "sectors_assets" in result and not repair and state.roll(config.malformed_rate):
+                kind = state.choice(MALFORMED_KINDS)
+                state.count(state.faults, f"gemini.generate malformed {kind}")
+                text = _malformed(result, kind)
+            prompt_tokens = len(prompt) // 3
+            output_tokens = len(text) // 3
+            self._send(
+                200,
+                {
+                    "candidates": [{"content": {"parts": [{"text": text}]}}],
+                    "usageMetadata": {
+                        "promptTokenCount": prompt_tokens,
+                        "candidatesTokenCount": output_tokens,
+                        "totalTokenCount": prompt_tokens + output_tokens,
+                    },
+                },
+            )
+
+        # Notion
+
+        def _notion_query(self, path, query, body):
+            conditions = body.get("filter", {})
+            conditions = conditions.get("and", [conditions])
+            wanted = {c["property"]: c.get("date", c.get("title", {})).get("equals") for c in conditions}
+            with state.lock:
+                found = [
+                    {"id": pid}
+                    for pid, page in state.pages.items()
+                    if all(page[{"Date": "date", "Name": "title"}[prop]] == value for prop, value in wanted.items())
+                ]
+            self._send(200, {"results": found[: body.get("page_size", 100)], "has_more": False})
+
+        def _notion_create(self, path, query, body):
+            page_id = uuid.uuid4().hex
+            date = body["properties"]["Date"]["date"]["start"]
+            title = body["properties"]["Name"]["title"][0]["text"]["content"]
+            with state.lock:
+                state.pages[page_id] = {"date": date, "title": title, "blocks": []}
+            self._append(page_id, body.get("children", []))
+            self._send(200, {"id": page_id})
+
+        def _notion_update_page(self, path, query, body):
+            page_id = path.rsplit("/", 1)[1]
+            with state.lock:
+                exists = page_id in state.pages
+            self._send(200 if exists else 404, {"id": page_id} if exists else {"object": "error", "code": "object_not_found"})
+
+        def _notion_list_children(self, path, query, body):
+            page_id = path.split("/")[-2]
+            size = min(int(query.get("page_size", 100)), config.notion_page_size)
+            start = int(query.get("start_cursor") or 0)
+            with state.lock:
+                blocks = list(state.pages.get(page_id, {}).get("blocks", []))
+            chunk = blocks[start : start + size]
+            more = start + size < len(blocks)
+            self._send(200, {"results": chunk, "has_more": more, "next_cursor": str(start + size) if more else None})
+
+        def _notion_append(self, path, query, body):
+            page_id = path.split("/")[-2]
+            self._append(page_id, body.get("children", []))
+            self._send(200, {"results": []})
+
+        def _notion_update_block(self, path, query, body):
+            block_id = path.rsplit("/", 1)[1]
+            with state.lock:
+                page = state.pages.get(state.blocks.get(block_id, ""))
+                for block in page["blocks"] if page else []:
+                    if block["id"] == block_id:
+                        block.update(body)
+            self._send(200, {"id": block_id})
+
+        def _notion_delete_block(self, path, query, body):
+            block_id = path.rsplit("/", 1)[1]
+            with state.lock:
+                page = state.pages.get(state.blocks.pop(block_id, ""))
+                if page:
+                    page["blocks"] = [b for b in page["blocks"] if b["id"] != block_id]
+            self._send(200, {"id": block_id, "archived": True})
+
+        def _append(self, page_id: str, children: list[dict]) -> None:
+            with state.lock:
+                for child in children:
+                    block_id = uuid.uuid4().hex
+                    state.pages[page_id]["blocks"].append({**child, "id": block_id})
+                    state.blocks[block_id] = page_id
+
+    Handler.__name__ = "FakeApiHandler"
+    return Handler
+
+
+def _route(method: str, path: str) -> str:
+    if path.startswith("/youtube/v3/search"):
+        return "youtube.search"
+    if path.startswith("/youtube/v3/videos"):
+        return "youtube.videos"
+    if path.endswith(":generateContent"):
+        return "gemini.generate"
+    if path.startswith("/v1/databases/"):
+        return "notion.query"
+    if path == "/v1/pages":
+        return "notion.create"
+    if path.startswith("/v1/pages/"):
+        return "notion.update_page"
+    if path.startswith("/v1/blocks/") and path.endswith("/children"):
+        return "notion.list_children" if method == "GET" else "notion.append"
+    if path.startswith("/v1/blocks/"):
+        return "notion.delete_block" if method == "DELETE" else "notion.update_block"
+    return f"unknown {method} {path}"
+
+
+def start_server(config: FakeConfig, port: int = 0) -> tuple[ThreadingHTTPServer, FakeState]:
+    state = FakeState(config)
+    server = ThreadingHTTPServer(("127.0.0.1", port), make_handler(state))
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, state
+
+
+def main() -> None:
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--videos", type=int, default=100)
+    parser.add_argument("--latency-ms", type=float, default=0.0)
+    parser.add_argument("--error-rate", type=float, default=0.0)
+    parser.add_argument("--malformed-rate", type=float, default=0.0)
+    parser.add_argument("--notion-page-size", type=int, default=100)
+    args = parser.parse_args()
+    config = FakeConfig(args.videos, args.latency_ms, args.error_rate, args.malformed_rate, args.notion_page_size)
+    server, _ = start_server(config, args.port)
+    print(f"fake APIs listening on http://127.0.0.1:{server.server_port}", flush=True)
+    try:
+        threading.Event().wait()
+    except KeyboardInterrupt:
+        server.shutdown()
+
+
+if __name__ == "__main__":
+    main()
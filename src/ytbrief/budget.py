@@ -0,0 +1,192 @@
+from __future__ import annotations
+
+import logging
+import math
+import os
+import threading
+from dataclasses import dataclass
+from datetime import datetime
+from typing import TYPE_CHECKING
+from zoneinfo import ZoneInfo
+
+from .transport import BudgetExceededError
+
+if TYPE_CHECKING:
+    from .storage import Storage
+
+log = logging.getLogger(__name__)
+
+# YouTube and Gemini daily quotas both reset at midnight Pacific time.
+QUOTA_TZ = ZoneInfo("America/Los_Angeles")
+YOUTUBE_DAILY_UNITS = 10_000
+# Used by the planner until the token_usage history has real numbers.
+DEFAULT_SUMMARY_TOKENS = 60_000
+DEFAULT_DIGEST_TOKENS = 20_000
+
+
+def quota_day() -> str:
+    return datetime.now(QUOTA_TZ).date().isoformat()
+
+
+def _env_int(name: str, default: int | None = None) -> int | None:
+    value = os.getenv(name)
+    if not value:
+        return default
+    return int(value) or None  # 0 means unlimited
+
+
+@dataclass
+class BudgetLimits:
+    youtube_units: int | None = YOUTUBE_DAILY_UNITS
+    gemini_requests: int | None = None
+    gemini_tokens: int | None = None
+
+    @classmethod
+    def from_env(cls) -> BudgetLimits:
+        return cls(
+            youtube_units=_env_int("YOUTUBE_DAILY_QUOTA", YOUTUBE_DAILY_UNITS),
+            gemini_requests=_env_int("GEMINI_DAILY_REQUESTS"),
+            gemini_tokens=_env_int("GEMINI_DAILY_TOKENS"),
+        )
+
+
+class Budget:
+    # Daily usage lives in the api_usage ledger rather than in memory, so a backfill, a rerun
+    # and the morning run in separate processes all draw from the same budget.
+    def __init__(self, store: Storage, limits: BudgetLimits | None = None, reserve: float = 0.0):
+        self.store = store
+        self.limits = limits or BudgetLimits()
+        self.reserve = reserve  # fraction of every limit this process must leave untouched
+        self._lock = threading.Lock()
+
+    def _cap(self, limit: int | None) -> int | None:
+        return None if limit is None else int(limit * (1 - self.reserve))
+
+    def usage(self, api: str, day: str | None = None) -> dict[str, int]:
+        row = self.store.get_api_usage(day or quota_day(), api)
+        keys = ("calls", "units", "prompt_tokens", "output_tokens", "exhausted")
+        return {k: row[k] for k in keys} if row else dict.fromkeys(keys, 0)
+
+    def available(self, day: str | None = None) -> dict[str, int | None]:
+        # Remaining units after the reserve; None means no limit is configured.
+        youtube, gemini = self.usage("youtube", day), self.usage("gemini", day)
+        caps = {
+            "youtube_units": (self._cap(self.limits.youtube_units), youtube["units"], youtube["exhausted"]),
+            "gemini_requests": (self._cap(self.limits.gemini_requests), gemini["units"], gemini["exhausted"]),
+            "gemini_tokens": (
+                self._cap(self.limits.gemini_tokens),
+                gemini["prompt_tokens"] + gemini["output_tokens"],
+                gemini["exhausted"],
+            ),
+        }
+        return {
+            name: 0 if exhausted else (None if cap is None else max(0, cap - used))
+            for name, (cap, used, exhausted) in caps.items()
+        }
+
+    def spend(self, api: str, units: int = 1) -> None:
+        # Called by the transport before every attempt, retries included: YouTube charges those too.
+        with self._lock:
+            left = self.available()
+            if api == "youtube":
+                short = left["youtube_units"] is not None and left["youtube_units"] < units
+            elif api == "gemini":
+                short = left["gemini_requests"] is not None and left["gemini_requests"] < units
+                short = short or left["gemini_tokens"] == 0
+            else:
+                short = False
+            if short:
+                raise BudgetExceededError(f"{api} daily budget exhausted ({left})")
+            self.store.add_api_usage(quota_day(), api, calls=1, units=units)
+
+    def record_tokens(self, api: str, usage: dict | None) -> None:
+        if usage:
+            self.store.add_api_usage(
+                quota_day(),
+                api,
+                prompt_tokens=int(usage.get("promptTokenCount", 0)),
+                output_tokens=int(usage.get("candidatesTokenCount", 0)),
+            )
+
+    def exhaust(self, api: str) -> None:
+        # The API said the daily quota is gone; remember it so no other date or process tries again.
+        log.warning("%s reported its daily quota exhausted; failing fast until midnight PT", api)
+        self.store.mark_api_exhausted(quota_day(), api)
+
+
+@dataclass
+class RunPlan:
+    date: str
+    youtube_units: int
+    gemini_requests: int
+    gemini_tokens: int
+    videos_to_summarize: int
+    available: dict[str, int | None]
+    fetch: bool = True  # False when there is no quota to search and the date already has videos
+    summarize_cap: int | None = None  # videos that fit the Gemini budget, None if all of them do
+
+    @property
+    def deferred(self) -> int:
+        return 0 if self.summarize_cap is None else max(0, self.videos_to_summarize - self.summarize_cap)
+
+    def describe(self) -> str:
+        return (
+            f"youtube_units={self.youtube_units} gemini_requests={self.gemini_requests} "
+            f"gemini_tokens~{self.gemini_tokens} videos={self.videos_to_summarize} "
+            f"fetch={self.fetch} deferred={self.deferred} available={self.available}"
+        )
+
+
+def _fits(need: int, left: int | None) -> bool:
+    return left is None or need <= left
+
+
+def _token_estimates(store: Storage) -> tuple[float, float]:
+    return (
+        store.average_tokens("summary") or DEFAULT_SUMMARY_TOKENS,
+        store.average_tokens("digest") or DEFAULT_DIGEST_TOKENS,
+    )
+
+
+def summary_capacity(store: Storage, budget: Budget, available: dict[str, int | None] | None = None) -> int | None:
+    # Videos the Gemini budget can still summarize after keeping room for the digest; None if unlimited.
+    available = available or budget.available()
+    per_summary, per_digest = _token_estimates(store)
+    caps = []
+    if available["gemini_requests"] is not None:
+        caps.append(available["gemini_requests"] - 1)
+    if available["gemini_tokens"] is not None:
+        caps.append(int((available["gemini_tokens"] - per_digest) // per_summary))
+    return max(0, min(caps)) if caps else None
+
+
+def plan_run(store: Storage, budget: Budget, date: str, limit: int, fanout: bool = False, force: bool = False) -> RunPlan:
+    from .youtube_client import KOREAN_KEYWORDS, SEARCH_QUOTA_UNITS, VIDEOS_QUOTA_UNITS
+
+    pages = math.ceil(limit / 50)
+    queries = len(KOREAN_KEYWORDS) if fanout else 1
+    youtube_units = queries * pages * SEARCH_QUOTA_UNITS + pages * VIDEOS_QUOTA_UNITS
+    available = budget.available()
+    fetch = _fits(youtube_units, available["youtube_units"])
+    if not fetch and not store.list_videos_by_date(date):
+        raise BudgetExceededError(f"youtube: {date} needs ~{youtube_units} quota units, {available['youtube_units']} left today")
+    if fetch:
+        # Videos already summarized for the date are skipped, so a rerun only pays for the rest.
+        done = 0 if force else len(store.successful_video_ids(date))
+        videos = max(0, limit - done)
+    else:
+        videos = len(store.list_videos_by_date(date, representatives_only=True) if force else store.list_pending_videos(date))
+    per_summary, per_digest = _token_estimates(store)
+    plan = RunPlan(
+        date=date,
+        youtube_units=youtube_units if fetch else 0,
+        gemini_requests=videos + 1,
+        gemini_tokens=int(videos * per_summary + per_digest),
+        videos_to_summarize=videos,
+        available=available,
+        fetch=fetch,
+    )
+    cap = summary_capacity(store, budget, available)
+    if cap is not None and cap < videos:
+        plan.summarize_cap = cap
+    return plan
@@ -0,0 +1,94 @@
+from __future__ import annotations
+
+import hashlib
+import json
+import sqlite3
+import threading
+import time
+from pathlib import Path
+
+from .storage import Storage, configure_connection
+from .tracing import NULL_TRACER
+
+
+class ResponseCache:
+    def __init__(self, db_path: str, ttl: float = 7 * 24 * 3600, max_bytes: int = 64 * 1024 * 1024):
+        self.db_path = Path(db_path)
+        self.ttl = ttl
+        self.max_bytes = max_bytes
+        self.hits = 0
+        self.misses = 0
+        self._lock = threading.Lock()
+        self.tracer = NULL_TRACER
+        # The table is part of Storage's versioned schema, so migrate the file before opening it.
+        Storage(str(self.db_path)).close()
+        # Gemini workers run in threads; a private connection keeps cache I/O off the main Storage connection.
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
+        configure_connection(self.conn)
+
+    @staticmethod
+    def make_key(model: str, prompt: str, generation_config: dict) -> str:
+        material = json.dumps([model, prompt, generation_config], ensure_ascii=False, sort_keys=True)
+        return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> str | None:
+        now = time.time()
+        with self._lock, self.tracer.span("cache.get", "sqlite") as span:
+            row = self.conn.execute("SELECT response, created_at FROM gemini_cache WHERE key = ?", (key,)).fetchone()
+            if row is None or now - row[1] > self.ttl:
+                if row is not None:
+                    self.conn.execute("DELETE FROM gemini_cache WHERE key = ?", (key,))
+                    self.conn.commit()
+                self.misses += 1
+                span["hit"] = False
+                return None
+            self.conn.execute("UPDATE gemini_cache SET accessed_at = ? WHERE key = ?", (now, key))
+            self.conn.commit()
+            self.hits += 1
+            span["hit"] = True
+            return row[0]
+
+    def put(self, key: str, model: str, response: str) -> None:
+        now = time.time()
+        with self._lock, self.tracer.span("cache.put", "sqlite"):
+            self.conn.execute(
+                """
+                INSERT INTO gemini_cache(key, model, response, size, created_at, accessed_at)
+                VALUES (?, ?, ?, ?, ?, ?)
+                ON CONFLICT(key) DO UPDATE SET
+                  model=excluded.model,
+                  response=excluded.response,
+                  size=excluded.size,
+                  created_at=excluded.created_at,
+                  accessed_at=excluded.accessed_at
+                """,
+                (key, model, response, len(response.encode("utf-8")), now, now),
+            )
+            self._evict(now)
+            self.conn.commit()
+
+    def discard(self, key: str) -> None:
+        with self._lock:
+            self.conn.execute("DELETE FROM gemini_cache WHERE key = ?", (key,))
+            self.conn.commit()
+
+    def _evict(self, now: float) -> None:
+        self.conn.execute("DELETE FROM gemini_cache WHERE created_at < ?", (now - self.ttl,))
+        total = self.conn.execute("SELECT COALESCE(SUM(size), 0) FROM gemini_cache").fetchone()[0]
+        if total <= self.max_bytes:
+            return
+        stale = []
+        for key, size in self.conn.execute("SELECT key, size FROM gemini_cache ORDER BY accessed_at"):
+            if total <= self.max_bytes:
+                break
+            stale.append((key,))
+            total -= size
+        self.conn.executemany("DELETE FROM gemini_cache WHERE key = ?", stale)
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            entries, size = self.conn.execute("SELECT COUNT(*), COALESCE(SUM(size), 0) FROM gemini_cache").fetchone()
+        return {"hits": self.hits, "misses": self.misses, "entries": entries, "bytes": size}
+
+    def close(self) -> None:
+        self.conn.close()
@@ -2,61 +2,139 @@ from __future__ import annotations
 
 import logging
 import os
+import re
 from datetime import date as date_type
+from datetime import datetime, time
+from typing import TYPE_CHECKING
 
 import typer
-from dotenv import load_dotenv
 from rich.console import Console
 
-from .logic import create_digest, fetch_videos, publish_notion, run_pipeline, summarize_videos
+# Pipeline modules (HTTP clients, pydantic schemas) are imported inside each command so
+# `ytbrief --help` and stages that have nothing to do start quickly.
+if TYPE_CHECKING:
+    from .logic import DateRunStatus, WatchPoll
+    from .youtube_client import VideoFilter
 
 app = typer.Typer(help="YouTube morning brief -> Gemini digest -> Notion publisher")
 console = Console()
 
 
-def _setup() -> None:
-    load_dotenv()
+def _setup(load_env: bool = True) -> None:
+    if load_env:
+        from dotenv import load_dotenv
+
+        load_dotenv()
     logging.basicConfig(level=logging.INFO, format="%(message)s", handlers=[logging.StreamHandler()])
 
 
 def _validate_date(date: str) -> str:
+    if date == "today":
+        return _seoul_now().date().isoformat()
     date_type.fromisoformat(date)
     return date
 
 
+def _seoul_now() -> datetime:
+    from zoneinfo import ZoneInfo
+
+    return datetime.now(ZoneInfo("Asia/Seoul"))
+
+
+def _parse_interval(value: str) -> float:
+    match = re.fullmatch(r"(\d+(?:\.\d+)?)([smh]?)", value.strip())
+    if not match:
+        raise typer.BadParameter(f"expected a duration like 90s, 10m or 1h, got {value!r}")
+    return float(match[1]) * {"": 1, "s": 1, "m": 60, "h": 3600}[match[2]]
+
+
 def _gemini_model() -> str:
     return os.getenv("GEMINI_MODEL", "gemini-1.5-pro")
 
 
+def _video_filter(min_duration: int, max_duration: int, min_views: int, allow_live: bool) -> VideoFilter:
+    from .youtube_client import VideoFilter
+
+    return VideoFilter(
+        min_duration=min_duration or None,
+        max_duration=max_duration or None,
+        min_views=min_views or None,
+        allow_live=allow_live,
+    )
+
+
 @app.command("fetch")
-def fetch_cmd(date: str = typer.Option(..., "--date"), limit: int = typer.Option(20, "--limit"), db: str = typer.Option("ytbrief.db", "--db")):
+def fetch_cmd(
+    date: str = typer.Option(..., "--date"),
+    limit: int = typer.Option(20, "--limit"),
+    db: str = typer.Option("ytbrief.db", "--db"),
+    fanout: bool = typer.Option(False, "--fanout", help="Search each keyword separately and merge the results"),
+    min_duration: int = typer.Option(61, "--min-duration", min=0, help="Skip videos shorter than N seconds (0 disables)"),
+    max_duration: int = typer.Option(5400, "--max-duration", min=0, help="Skip videos longer than N seconds (0 disables)"),
+    min_views: int = typer.Option(0, "--min-views", min=0, help="Skip videos with fewer views"),
+    allow_live: bool = typer.Option(False, "--allow-live", help="Keep live and upcoming broadcasts"),
+):
     _setup()
     date = _validate_date(date)
-    count = fetch_videos(db, date, limit)
+    from .logic import fetch_videos
+
+    count = fetch_videos(db, date, limit, fanout=fanout, video_filter=_video_filter(min_duration, max_duration, min_views, allow_live))
     console.print(f"[green]Fetched {count} videos for {date}[/green]")
 
 
 @app.command("summarize")
-def summarize_cmd(date: str = typer.Option(..., "--date"), db: str = typer.Option("ytbrief.db", "--db")):
+def summarize_cmd(
+    date: str = typer.Option(..., "--date"),
+    db: str = typer.Option("ytbrief.db", "--db"),
+    concurrency: int = typer.Option(1, "--concurrency", min=1, help="Parallel Gemini requests"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the local Gemini response cache"),
+    force: bool = typer.Option(False, "--force", help="Re-summarize every video, including successful ones"),
+    max_attempts: int | None = typer.Option(None, "--max-attempts", min=1, help="Stop retrying a failed video after N attempts"),
+    no_dedup: bool = typer.Option(False, "--no-dedup", help="Summarize near-duplicate uploads separately"),
+):
     _setup()
     date = _validate_date(date)
-    ok, failed = summarize_videos(db, date, _gemini_model())
+    from .logic import summarize_videos
+
+    ok, failed = summarize_videos(
+        db,
+        date,
+        _gemini_model(),
+        concurrency=concurrency,
+        use_cache=not no_cache,
+        force=force,
+        max_attempts=max_attempts,
+        dedup=not no_dedup,
+    )
     console.print(f"[green]Summaries success={ok} failed={failed}[/green]")
 
 
 @app.command("digest")
-def digest_cmd(date: str = typer.Option(..., "--date"), db: str = typer.Option("ytbrief.db", "--db")):
+def digest_cmd(
+    date: str = typer.Option(..., "--date"),
+    db: str = typer.Option("ytbrief.db", "--db"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the local Gemini response cache"),
+    force: bool = typer.Option(False, "--force", help="Rebuild even if the summaries have not changed"),
+):
     _setup()
     date = _validate_date(date)
-    status = create_digest(db, date, _gemini_model())
+    from .logic import create_digest
+
+    status = create_digest(db, date, _gemini_model(), use_cache=not no_cache, force=force)
     console.print(f"[green]Digest status={status}[/green]")
 
 
 @app.command("publish-notion")
-def publish_cmd(date: str = typer.Option(..., "--date"), db: str = typer.Option("ytbrief.db", "--db")):
+def publish_cmd(
+    date: str = typer.Option(..., "--date"),
+    db: str = typer.Option("ytbrief.db", "--db"),
+    force: bool = typer.Option(False, "--force", help="Publish even if the page content has not changed"),
+):
     _setup()
     date = _validate_date(date)
-    page_id = publish_notion(db, date)
+    from .logic import publish_notion
+
+    page_id = publish_notion(db, date, force=force)
     console.print(f"[green]Published/updated Notion page={page_id}[/green]")
 
 
@@ -65,10 +143,38 @@ def run_cmd(
     date: str = typer.Option(..., "--date"),
     limit: int = typer.Option(20, "--limit"),
     db: str = typer.Option("ytbrief.db", "--db"),
+    concurrency: int = typer.Option(1, "--concurrency", min=1, help="Parallel Gemini requests"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the local Gemini response cache"),
+    force: bool = typer.Option(False, "--force", help="Reprocess every video and rebuild/republish unchanged output"),
+    max_attempts: int | None = typer.Option(None, "--max-attempts", min=1, help="Stop retrying a failed video after N attempts"),
+    fanout: bool = typer.Option(False, "--fanout", help="Search each keyword separately and merge the results"),
+    min_duration: int = typer.Option(61, "--min-duration", min=0, help="Skip videos shorter than N seconds (0 disables)"),
+    max_duration: int = typer.Option(5400, "--max-duration", min=0, help="Skip videos longer than N seconds (0 disables)"),
+    min_views: int = typer.Option(0, "--min-views", min=0, help="Skip videos with fewer views"),
+    allow_live: bool = typer.Option(False, "--allow-live", help="Keep live and upcoming broadcasts"),
+    stream: bool = typer.Option(False, "--stream", help="Start summarizing while discovery is still paging"),
+    no_dedup: bool = typer.Option(False, "--no-dedup", help="Summarize near-duplicate uploads separately"),
+    trace: str | None = typer.Option(None, "--trace", help="Write a Chrome/Perfetto timeline of the run to this JSON file"),
 ):
     _setup()
     date = _validate_date(date)
-    result = run_pipeline(db, date, limit, _gemini_model())
+    from .logic import run_pipeline
+
+    result = run_pipeline(
+        db,
+        date,
+        limit,
+        _gemini_model(),
+        concurrency=concurrency,
+        use_cache=not no_cache,
+        force=force,
+        max_attempts=max_attempts,
+        fanout=fanout,
+        video_filter=_video_filter(min_duration, max_duration, min_views, allow_live),
+        stream=stream,
+        dedup=not no_dedup,
+        trace=trace,
+    )
     console.print(
         "[bold cyan]Pipeline summary[/bold cyan]\n"
         f"videos_found={result.found}\n"
@@ -79,5 +185,336 @@ def run_cmd(
     )
 
 
+@app.command("backfill")
+def backfill_cmd(
+    from_date: str = typer.Option(..., "--from"),
+    to_date: str = typer.Option(..., "--to"),
+    workers: int = typer.Option(2, "--workers", min=1, help="Dates processed in parallel"),
+    limit: int = typer.Option(20, "--limit"),
+    db: str = typer.Option("ytbrief.db", "--db"),
+    concurrency: int = typer.Option(1, "--concurrency", min=1, help="Parallel Gemini requests per date"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the local Gemini response cache"),
+    force: bool = typer.Option(False, "--force", help="Also redo dates that were already published"),
+    fanout: bool = typer.Option(False, "--fanout", help="Search each keyword separately and merge the results"),
+    no_dedup: bool = typer.Option(False, "--no-dedup", help="Summarize near-duplicate uploads separately"),
+    reserve: float = typer.Option(
+        0.2, "--reserve", min=0.0, max=1.0, help="Share of each daily API quota to leave for the morning run"
+    ),
+    trace: str | None = typer.Option(None, "--trace", help="Write a Chrome/Perfetto timeline of the run to this JSON file"),
+):
+    _setup()
+    from_date, to_date = _validate_date(from_date), _validate_date(to_date)
+    from rich.table import Table
+
+    from .logic import backfill
+
+    def show(status: DateRunStatus) -> None:
+        color = {"done": "green", "skipped": "dim", "deferred": "yellow", "failed": "red"}[status.status]
+        detail = status.error or ""
+        if status.result is not None:
+            detail = f"found={status.result.found} ok={status.result.summarized_success} failed={status.result.summarized_failed}"
+        console.print(f"[{color}]{status.date} {status.status}[/{color}] {detail}")
+
+    statuses = backfill(
+        db,
+        from_date,
+        to_date,
+        limit,
+        _gemini_model(),
+        workers=workers,
+        concurrency=concurrency,
+        use_cache=not no_cache,
+        force=force,
+        fanout=fanout,
+        dedup=not no_dedup,
+        reserve=reserve,
+        on_status=show,
+        trace=trace,
+    )
+    table = Table(title="Backfill")
+    for column in ("date", "status", "found", "ok", "failed", "seconds", "notion_page_id"):
+        table.add_column(column)
+    for st in statuses:
+        r = st.result
+        table.add_row(
+            st.date,
+            st.status,
+            str(r.found) if r else "",
+            str(r.summarized_success) if r else "",
+            str(r.summarized_failed) if r else "",
+            f"{st.seconds:.1f}" if st.seconds else "",
+            (r.notion_page_id or "") if r else "",
+        )
+    console.print(table)
+    if any(st.status == "failed" for st in statuses):
+        raise typer.Exit(code=1)
+
+
+@app.command("watch")
+def watch_cmd(
+    date: str = typer.Option("today", "--date", help="Date to watch (YYYY-MM-DD or today, in KST)"),
+    interval: str = typer.Option("10m", "--interval", help="Time between polls, e.g. 90s, 10m, 1h"),
+    until: str | None = typer.Option("10:00", "--until", help="Stop after this KST time on the watched date"),
+    max_polls: int | None = typer.Option(None, "--max-polls", min=1, help="Stop after N polls"),
+    limit: int = typer.Option(20, "--limit", help="Search results per poll"),
+    db: str = typer.Option("ytbrief.db", "--db"),
+    concurrency: int = typer.Option(1, "--concurrency", min=1, help="Parallel Gemini requests"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the local Gemini response cache"),
+    max_attempts: int = typer.Option(3, "--max-attempts", min=1, help="Stop retrying a failed video after N attempts"),
+    fanout: bool = typer.Option(False, "--fanout", help="Search each keyword separately and merge the results"),
+    min_duration: int = typer.Option(61, "--min-duration", min=0, help="Skip videos shorter than N seconds (0 disables)"),
+    max_duration: int = typer.Option(5400, "--max-duration", min=0, help="Skip videos longer than N seconds (0 disables)"),
+    min_views: int = typer.Option(0, "--min-views", min=0, help="Skip videos with fewer views"),
+    allow_live: bool = typer.Option(False, "--allow-live", help="Keep live and upcoming broadcasts"),
+    no_dedup: bool = typer.Option(False, "--no-dedup", help="Summarize near-duplicate uploads separately"),
+):
+    _setup()
+    date = _validate_date(date)
+    seconds = _parse_interval(interval)
+    deadline = None
+    if until:
+        try:
+            deadline = datetime.combine(date_type.fromisoformat(date), time.fromisoformat(until), _seoul_now().tzinfo)
+        except ValueError:
+            raise typer.BadParameter(f"expected HH:MM, got {until!r}")
+    from .logic import watch
+
+    def show(poll: WatchPoll) -> None:
+        stamp = _seoul_now().strftime("%H:%M:%S")
+        if poll.error:
+            console.print(f"[red]{stamp} poll {poll.poll} failed[/red] {poll.error}")
+            return
+        state = "[green]refreshed[/green]" if poll.refreshed else "[dim]unchanged[/dim]"
+        console.print(
+            f"{stamp} poll {poll.poll}: found={poll.found} ok={poll.summarized_success} "
+            f"failed={poll.summarized_failed} digest {state} notion_page_id={poll.notion_page_id}"
+        )
+
+    console.print(f"[bold cyan]Watching {date} every {interval}[/bold cyan]" + (f" until {until} KST" if until else ""))
+    polls = watch(
+        db,
+        date,
+        seconds,
+        limit,
+        _gemini_model(),
+        concurrency=concurrency,
+        use_cache=not no_cache,
+        max_attempts=max_attempts,
+        fanout=fanout,
+        video_filter=_video_filter(min_duration, max_duration, min_views, allow_live),
+        dedup=not no_dedup,
+        until=deadline,
+        max_polls=max_polls,
+        on_poll=show,
+    )
+    console.print(f"polls={len(polls)} refreshed={sum(p.refreshed for p in polls)}")
+
+
+def _fmt(value: object) -> str:
+    if value is None:
+        return "-"
+    if isinstance(value, float):
+        return f"{value:.3f}" if value < 1 else f"{value:,.0f}"
+    return str(value)
+
+
+@app.command("rollup")
+def rollup_cmd(
+    week: str | None = typer.Option(None, "--week", help="ISO week (2026-W07) or any date in it"),
+    month: str | None = typer.Option(None, "--month", help="Month (2026-02)"),
+    db: str = typer.Option("ytbrief.db", "--db"),
+    publish: bool = typer.Option(False, "--publish", help="Also create/update the rollup page in Notion"),
+    no_cache: bool = typer.Option(False, "--no-cache", help="Bypass the local Gemini response cache"),
+    force: bool = typer.Option(False, "--force", help="Rebuild every span even if its daily digests have not changed"),
+):
+    if bool(week) == bool(month):
+        raise typer.BadParameter("pass exactly one of --week or --month")
+    _setup()
+    from .logic import build_rollup
+
+    result = build_rollup(
+        db, "week" if week else "month", week or month, _gemini_model(), use_cache=not no_cache, force=force, publish=publish
+    )
+    if result.status == "empty":
+        console.print(f"[yellow]No successful daily digests between {result.start} and {result.end}[/yellow]")
+        raise typer.Exit(code=1)
+    console.print(
+        f"[green]Rollup {result.period} ({result.start} ~ {result.end}) status={result.status} "
+        f"days={result.days} rebuilt_spans={result.rebuilt} notion_page_id={result.notion_page_id}[/green]"
+    )
+
+
+@app.command("plan")
+def plan_cmd(
+    date: str = typer.Option(..., "--date"),
+    limit: int = typer.Option(20, "--limit"),
+    db: str = typer.Option("ytbrief.db", "--db"),
+    fanout: bool = typer.Option(False, "--fanout", help="Plan for one search per keyword"),
+    force: bool = typer.Option(False, "--force", help="Plan for re-summarizing every video"),
+):
+    _setup()
+    date = _validate_date(date)
+    from rich.table import Table
+
+    from .budget import Budget, BudgetLimits, plan_run, quota_day
+    from .storage import Storage
+    from .transport import BudgetExceededError
+
+    store = Storage(db)
+    budget = Budget(store, BudgetLimits.from_env())
+    day = quota_day()
+    table = Table(title=f"API usage on quota day {day} (Pacific time)")
+    for column in ("api", "calls", "units", "prompt_tokens", "output_tokens", "exhausted"):
+        table.add_column(column)
+    for row in store.list_api_usage(day, day):
+        table.add_row(row["api"], *(_fmt(row[c]) for c in ("calls", "units", "prompt_tokens", "output_tokens")), str(bool(row["exhausted"])))
+    console.print(table)
+    try:
+        plan = plan_run(store, budget, date, limit, fanout=fanout, force=force)
+    except BudgetExceededError as exc:
+        console.print(f"[red]{exc}[/red]")
+        raise typer.Exit(code=1)
+    finally:
+        store.close()
+    console.print(f"[bold cyan]Plan for {date}[/bold cyan]\n{plan.describe()}")
+
+
+@app.command("stats")
+def stats_cmd(
+    from_date: str = typer.Option(..., "--from"),
+    to_date: str = typer.Option(..., "--to"),
+    db: str = typer.Option("ytbrief.db", "--db"),
+):
+    _setup(load_env=False)
+    from_date, to_date = _validate_date(from_date), _validate_date(to_date)
+    from rich.table import Table
+
+    from .metrics import build_stats_report
+    from .storage import Storage
+
+    store = Storage(db)
+    report = build_stats_report(store, from_date, to_date)
+    store.close()
+    titles = {
+        "stages": "Stage durations (ms)",
+        "apis": "API calls (latency ms, p50/p95 are histogram bucket bounds)",
+        "tokens": "Gemini tokens by run day (per_item = per video for summary, per date for digest)",
+        "failures": "Summary failure rate by date",
+        "repairs": "Gemini JSON validation (local = repaired without a second call)",
+    }
+    for section, rows in report.items():
+        table = Table(title=titles[section])
+        if not rows:
+            console.print(f"[dim]{titles[section]}: no data[/dim]")
+            continue
+        for column in rows[0]:
+            table.add_column(column)
+        for row in rows:
+            table.add_row(*(_fmt(v) for v in row.values()))
+        console.print(table)
+
+
+@app.command("query")
+def query_cmd(
+    from_date: str = typer.Option(..., "--from"),
+    to_date: str = typer.Option(..., "--to"),
+    ticker: str | None = typer.Option(None, "--ticker", help="Days a ticker was mentioned, e.g. NVDA"),
+    sector: str | None = typer.Option(None, "--sector", help="Days a sector/asset moved, e.g. 반도체"),
+    direction: str | None = typer.Option(None, "--direction", help="With --sector: only up, down or mixed"),
+    metric: str | None = typer.Option(None, "--metric", help="Reported values of a number, e.g. 코스피"),
+    event: str | None = typer.Option(None, "--event", help="Key events whose text contains this"),
+    db: str = typer.Option("ytbrief.db", "--db"),
+):
+    _setup(load_env=False)
+    from_date, to_date = _validate_date(from_date), _validate_date(to_date)
+    selected = [name for name, value in (("ticker", ticker), ("sector", sector), ("metric", metric), ("event", event)) if value]
+    if len(selected) != 1:
+        raise typer.BadParameter("pass exactly one of --ticker, --sector, --metric or --event")
+    if direction and not sector:
+        raise typer.BadParameter("--direction only applies to --sector")
+    from rich.table import Table
+
+    from .storage import Storage
+
+    store = Storage(db)
+    if ticker:
+        title, rows = f"{ticker.upper()} mentions", store.ticker_mentions_by_date(ticker, from_date, to_date)
+    elif sector:
+        title, rows = f"{sector} moves", store.sector_moves_by_date(sector, from_date, to_date, direction)
+    elif metric:
+        title, rows = f"{metric} values", store.list_number_facts(metric, from_date, to_date)
+    else:
+        title, rows = f"Events matching {event!r}", store.search_key_events(event, from_date, to_date)
+    store.close()
+    if not rows:
+        console.print(f"[dim]{title}: nothing between {from_date} and {to_date}[/dim]")
+        return
+    table = Table(title=f"{title} ({from_date} ~ {to_date})")
+    for column in rows[0].keys():
+        table.add_column(column)
+    for row in rows:
+        table.add_row(*(_fmt(v) for v in row))
+    console.print(table)
+    if "mentions" in rows[0].keys():
+        console.print(f"days={len({r['date'] for r in rows})} mentions={sum(r['mentions'] for r in rows)}")
+
+
+@app.command("export")
+def export_cmd(
+    from_date: str = typer.Option(..., "--from"),
+    to_date: str = typer.Option(..., "--to"),
+    fmt: str = typer.Option("jsonl", "--format", help="jsonl, csv or parquet (needs pyarrow)"),
+    output: str = typer.Option(..., "--output", "-o", help="File for jsonl/csv, directory for parquet"),
+    flatten: bool = typer.Option(False, "--flatten", help="Summary fields as columns instead of summary_json"),
+    incremental: bool = typer.Option(False, "--incremental", help="Append only summaries newer than the last export"),
+    db: str = typer.Option("ytbrief.db", "--db"),
+):
+    _setup(load_env=False)
+    from_date, to_date = _validate_date(from_date), _validate_date(to_date)
+    from .export import EXPORT_FORMATS, export_history
+    from .storage import Storage
+
+    if fmt not in EXPORT_FORMATS:
+        raise typer.BadParameter(f"--format must be one of {', '.join(EXPORT_FORMATS)}")
+    store = Storage(db)
+    try:
+        result = export_history(store, from_date, to_date, output, fmt, flatten=flatten, incremental=incremental)
+    except (RuntimeError, ValueError) as exc:
+        console.print(f"[red]{exc}[/red]")
+        raise typer.Exit(code=1)
+    finally:
+        store.close()
+    since = f" since {result.since}" if result.since else ""
+    console.print(f"[green]Exported {result.rows} rows{since} to {result.path} ({result.files} files)[/green]")
+
+
+@app.command("clusters")
+def clusters_cmd(
+    date: str = typer.Option(..., "--date"),
+    db: str = typer.Option("ytbrief.db", "--db"),
+):
+    _setup(load_env=False)
+    date = _validate_date(date)
+    from rich.table import Table
+
+    from .storage import Storage
+
+    store = Storage(db)
+    rows = store.list_video_clusters(date)
+    store.close()
+    if not rows:
+        console.print(f"[dim]No clusters stored for {date}[/dim]")
+        return
+    table = Table(title=f"Near-duplicate clusters ({date})")
+    for column in ("representative", "video_id", "channel", "duration", "simhash", "title"):
+        table.add_column(column)
+    for r in rows:
+        rep = r["representative_id"]
+        table.add_row(rep if r["video_id"] == rep else "", r["video_id"], r["channel"], _fmt(r["duration_seconds"]), r["simhash"], r["title"])
+    console.print(table)
+    duplicates = sum(1 for r in rows if r["video_id"] != r["representative_id"])
+    console.print(f"videos={len(rows)} representatives={len(rows) - duplicates} duplicates={duplicates}")
+
+
 if __name__ == "__main__":
     app()
@@ -0,0 +1,123 @@
+from __future__ import annotations
+
+import hashlib
+import re
+import unicodedata
+from dataclasses import dataclass
+
+# Series/format boilerplate shared by unrelated briefings; removed before hashing so it does not
+# make every title look alike.
+BOILERPLATE = (
+    "모닝브리핑",
+    "장전시황",
+    "오늘시황",
+    "아침시황",
+    "증시브리핑",
+    "시장브리핑",
+    "풀버전",
+    "다시보기",
+    "재업로드",
+    "재업",
+    "라이브",
+    "live",
+    "shorts",
+    "full",
+)
+# Every briefing of a date carries the same date; other digits (1부/2부, index levels) stay.
+DATE_PATTERNS = (
+    r"\d{2,4}[-./년]\s*\d{1,2}[-./월]\s*\d{1,2}일?",
+    r"\d{1,2}\s*월\s*\d{1,2}\s*일",
+    r"\d{1,2}[/.]\d{1,2}",
+    r"\d{1,2}\s*일",
+    r"\([월화수목금토일]\)",
+)
+# "1부"/"2부", "part 2", "3편": installments of one briefing share most of their title.
+PART_RE = re.compile(r"\b(?:part|pt)\.?\s*(\d+)|(\d+)\s*[부편]")
+# SimHash distances over character bigrams, calibrated on briefing titles: reuploads and
+# #shorts cuts land at 0-12 bits, different briefings of the same day at 23+.
+SAME_TITLE_BITS = 6
+SIMILAR_TITLE_BITS = 14
+DURATION_TOLERANCE = 0.15
+
+
+def normalize_title(title: str) -> str:
+    text = unicodedata.normalize("NFKC", title).lower()
+    text = re.sub(r"#\S+", "", text)
+    for pattern in DATE_PATTERNS:
+        text = re.sub(pattern, "", text)
+    text = re.sub(r"[\W_]+", "", text)
+    for word in BOILERPLATE:
+        text = text.replace(word, "")
+    return text
+
+
+def simhash(text: str) -> int:
+    # Character bigrams rather than words: Korean titles space the same phrase inconsistently.
+    if not text:
+        return 0
+    grams = {text[i : i + 2] for i in range(len(text) - 1)} or {text}
+    weights = [0] * 64
+    for gram in grams:
+        h = int.from_bytes(hashlib.blake2b(gram.encode("utf-8"), digest_size=8).digest(), "big")
+        for bit in range(64):
+            weights[bit] += 1 if h >> bit & 1 else -1
+    return sum(1 << bit for bit, w in enumerate(weights) if w > 0)
+
+
+def hamming(a: int, b: int) -> int:
+    return bin(a ^ b).count("1")
+
+
+@dataclass
+class TitleFingerprint:
+    video_id: str
+    channel: str
+    duration: int | None
+    simhash: int
+    parts: frozenset[str] = frozenset()
+
+
+def title_parts(title: str) -> frozenset[str]:
+    text = unicodedata.normalize("NFKC", title).lower()
+    return frozenset(str(int(a or b)) for a, b in PART_RE.findall(text))
+
+
+def fingerprint_video(row: dict) -> TitleFingerprint:
+    return TitleFingerprint(
+        row["video_id"],
+        row.get("channel") or "",
+        row.get("duration_seconds"),
+        simhash(normalize_title(row["title"])),
+        title_parts(row["title"]),
+    )
+
+
+def is_near_duplicate(a: TitleFingerprint, b: TitleFingerprint) -> bool:
+    if not a.simhash or not b.simhash:  # nothing left of the title once boilerplate is removed
+        return False
+    if a.parts and b.parts and a.parts != b.parts:  # different installments, however alike the titles
+        return False
+    distance = hamming(a.simhash, b.simhash)
+    if distance <= SAME_TITLE_BITS:
+        return True
+    if distance > SIMILAR_TITLE_BITS:
+        return False
+    if a.channel and a.channel == b.channel:
+        return True
+    if a.duration and b.duration:
+        return abs(a.duration - b.duration) <= DURATION_TOLERANCE * max(a.duration, b.duration)
+    return False
+
+
+class Deduper:
+    # Greedy clustering: each video joins the first representative it nearly duplicates,
+    # otherwise it becomes a representative. Feed videos in order of preference.
+    def __init__(self) -> None:
+        self.representatives: list[TitleFingerprint] = []
+
+    def add(self, fp: TitleFingerprint) -> str:
+        for rep in self.representatives:
+            if is_near_duplicate(rep, fp):
+                return rep.video_id
+        self.representatives.append(fp)
+        return fp.video_id
@@ -0,0 +1,197 @@
+from __future__ import annotations
+
+import csv
+import json
+import logging
+from dataclasses import dataclass
+from datetime import datetime
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Iterable, Iterator
+
+if TYPE_CHECKING:
+    import sqlite3
+
+    from .storage import Storage
+
+log = logging.getLogger(__name__)
+
+EXPORT_FORMATS = ("jsonl", "csv", "parquet")
+BASE_COLUMNS = (
+    "video_id",
+    "date",
+    "status",
+    "attempts",
+    "created_at",
+    "title",
+    "channel",
+    "url",
+    "published_at",
+    "duration_seconds",
+    "view_count",
+    "representative_id",
+)
+# VideoSummary fields as columns with --flatten. Object lists stay JSON text in CSV and Parquet;
+# the entity tables (and `ytbrief query`) already index them one row per item.
+STRING_LIST_FIELDS = ("market_drivers", "what_to_watch")
+OBJECT_LIST_FIELDS = ("key_events", "sectors_assets", "numbers", "tickers_mentions")
+SUMMARY_COLUMNS = ("one_liner", "confidence", *STRING_LIST_FIELDS, *OBJECT_LIST_FIELDS, "error")
+INT_COLUMNS = ("attempts", "duration_seconds", "view_count")
+PARQUET_ROW_GROUP = 5000
+
+
+@dataclass
+class ExportResult:
+    path: str
+    format: str
+    rows: int = 0
+    files: int = 0
+    since: str | None = None  # created_at the export resumed after, None for a full export
+    last_created_at: str | None = None
+
+
+def columns(flatten: bool) -> tuple[str, ...]:
+    return BASE_COLUMNS + (SUMMARY_COLUMNS if flatten else ("summary_json",))
+
+
+def to_record(row: sqlite3.Row, flatten: bool) -> dict[str, Any]:
+    record = {name: row[name] for name in BASE_COLUMNS}
+    if not flatten:
+        record["summary_json"] = row["summary_json"]
+        return record
+    body = json.loads(row["summary_json"] or "{}")
+    for name in SUMMARY_COLUMNS:
+        record[name] = body.get(name)
+    return record
+
+
+class _JsonlWriter:
+    def __init__(self, path: Path, append: bool, flatten: bool):
+        self.handle = path.open("a" if append else "w", encoding="utf-8")
+        self.files = 1
+
+    def write(self, record: dict[str, Any]) -> None:
+        self.handle.write(json.dumps(record, ensure_ascii=False) + "\n")
+
+    def close(self) -> None:
+        self.handle.close()
+
+
+class _CsvWriter:
+    def __init__(self, path: Path, append: bool, flatten: bool):
+        header = not (append and path.exists() and path.stat().st_size)
+        self.handle = path.open("a" if append else "w", encoding="utf-8", newline="")
+        self.writer = csv.DictWriter(self.handle, fieldnames=columns(flatten))
+        if header:
+            self.writer.writeheader()
+        self.files = 1
+
+    def write(self, record: dict[str, Any]) -> None:
+        self.writer.writerow(
+            {k: json.dumps(v, ensure_ascii=False) if isinstance(v, (list, dict)) else v for k, v in record.items()}
+        )
+
+    def close(self) -> None:
+        self.handle.close()
+
+
+class _ParquetWriter:
+    # Hive-style date=YYYY-MM-DD partitions. Rows arrive ordered by date, so one partition is
+    # open at a time and at most one row group is buffered. Every export run writes new part
+    # files, which is how an incremental export appends.
+    def __init__(self, path: Path, append: bool, flatten: bool):
+        try:
+            import pyarrow as pa
+            import pyarrow.parquet as pq
+        except ModuleNotFoundError as exc:
+            raise RuntimeError("--format parquet needs pyarrow: pip install 'ytbrief[parquet]'") from exc
+        if not append and path.exists() and any(path.iterdir()):
+            raise ValueError(f"{path} is not empty; remove it or export with --incremental")
+        self.pa, self.pq = pa, pq
+        self.root = path
+        self.flatten = flatten
+        self.part = f"part-{datetime.utcnow():%Y%m%dT%H%M%S%f}.parquet"
+        fields = []
+        # date is the partition key; Hive-style readers add it back from the directory name and
+        # refuse a dataset that also stores it in the files.
+        for name in columns(flatten):
+            if name == "date":
+                continue
+            if name in INT_COLUMNS:
+                fields.append(pa.field(name, pa.int64()))
+            elif name in STRING_LIST_FIELDS:
+                fields.append(pa.field(name, pa.list_(pa.string())))
+            else:
+                fields.append(pa.field(name, pa.string()))
+        self.schema = pa.schema(fields)
+        self.writer = None
+        self.date: str | None = None
+        self.buffer: list[dict[str, Any]] = []
+        self.files = 0
+
+    def write(self, record: dict[str, Any]) -> None:
+        if record["date"] != self.date:
+            self._close_partition()
+            self.date = record["date"]
+            partition = self.root / f"date={self.date}"
+            partition.mkdir(parents=True, exist_ok=True)
+            self.writer = self.pq.ParquetWriter(partition / self.part, self.schema)
+            self.files += 1
+        if self.flatten:
+            for name in OBJECT_LIST_FIELDS:
+                if record[name] is not None:
+                    record[name] = json.dumps(record[name], ensure_ascii=False)
+        self.buffer.append({k: v for k, v in record.items() if k != "date"})
+        if len(self.buffer) >= PARQUET_ROW_GROUP:
+            self._flush()
+
+    def _flush(self) -> None:
+        if self.buffer:
+            self.writer.write_table(self.pa.Table.from_pylist(self.buffer, schema=self.schema))
+            self.buffer = []
+
+    def _close_partition(self) -> None:
+        if self.writer is not None:
+            self._flush()
+            self.writer.close()
+            self.writer = None
+
+    def close(self) -> None:
+        self._close_partition()
+
+
+WRITERS = {"jsonl": _JsonlWriter, "csv": _CsvWriter, "parquet": _ParquetWriter}
+
+
+def _stream(rows: Iterable[sqlite3.Row], flatten: bool, result: ExportResult) -> Iterator[dict[str, Any]]:
+    for row in rows:
+        result.rows += 1
+        if result.last_created_at is None or (row["created_at"] or "") > result.last_created_at:
+            result.last_created_at = row["created_at"]
+        yield to_record(row, flatten)
+
+
+def export_history(
+    store: Storage, start: str, end: str, path: str, fmt: str, flatten: bool = False, incremental: bool = False
+) -> ExportResult:
+    if fmt not in WRITERS:
+        raise ValueError(f"unknown export format {fmt!r}; expected one of {', '.join(EXPORT_FORMATS)}")
+    target = Path(path).resolve()
+    state = store.get_export_state(str(target)) if incremental else None
+    if state is not None and (state["format"], bool(state["flatten"])) != (fmt, flatten):
+        raise ValueError(
+            f"{target} was exported as {state['format']} (flatten={bool(state['flatten'])}); "
+            "resume with the same --format and --flatten"
+        )
+    result = ExportResult(str(target), fmt, since=state["last_created_at"] if state else None)
+    writer = WRITERS[fmt](target, state is not None, flatten)
+    try:
+        for record in _stream(store.iter_export_rows(start, end, since=result.since), flatten, result):
+            writer.write(record)
+    finally:
+        writer.close()
+    result.files = writer.files
+    # A re-summarized video has a newer created_at, so an incremental export writes it again;
+    # readers should keep the latest row per (video_id, date).
+    store.set_export_state(str(target), fmt, flatten, result.last_created_at, result.rows, appended=state is not None)
+    log.info("export %s: %d rows since %s into %s", fmt, result.rows, result.since or "the beginning", target)
+    return result
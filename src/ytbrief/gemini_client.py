@@ -1,29 +1,74 @@
 from __future__ import annotations
 
 import json
-import random
-import time
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, TypeVar
 
 try:
     import requests
 except ModuleNotFoundError:  # pragma: no cover
     from . import requests_compat as requests
-from pydantic import ValidationError
 
-from .schemas import DailyDigest, VideoSummary
+from .cache import ResponseCache
+from .tracing import NULL_TRACER
+from .transport import Transport
+
+if TYPE_CHECKING:
+    from pydantic import BaseModel
+
+    from .budget import Budget
+    from .metrics import RunMetrics
+    from .schemas import DailyDigest, VideoSummary
+
+log = logging.getLogger(__name__)
+
+M = TypeVar("M", bound="BaseModel")
+
+DIGEST_SCHEMA = (
+    '{"date":"YYYY-MM-DD","one_liner":string,"consensus":[string,string,string],'
+    '"differences":[string,string,string],"checklist":[string,string,string],'
+    '"top_topics":[string],"sources":[{"title":string,"url":string,"channel":string}]}'
+)
+
+
+def estimate_tokens(text: str) -> int:
+    # Rough Gemini tokenizer ratios: ~1 token per Hangul/CJK character, ~4 ASCII characters per token.
+    wide = sum(1 for ch in text if ord(ch) > 127)
+    return wide + (len(text) - wide) // 4 + 1
 
 
 class GeminiClient:
-    def __init__(self, api_key: str, model: str = "gemini-1.5-pro", session: requests.Session | None = None):
+    BASE_URL = "https://generativelanguage.googleapis.com/v1beta"
+    DIGEST_WORKERS = 4
+
+    def __init__(
+        self,
+        api_key: str,
+        model: str = "gemini-1.5-pro",
+        session: requests.Session | None = None,
+        transport: Transport | None = None,
+        cache: ResponseCache | None = None,
+        digest_token_budget: int = 30_000,
+    ):
         self.api_key = api_key
         self.model = model
         self.session = session or requests.Session()
+        self.transport = transport or Transport("gemini", self.session)
+        self.cache = cache
+        self.digest_token_budget = digest_token_budget
+        self.metrics: RunMetrics | None = None
+        self.budget: Budget | None = None
+        self.tracer = NULL_TRACER
 
     @property
     def endpoint(self) -> str:
-        return f"https://generativelanguage.googleapis.com/v1beta/models/{self.model}:generateContent"
+        return f"{self.BASE_URL}/models/{self.model}:generateContent"
 
     def summarize_video(self, url: str) -> VideoSummary:
+        # pydantic is only imported on the paths that validate a response.
+        from .schemas import VideoSummary
+
         prompt = (
             "Analyze this YouTube morning market briefing video URL and return STRICT JSON ONLY with no markdown.\n"
             f"URL: {url}\n"
@@ -35,54 +80,174 @@ class GeminiClient:
             '"tickers_mentions": [{"ticker": string, "context": string}], '
             '"what_to_watch": [string,string,string], "confidence": "high|medium|low"}'
         )
-        text = self._generate_text(prompt)
-        try:
-            return VideoSummary.model_validate_json(text)
-        except ValidationError:
-            repair_prompt = (
-                "Your previous output was invalid. Output STRICT JSON ONLY that matches exactly this schema. "
-                "Do not include code fences or explanations."
-            )
-            repaired = self._generate_text(repair_prompt + "\nOriginal output:\n" + text)
-            return VideoSummary.model_validate_json(repaired)
+        repair_prompt = (
+            "Your previous output was invalid. Output STRICT JSON ONLY that matches exactly this schema. "
+            "Do not include code fences or explanations."
+        )
+        return self._generate_model(VideoSummary, prompt, repair_prompt + "\nOriginal output:\n", "summary", url)
 
     def build_daily_digest(self, date: str, per_video_json: list[dict]) -> DailyDigest:
-        prompt = (
+        prompt = self._digest_prompt(date, per_video_json)
+        tokens = estimate_tokens(prompt)
+        if len(per_video_json) > 1 and tokens > self.digest_token_budget:
+            log.info("digest %s: ~%d prompt tokens over budget %d, using map-reduce", date, tokens, self.digest_token_budget)
+            return self._map_reduce_digest(date, per_video_json)
+        return self._digest_from_prompt(prompt, date)
+
+    def _digest_prompt(self, date: str, per_video_json: list[dict]) -> str:
+        return (
             "Create a consolidated daily market digest in Korean from these video summaries."
             " Return STRICT JSON ONLY, no markdown.\n"
             f"date={date}\n"
             f"summaries={json.dumps(per_video_json, ensure_ascii=False)}\n"
-            "Schema: "
-            '{"date":"YYYY-MM-DD","one_liner":string,"consensus":[string,string,string],'
-            '"differences":[string,string,string],"checklist":[string,string,string],'
-            '"top_topics":[string],"sources":[{"title":string,"url":string,"channel":string}]}'
+            "Schema: " + DIGEST_SCHEMA
+        )
+
+    def _merge_prompt(self, date: str, partials: list[dict]) -> str:
+        return (
+            "Merge these partial daily market digests, each built from a different subset of videos, into one"
+            " consolidated daily digest in Korean. Weigh points shared by several partials as consensus."
+            " Return STRICT JSON ONLY, no markdown.\n"
+            f"date={date}\n"
+            f"partial_digests={json.dumps(partials, ensure_ascii=False)}\n"
+            "Schema: " + DIGEST_SCHEMA
         )
-        text = self._generate_text(prompt)
+
+    def build_rollup(self, period: str, digests: list[dict]) -> DailyDigest:
+        # Sources are merged locally; Gemini only sees the analysis fields of each digest.
+        compact = [{k: v for k, v in d.items() if k != "sources"} for d in digests]
+        rollup = self._digest_from_prompt(self._rollup_prompt(period, compact), period)
+        sources: dict[str, dict] = {}
+        for digest in digests:
+            for src in digest.get("sources", []):
+                sources.setdefault(src["url"], src)
+        return rollup.model_copy(update={"date": period, "sources": list(sources.values())})
+
+    def _rollup_prompt(self, period: str, digests: list[dict]) -> str:
+        return (
+            f"Combine these market digests for {period}, in date order, into one digest for the whole period in Korean."
+            " Use themes that persist across days as consensus, how views shifted as differences, and what to watch"
+            " next as checklist. Leave sources as an empty list. Return STRICT JSON ONLY, no markdown.\n"
+            f"date={period}\n"
+            f"digests={json.dumps(digests, ensure_ascii=False)}\n"
+            "Schema: " + DIGEST_SCHEMA
+        )
+
+    def _digest_from_prompt(self, prompt: str, date: str) -> DailyDigest:
+        from .schemas import DailyDigest
+
+        repair_prompt = "Fix this to valid JSON matching schema exactly. JSON only.\n"
+        return self._generate_model(DailyDigest, prompt, repair_prompt, "digest", date)
+
+    def _generate_model(self, model: type[M], prompt: str, repair_prompt: str, kind: str, ref: str) -> M:
+        # Local repair first; a second Gemini call is only made when the output cannot be fixed
+        # without the model (for example a list with too few items or a missing field).
+        from pydantic import ValidationError
+
+        text = self._generate_text(prompt, kind, ref, model)
         try:
-            return DailyDigest.model_validate_json(text)
-        except ValidationError:
-            repaired = self._generate_text(
-                "Fix this to valid JSON matching schema exactly. JSON only.\n" + text
-            )
-            return DailyDigest.model_validate_json(repaired)
-
-    def _generate_text(self, prompt: str, max_retries: int = 3) -> str:
+            result, outcome = self._validate(model, text, kind, ref)
+        except ValidationError as exc:
+            log.info("%s %s: invalid JSON after local repair, asking Gemini to fix it: %s", kind, ref, exc.errors()[:1])
+            self._forget(prompt, model)
+            repaired = self._generate_text(repair_prompt + text, f"{kind}_repair", ref, model)
+            try:
+                result, _ = self._validate(model, repaired, f"{kind}_repair", ref)
+            except ValidationError:
+                self._record_repair(kind, "failed")
+                raise
+            outcome = "network"
+        self._record_repair(kind, outcome)
+        return result
+
+    def _validate(self, model: type[M], text: str, kind: str, ref: str) -> tuple[M, str]:
+        from .repair import parse_model
+
+        with self.tracer.span(f"validate {model.__name__}", "validation", kind=kind, ref=ref, chars=len(text)) as span:
+            result, outcome = parse_model(model, text)
+            span["outcome"] = outcome
+        return result, outcome
+
+    def _record_repair(self, kind: str, outcome: str) -> None:
+        if self.metrics is not None:
+            self.metrics.record_repair(kind, outcome)
+
+    def _chunk_by_budget(self, items: list[dict]) -> list[list[dict]]:
+        # Leave half the budget for instructions and the model's own output.
+        budget = self.digest_token_budget // 2
+        chunks: list[list[dict]] = [[]]
+        used = 0
+        for item in items:
+            cost = estimate_tokens(json.dumps(item, ensure_ascii=False))
+            if chunks[-1] and used + cost > budget:
+                chunks.append([])
+                used = 0
+            chunks[-1].append(item)
+            used += cost
+        return chunks
+
+    def _map_reduce_digest(self, date: str, per_video_json: list[dict]) -> DailyDigest:
+        chunks = self._chunk_by_budget(per_video_json)
+        if len(chunks) == 1:
+            # Chunking would not shrink the input any further; send it as is.
+            return self._digest_from_prompt(self._digest_prompt(date, per_video_json), date)
+        # A chunk may hold a single oversized summary; its digest is still fixed-size and smaller.
+        with ThreadPoolExecutor(max_workers=min(len(chunks), self.DIGEST_WORKERS)) as pool:
+            partials = list(pool.map(lambda chunk: self.build_daily_digest(date, chunk), chunks))
+        partial_dicts = [p.model_dump() for p in partials]
+        merge_prompt = self._merge_prompt(date, partial_dicts)
+        over_budget = estimate_tokens(merge_prompt) > self.digest_token_budget
+        if over_budget and len(self._chunk_by_budget(partial_dicts)) < len(partial_dicts):
+            merged = self._map_reduce_digest(date, partial_dicts)
+        else:
+            if over_budget:
+                # Partial digests too big to pair up would only map back to themselves.
+                log.warning("digest %s: merge prompt over budget %d, sending it as is", date, self.digest_token_budget)
+            merged = self._digest_from_prompt(merge_prompt, date)
+        sources: dict[str, object] = {}
+        for partial in partials:
+            for src in partial.sources:
+                sources.setdefault(src.url, src)
+        return merged.model_copy(update={"sources": list(sources.values())})
+
+    def _generation_config(self, model: type[BaseModel] | None = None) -> dict:
+        config = {"temperature": 0.2, "responseMimeType": "application/json"}
+        if model is not None:
+            from .repair import response_schema
+
+            config["responseSchema"] = response_schema(model)
+        return config
+
+    def _forget(self, prompt: str, model: type[BaseModel] | None = None) -> None:
+        # Never keep serving a response that failed schema validation.
+        if self.cache is not None:
+            self.cache.discard(self.cache.make_key(self.model, prompt, self._generation_config(model)))
+
+    def _generate_text(
+        self, prompt: str, kind: str = "generate", ref: str = "", model: type[BaseModel] | None = None
+    ) -> str:
+        generation_config = self._generation_config(model)
+        key = None
+        if self.cache is not None:
+            key = self.cache.make_key(self.model, prompt, generation_config)
+            cached = self.cache.get(key)
+            if cached is not None:
+                return cached
         payload = {
             "contents": [{"parts": [{"text": prompt}]}],
-            "generationConfig": {"temperature": 0.2, "responseMimeType": "application/json"},
+            "generationConfig": generation_config,
         }
         params = {"key": self.api_key}
-        for attempt in range(max_retries):
-            resp = self.session.post(self.endpoint, params=params, json=payload, timeout=120)
-            if resp.status_code < 400:
-                data = resp.json()
-                try:
-                    return data["candidates"][0]["content"]["parts"][0]["text"]
-                except (KeyError, IndexError) as exc:
-                    raise ValueError(f"Invalid Gemini response: {data}") from exc
-            if resp.status_code in (429, 500, 502, 503, 504):
-                time.sleep((2**attempt) + random.uniform(0.5, 1.5))
-                continue
-            resp.raise_for_status()
-        resp.raise_for_status()
-        return ""
+        resp = self.transport.request("POST", self.endpoint, params=params, json=payload, timeout=120)
+        data = resp.json()
+        try:
+            text = data["candidates"][0]["content"]["parts"][0]["text"]
+        except (KeyError, IndexError) as exc:
+            raise ValueError(f"Invalid Gemini response: {data}") from exc
+        if self.metrics is not None:
+            self.metrics.record_tokens(kind, ref, data.get("usageMetadata"))
+        if self.budget is not None:
+            self.budget.record_tokens("gemini", data.get("usageMetadata"))
+        if key is not None:
+            self.cache.put(key, self.model, text)
+        return text
@@ -1,22 +1,47 @@
 from __future__ import annotations
 
+import functools
 import json
+import logging
 import os
-import random
+import queue
+import re
+import threading
 import time
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, as_completed, wait
 from dataclasses import dataclass
+from datetime import date as date_type
+from datetime import datetime, timedelta
+from typing import TYPE_CHECKING, Callable, TypeVar
 
 from rich.console import Console
-from rich.logging import RichHandler
-from rich.progress import Progress
 
-from .gemini_client import GeminiClient
-from .notion_client import NotionClient
-from .storage import Storage
-from .youtube_client import YouTubeClient
+from .budget import Budget, BudgetLimits, RunPlan, plan_run, summary_capacity
+from .dedup import Deduper, fingerprint_video
+from .metrics import RunMetrics
+from .storage import Storage, fingerprint
+from .tracing import NULL_TRACER, Tracer
+from .transport import BudgetExceededError, CircuitOpenError
 
+if TYPE_CHECKING:
+    import sqlite3
+
+    from .gemini_client import GeminiClient
+    from .notion_client import NotionClient
+    from .youtube_client import VideoFilter, YouTubeClient
+
+T = TypeVar("T")
 
 console = Console()
+log = logging.getLogger(__name__)
+
+_DONE = object()
+# Errors that no retry or fallback can fix within this run: stop the stage instead.
+_FATAL = (CircuitOpenError, BudgetExceededError)
+# Share of each daily quota a backfill leaves untouched for the next morning run.
+BACKFILL_RESERVE = 0.2
+WATERMARK_SOURCE = "youtube_search"
+WATERMARK_OVERLAP = timedelta(minutes=30)
 
 
 @dataclass
@@ -28,49 +53,437 @@ class PipelineResult:
     notion_page_id: str | None = None
 
 
-def _sleep_jitter() -> None:
-    time.sleep(random.uniform(0.5, 1.5))
+@dataclass
+class DateRunStatus:
+    date: str
+    status: str  # done | skipped | deferred | failed
+    result: PipelineResult | None = None
+    error: str | None = None
+    seconds: float = 0.0
+
+
+@dataclass
+class WatchPoll:
+    poll: int
+    found: int = 0
+    summarized_success: int = 0
+    summarized_failed: int = 0
+    refreshed: bool = False  # digest and Notion page were brought up to date with new summaries
+    notion_page_id: str | None = None
+    error: str | None = None
+
+
+@dataclass
+class RollupResult:
+    period: str
+    start: str
+    end: str
+    status: str  # built | unchanged | empty
+    days: int = 0
+    rebuilt: int = 0  # spans sent to Gemini, including the partial weeks of a month
+    notion_page_id: str | None = None
+
+
+class PipelineContext:
+    def __init__(
+        self,
+        db: str,
+        model: str = "gemini-1.5-pro",
+        use_cache: bool = True,
+        show_progress: bool = True,
+        command: str = "run",
+        date: str | None = None,
+        reserve: float = 0.0,
+        trace: str | None = None,
+    ):
+        self.db = db
+        self.model = model
+        self.use_cache = use_cache
+        self.show_progress = show_progress
+        self.tracer = Tracer(trace) if trace else NULL_TRACER
+        self.store = Storage(db)
+        self.store.tracer = self.tracer
+        self.metrics = RunMetrics(command, date)
+        self.budget = Budget(self.store, BudgetLimits.from_env(), reserve)
+        self._youtube: YouTubeClient | None = None
+        self._gemini: GeminiClient | None = None
+        self._notion: NotionClient | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def youtube(self) -> YouTubeClient:
+        with self._lock:
+            if self._youtube is None:
+                # Clients are imported on first use so stages that skip their work never load them.
+                from .youtube_client import YouTubeClient
+
+                self._youtube = YouTubeClient(api_key=os.environ["YOUTUBE_API_KEY"])
+                self._youtube.transport.metrics = self.metrics
+                self._youtube.transport.budget = self.budget
+                self._youtube.transport.tracer = self.tracer
+            return self._youtube
+
+    @property
+    def gemini(self) -> GeminiClient:
+        with self._lock:
+            if self._gemini is None:
+                from .cache import ResponseCache
+                from .gemini_client import GeminiClient
+
+                cache = ResponseCache(self.db) if self.use_cache else None
+                if cache is not None:
+                    cache.tracer = self.tracer
+                self._gemini = GeminiClient(api_key=os.environ["GEMINI_API_KEY"], model=self.model, cache=cache)
+                self._gemini.transport.metrics = self.metrics
+                self._gemini.transport.budget = self.budget
+                self._gemini.metrics = self.metrics
+                self._gemini.budget = self.budget
+                self._gemini.transport.tracer = self.tracer
+                self._gemini.tracer = self.tracer
+            return self._gemini
+
+    @property
+    def notion(self) -> NotionClient:
+        with self._lock:
+            if self._notion is None:
+                from .notion_client import NotionClient
+
+                self._notion = NotionClient(
+                    token=os.environ["NOTION_TOKEN"],
+                    database_id=os.environ["NOTION_DATABASE_ID"],
+                    notion_version=os.getenv("NOTION_VERSION", "2022-06-28"),
+                )
+                self._notion.transport.metrics = self.metrics
+                self._notion.transport.budget = self.budget
+                self._notion.transport.tracer = self.tracer
+            return self._notion
+
+    def close(self, status: str = "success") -> None:
+        for name, client in (("youtube", self._youtube), ("gemini", self._gemini), ("notion", self._notion)):
+            if client is not None:
+                log.info("%s transport: %s", name, client.transport.stats())
+        if self._gemini is not None and self._gemini.cache is not None:
+            log.info("gemini cache: %s", self._gemini.cache.stats())
+            self._gemini.cache.close()
+        self.store.save_run_metrics(self.metrics, status)
+        self.store.close()
+        if self.tracer.enabled:
+            self.tracer.save()
+            log.info("trace: %d events written to %s", len(self.tracer.events), self.tracer.path)
+
+    def __enter__(self) -> PipelineContext:
+        return self
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        self.close("success" if exc_type is None else "failed")
+
 
+def _stage(name: str) -> Callable[[Callable[..., T]], Callable[..., T]]:
+    def decorate(fn: Callable[..., T]) -> Callable[..., T]:
+        @functools.wraps(fn)
+        def wrapper(ctx: PipelineContext, date: str, *args, **kwargs) -> T:
+            with ctx.metrics.stage(name, date), ctx.tracer.span(name, "stage", date=date):
+                return fn(ctx, date, *args, **kwargs)
 
-def fetch_videos(db: str, date: str, limit: int) -> int:
-    yt = YouTubeClient(api_key=os.environ["YOUTUBE_API_KEY"])
-    store = Storage(db)
-    videos = yt.search_morning_briefs(date, limit=limit)
+        return wrapper
+
+    return decorate
+
+
+class _SummaryWriter:
+    # Workers only talk to Gemini; the owning thread is the single SQLite writer and
+    # flushes results in submission order so reruns produce identical row order.
+    def __init__(self, store: Storage, date: str):
+        self.store = store
+        self.date = date
+        self.video_ids: list[str] = []
+        self.done: dict[int, tuple[str, str]] = {}
+        self.next_idx = 0
+        self.ok = 0
+        self.failed = 0
+
+    def add(self, video_id: str) -> int:
+        self.video_ids.append(video_id)
+        return len(self.video_ids) - 1
+
+    def complete(self, idx: int, result: tuple[str, str]) -> None:
+        self.done[idx] = result
+        batch = []
+        while self.next_idx in self.done:
+            summary_json, status = self.done.pop(self.next_idx)
+            batch.append((self.video_ids[self.next_idx], self.date, summary_json, status))
+            if status == "success":
+                self.ok += 1
+            else:
+                self.failed += 1
+            self.next_idx += 1
+        if batch:
+            self.store.upsert_video_summaries(batch)
+
+
+def _apply_filter(videos: list[dict], video_filter: VideoFilter | None) -> list[dict]:
+    if video_filter is None:
+        from .youtube_client import VideoFilter
+
+        video_filter = VideoFilter()
+    kept, rejected = [], {}
     for v in videos:
-        store.upsert_video(v)
-        _sleep_jitter()
-    store.close()
+        reason = video_filter.reject_reason(v)
+        if reason is None:
+            kept.append(v)
+        else:
+            rejected[reason] = rejected.get(reason, 0) + 1
+    if rejected:
+        log.info("filtered out %d videos before summarization: %s", len(videos) - len(kept), rejected)
+    return kept
+
+
+def _search_since(watermark: str | None) -> str | None:
+    # Search results lag uploads by a few minutes, so each poll re-covers a short overlap.
+    if watermark is None:
+        return None
+    since = datetime.fromisoformat(watermark.replace("Z", "+00:00")) - WATERMARK_OVERLAP
+    return since.isoformat()
+
+
+@_stage("fetch")
+def _fetch(
+    ctx: PipelineContext,
+    date: str,
+    limit: int,
+    fanout: bool = False,
+    video_filter: VideoFilter | None = None,
+    incremental: bool = False,
+) -> int:
+    yt = ctx.youtube
+    since = {"published_after": _search_since(ctx.store.get_watermark(date, WATERMARK_SOURCE))} if incremental else {}
+    hits = yt.search_morning_briefs(date, limit=limit, fanout=fanout, **since)
+    videos = _apply_filter(yt.enrich_videos(hits), video_filter)
+    ctx.store.upsert_videos(videos)
+    published = [h["published_at"] for h in hits if h["published_at"]]
+    # Search is ranked by relevance, so a result cut off at the limit can still be missing older
+    # uploads; only a search that came back short of the limit returned everything in the window.
+    if incremental and published and len(hits) < limit:
+        # Every hit counts, filtered or not: there is no reason to search for it again.
+        ctx.store.advance_watermark(date, WATERMARK_SOURCE, max(published))
     return len(videos)
 
 
-def summarize_videos(db: str, date: str, model: str) -> tuple[int, int]:
-    gemini = GeminiClient(api_key=os.environ["GEMINI_API_KEY"], model=model)
-    store = Storage(db)
-    videos = store.list_videos_by_date(date)
-    ok, failed = 0, 0
-    with Progress(console=console) as progress:
+def _preference(successful: set[str]) -> Callable[[dict], tuple]:
+    # Already-summarized videos stay representatives; otherwise prefer the longest cut (a #shorts
+    # clip covers a fraction of the briefing), then the most-watched.
+    return lambda v: (
+        v["video_id"] not in successful,
+        -(v.get("duration_seconds") or 0),
+        -(v.get("view_count") or 0),
+        v["published_at"] or "",
+    )
+
+
+def _cluster(deduper: Deduper, videos: list[dict]) -> tuple[list[tuple[str, str, str]], list[dict]]:
+    clusters, representatives = [], []
+    for v in videos:
+        fp = fingerprint_video(v)
+        rep = deduper.add(fp)
+        clusters.append((v["video_id"], rep, f"{fp.simhash:016x}"))
+        if rep == v["video_id"]:
+            representatives.append(v)
+    return clusters, representatives
+
+
+def _first_sightings(videos: list[dict], seen: set[str]) -> list[dict]:
+    fresh = []
+    for v in videos:
+        if v["video_id"] not in seen:
+            seen.add(v["video_id"])
+            fresh.append(v)
+    return fresh
+
+
+@_stage("dedup")
+def _dedup(ctx: PipelineContext, date: str, enabled: bool = True) -> int:
+    if not enabled:
+        ctx.store.replace_video_clusters(date, [])
+        return 0
+    videos = [dict(r) for r in ctx.store.list_videos_by_date(date)]
+    videos.sort(key=_preference(ctx.store.successful_video_ids(date)))
+    clusters, representatives = _cluster(Deduper(), videos)
+    ctx.store.replace_video_clusters(date, clusters)
+    duplicates = len(videos) - len(representatives)
+    if duplicates:
+        log.info("dedup %s: %d near-duplicates linked to %d representatives", date, duplicates, len(representatives))
+    return duplicates
+
+
+def _summarize_one(gemini: GeminiClient, url: str) -> tuple[str, str]:
+    try:
+        summary = gemini.summarize_video(url)
+        return summary.model_dump_json(ensure_ascii=False), "success"
+    except _FATAL:
+        raise
+    except Exception as exc:  # continue pipeline
+        return json.dumps({"error": str(exc)}, ensure_ascii=False), "failed"
+
+
+@_stage("summarize")
+def _summarize(
+    ctx: PipelineContext, date: str, concurrency: int = 1, force: bool = False, max_attempts: int | None = None
+) -> tuple[int, int]:
+    if force:
+        videos = ctx.store.list_videos_by_date(date, representatives_only=True)
+    else:
+        videos = ctx.store.list_pending_videos(date, max_attempts)
+        log.info("summarize %s: %d new or failed videos pending", date, len(videos))
+    cap = summary_capacity(ctx.store, ctx.budget)
+    if cap is not None and len(videos) > cap:
+        # Spend what is left on the most-watched videos; the rest stay pending for the next run.
+        keep = {r["video_id"] for r in sorted(videos, key=lambda r: -(r["view_count"] or 0))[:cap]}
+        log.warning("summarize %s: Gemini budget covers %d of %d videos, deferring the rest", date, cap, len(videos))
+        videos = [r for r in videos if r["video_id"] in keep]
+    if not videos:
+        return 0, 0
+    from rich.progress import Progress
+
+    gemini = ctx.gemini
+    writer = _SummaryWriter(ctx.store, date)
+    with Progress(console=console, disable=not ctx.show_progress) as progress, ThreadPoolExecutor(
+        max_workers=max(1, concurrency)
+    ) as pool:
         task = progress.add_task("Summarizing videos...", total=len(videos))
-        for row in videos:
+        futures = {pool.submit(_summarize_one, gemini, row["url"]): writer.add(row["video_id"]) for row in videos}
+        for fut in as_completed(futures):
             try:
-                summary = gemini.summarize_video(row["url"])
-                store.upsert_video_summary(row["video_id"], date, summary.model_dump_json(ensure_ascii=False), "success")
-                ok += 1
-            except Exception as exc:  # continue pipeline
-                store.upsert_video_summary(row["video_id"], date, json.dumps({"error": str(exc)}, ensure_ascii=False), "failed")
-                failed += 1
+                writer.complete(futures[fut], fut.result())
+            except _FATAL:
+                pool.shutdown(wait=False, cancel_futures=True)
+                raise
             progress.advance(task)
-            _sleep_jitter()
-    store.close()
-    return ok, failed
+    return writer.ok, writer.failed
+
+
+def _discover(
+    ctx: PipelineContext,
+    date: str,
+    limit: int,
+    fanout: bool,
+    video_filter: VideoFilter | None,
+    out: queue.Queue,
+    stop: threading.Event,
+) -> None:
+    def put(item: object) -> None:
+        while not stop.is_set():
+            try:
+                out.put(item, timeout=0.1)
+                return
+            except queue.Full:
+                continue
+
+    try:
+        for batch in ctx.youtube.iter_morning_briefs(date, limit=limit, fanout=fanout):
+            if stop.is_set():
+                return
+            put(_apply_filter(ctx.youtube.enrich_videos(batch), video_filter))
+    except BaseException as exc:
+        put(exc)
+    finally:
+        put(_DONE)
+
+
+@_stage("stream")
+def _stream(
+    ctx: PipelineContext,
+    date: str,
+    limit: int,
+    concurrency: int = 1,
+    force: bool = False,
+    max_attempts: int | None = None,
+    fanout: bool = False,
+    video_filter: VideoFilter | None = None,
+    dedup: bool = True,
+) -> tuple[int, int, int]:
+    from rich.progress import Progress
+
+    # Discovery runs in a producer thread and hands pages of videos over a bounded queue;
+    # each page is stored and its videos are submitted to Gemini as soon as it arrives.
+    batches: queue.Queue = queue.Queue(maxsize=2)
+    stop = threading.Event()
+    producer = threading.Thread(
+        target=_discover, args=(ctx, date, limit, fanout, video_filter, batches, stop), daemon=True
+    )
+    writer = _SummaryWriter(ctx.store, date)
+    pending: dict[Future, int] = {}
+    # Search pages can overlap, so a video is only counted and summarized the first time it shows up.
+    seen: set[str] = set()
+    found = 0
+    discovering = True
+    max_in_flight = 2 * max(1, concurrency)
+    cap = summary_capacity(ctx.store, ctx.budget)
+    gemini = ctx.gemini
+    # Pages arrive in search order, so clusters are assigned greedily as they come; the
+    # representatives already stored for the date are seeded first so reruns keep them.
+    deduper = Deduper() if dedup else None
+    if deduper is None:
+        ctx.store.replace_video_clusters(date, [])
+    else:
+        for row in ctx.store.list_video_clusters(date):
+            if row["video_id"] == row["representative_id"]:
+                deduper.add(fingerprint_video(dict(row)))
+    producer.start()
+    with Progress(console=console, disable=not ctx.show_progress) as progress, ThreadPoolExecutor(
+        max_workers=max(1, concurrency)
+    ) as pool:
+        task = progress.add_task("Discovering + summarizing...", total=0)
+        try:
+            while discovering or pending:
+                # While Gemini is saturated the queue is left alone, so the bounded queue blocks discovery.
+                accepting = discovering and len(pending) < max_in_flight
+                if accepting:
+                    try:
+                        item = batches.get(timeout=0.05 if pending else None)
+                    except queue.Empty:
+                        item = None
+                    if item is _DONE:
+                        discovering = accepting = False
+                    elif isinstance(item, BaseException):
+                        raise item
+                    elif item:
+                        item = _first_sightings(item, seen)
+                        ctx.store.upsert_videos(item)
+                        found += len(item)
+                        todo = item
+                        if deduper is not None:
+                            clusters, todo = _cluster(deduper, item)
+                            ctx.store.add_video_clusters(date, clusters)
+                        if not force:
+                            open_ids = {r["video_id"] for r in ctx.store.list_pending_videos(date, max_attempts)}
+                            todo = [row for row in todo if row["video_id"] in open_ids]
+                        if cap is not None:
+                            # Search order is relevance order, so later pages are the ones deferred.
+                            todo = todo[: max(0, cap - len(writer.video_ids))]
+                        for row in todo:
+                            pending[pool.submit(_summarize_one, gemini, row["url"])] = writer.add(row["video_id"])
+                        progress.update(task, total=len(writer.video_ids))
+                if pending:
+                    finished, _ = wait(pending, timeout=0 if accepting else None, return_when=FIRST_COMPLETED)
+                    for fut in finished:
+                        writer.complete(pending.pop(fut), fut.result())
+                        progress.advance(task)
+        except BaseException:
+            stop.set()
+            pool.shutdown(wait=False, cancel_futures=True)
+            raise
+        finally:
+            stop.set()
+            producer.join(timeout=5)
+    return found, writer.ok, writer.failed
 
 
-def create_digest(db: str, date: str, model: str) -> str:
-    gemini = GeminiClient(api_key=os.environ["GEMINI_API_KEY"], model=model)
-    store = Storage(db)
+@_stage("digest")
+def _digest(ctx: PipelineContext, date: str, force: bool = False) -> str:
+    store = ctx.store
     rows = store.list_successful_summaries(date)
     if not rows:
         store.upsert_daily_digest(date, json.dumps({"error": "no successful summaries"}), "failed")
-        store.close()
         return "failed"
 
     per_video = []
@@ -79,38 +492,389 @@ def create_digest(db: str, date: str, model: str) -> str:
         body["source"] = {"title": r["title"], "url": r["url"], "channel": r["channel"]}
         per_video.append(body)
 
-    digest = gemini.build_daily_digest(date, per_video).model_dump()
+    input_hash = fingerprint({"model": ctx.model, "date": date, "summaries": per_video})
+    existing = store.get_daily_digest(date)
+    if not force and existing and existing["status"] == "success" and existing["input_hash"] == input_hash:
+        log.info("digest %s: inputs unchanged, keeping stored digest", date)
+        return "success"
+
+    digest = ctx.gemini.build_daily_digest(date, per_video).model_dump()
     if not digest.get("sources"):
         digest["sources"] = [{"title": r["title"], "url": r["url"], "channel": r["channel"]} for r in rows]
-    store.upsert_daily_digest(date, json.dumps(digest, ensure_ascii=False), "success")
-    store.close()
+    store.upsert_daily_digest(date, json.dumps(digest, ensure_ascii=False), "success", input_hash=input_hash)
     return "success"
 
 
-def publish_notion(db: str, date: str) -> str:
-    store = Storage(db)
+@_stage("publish")
+def _publish(ctx: PipelineContext, date: str, force: bool = False) -> str:
+    store = ctx.store
     digest_row = store.get_daily_digest(date)
     if not digest_row or digest_row["status"] != "success":
-        store.close()
         raise RuntimeError("No successful daily digest to publish")
     digest = json.loads(digest_row["digest_json"])
     video_count = len(store.list_successful_summaries(date))
-    notion = NotionClient(
-        token=os.environ["NOTION_TOKEN"],
-        database_id=os.environ["NOTION_DATABASE_ID"],
-        notion_version=os.getenv("NOTION_VERSION", "2022-06-28"),
-    )
-    page_id = notion.upsert_daily_page(date, digest, video_count)
-    store.set_notion_page_id(date, page_id)
-    store.close()
+    notion = ctx.notion
+    published_hash = fingerprint(notion.build_payload(date, digest, video_count))
+    cached_page_id = digest_row["notion_page_id"]
+    if not force and cached_page_id and digest_row["published_hash"] == published_hash:
+        log.info("notion %s: page %s already up to date", date, cached_page_id)
+        return cached_page_id
+    page_id = notion.upsert_daily_page(date, digest, video_count, page_id=cached_page_id)
+    store.set_notion_page_id(date, page_id, published_hash)
     return page_id
 
 
-def run_pipeline(db: str, date: str, limit: int, model: str) -> PipelineResult:
+@_stage("plan")
+def _plan(ctx: PipelineContext, date: str, limit: int, fanout: bool = False, force: bool = False) -> RunPlan:
+    plan = plan_run(ctx.store, ctx.budget, date, limit, fanout=fanout, force=force)
+    log.info("plan %s: %s", date, plan.describe())
+    if not plan.fetch:
+        log.warning("plan %s: not enough YouTube quota to search again, using the stored videos", date)
+    return plan
+
+
+def fetch_videos(db: str, date: str, limit: int, fanout: bool = False, video_filter: VideoFilter | None = None) -> int:
+    with PipelineContext(db, command="fetch", date=date) as ctx:
+        return _fetch(ctx, date, limit, fanout=fanout, video_filter=video_filter)
+
+
+def summarize_videos(
+    db: str,
+    date: str,
+    model: str,
+    concurrency: int = 1,
+    use_cache: bool = True,
+    force: bool = False,
+    max_attempts: int | None = None,
+    dedup: bool = True,
+) -> tuple[int, int]:
+    with PipelineContext(db, model, use_cache, command="summarize", date=date) as ctx:
+        _dedup(ctx, date, enabled=dedup)
+        return _summarize(ctx, date, concurrency=concurrency, force=force, max_attempts=max_attempts)
+
+
+def create_digest(db: str, date: str, model: str, use_cache: bool = True, force: bool = False) -> str:
+    with PipelineContext(db, model, use_cache, command="digest", date=date) as ctx:
+        return _digest(ctx, date, force=force)
+
+
+def publish_notion(db: str, date: str, force: bool = False) -> str:
+    with PipelineContext(db, command="publish-notion", date=date) as ctx:
+        return _publish(ctx, date, force=force)
+
+
+def _run(
+    ctx: PipelineContext,
+    date: str,
+    limit: int,
+    concurrency: int = 1,
+    force: bool = False,
+    max_attempts: int | None = None,
+    fanout: bool = False,
+    video_filter: VideoFilter | None = None,
+    stream: bool = False,
+    dedup: bool = True,
+) -> PipelineResult:
     result = PipelineResult()
-    result.found = fetch_videos(db, date, limit)
-    result.summarized_success, result.summarized_failed = summarize_videos(db, date, model)
-    result.digest_status = create_digest(db, date, model)
+    plan = _plan(ctx, date, limit, fanout=fanout, force=force)
+    if stream and plan.fetch:
+        result.found, result.summarized_success, result.summarized_failed = _stream(
+            ctx, date, limit, concurrency, force, max_attempts, fanout, video_filter, dedup
+        )
+    else:
+        if plan.fetch:
+            result.found = _fetch(ctx, date, limit, fanout=fanout, video_filter=video_filter)
+        _dedup(ctx, date, enabled=dedup)
+        result.summarized_success, result.summarized_failed = _summarize(
+            ctx, date, concurrency=concurrency, force=force, max_attempts=max_attempts
+        )
+    result.digest_status = _digest(ctx, date, force=force)
     if result.digest_status == "success":
-        result.notion_page_id = publish_notion(db, date)
+        result.notion_page_id = _publish(ctx, date, force=force)
+    return result
+
+
+def run_pipeline(
+    db: str,
+    date: str,
+    limit: int,
+    model: str,
+    concurrency: int = 1,
+    use_cache: bool = True,
+    force: bool = False,
+    max_attempts: int | None = None,
+    fanout: bool = False,
+    video_filter: VideoFilter | None = None,
+    stream: bool = False,
+    dedup: bool = True,
+    trace: str | None = None,
+) -> PipelineResult:
+    with PipelineContext(db, model, use_cache, command="run", date=date, trace=trace) as ctx:
+        with ctx.tracer.span("run", "pipeline", date=date, stream=stream):
+            return _run(ctx, date, limit, concurrency, force, max_attempts, fanout, video_filter, stream, dedup)
+
+
+def date_range(start: str, end: str) -> list[str]:
+    first, last = date_type.fromisoformat(start), date_type.fromisoformat(end)
+    return [(first + timedelta(days=i)).isoformat() for i in range((last - first).days + 1)]
+
+
+def backfill(
+    db: str,
+    start: str,
+    end: str,
+    limit: int,
+    model: str,
+    workers: int = 2,
+    concurrency: int = 1,
+    use_cache: bool = True,
+    force: bool = False,
+    max_attempts: int | None = None,
+    fanout: bool = False,
+    video_filter: VideoFilter | None = None,
+    dedup: bool = True,
+    reserve: float = BACKFILL_RESERVE,
+    on_status: Callable[[DateRunStatus], None] | None = None,
+    trace: str | None = None,
+) -> list[DateRunStatus]:
+    dates = date_range(start, end)
+    statuses: dict[str, DateRunStatus] = {}
+
+    def report(status: DateRunStatus) -> None:
+        statuses[status.date] = status
+        if on_status is not None:
+            on_status(status)
+
+    # One context for the whole range: clients, rate limiters, the Gemini cache and the
+    # SQLite connection (the single writer) are shared by every date worker.
+    out_of_budget = threading.Event()
+    with PipelineContext(
+        db, model, use_cache, show_progress=False, command="backfill", reserve=reserve, trace=trace
+    ) as ctx:
+        finished = set() if force else ctx.store.list_finished_dates(start, end)
+        todo = [d for d in dates if d not in finished]
+        for d in dates:
+            if d in finished:
+                report(DateRunStatus(d, "skipped"))
+
+        def run_one(d: str) -> DateRunStatus:
+            if out_of_budget.is_set():
+                return DateRunStatus(d, "deferred", error="daily budget exhausted")
+            began = time.perf_counter()
+            try:
+                with ctx.tracer.span("run", "pipeline", date=d):
+                    result = _run(ctx, d, limit, concurrency, force, max_attempts, fanout, video_filter, dedup=dedup)
+            except BudgetExceededError as exc:
+                # Leave the date unfinished; the next backfill picks it up once the quota resets.
+                out_of_budget.set()
+                log.warning("backfill %s deferred: %s", d, exc)
+                return DateRunStatus(d, "deferred", error=str(exc), seconds=time.perf_counter() - began)
+            except Exception as exc:  # keep the other dates going
+                log.exception("backfill %s failed", d)
+                return DateRunStatus(d, "failed", error=str(exc), seconds=time.perf_counter() - began)
+            status = "done" if result.digest_status == "success" else "failed"
+            return DateRunStatus(d, status, result=result, seconds=time.perf_counter() - began)
+
+        with ThreadPoolExecutor(max_workers=max(1, workers)) as pool:
+            for fut in as_completed([pool.submit(run_one, d) for d in todo]):
+                report(fut.result())
+    return [statuses[d] for d in dates]
+
+
+def _poll(
+    ctx: PipelineContext,
+    date: str,
+    n: int,
+    limit: int,
+    concurrency: int,
+    max_attempts: int | None,
+    fanout: bool,
+    video_filter: VideoFilter | None,
+    dedup: bool,
+) -> WatchPoll:
+    poll = WatchPoll(n)
+    poll.found = _fetch(ctx, date, limit, fanout=fanout, video_filter=video_filter, incremental=True)
+    _dedup(ctx, date, enabled=dedup)
+    poll.summarized_success, poll.summarized_failed = _summarize(
+        ctx, date, concurrency=concurrency, max_attempts=max_attempts
+    )
+    existing = ctx.store.get_daily_digest(date)
+    if not poll.summarized_success and existing and existing["status"] == "success":
+        # Nothing new was summarized, so the digest inputs are unchanged; skip the rebuild and
+        # the Notion comparison entirely.
+        poll.notion_page_id = existing["notion_page_id"]
+        return poll
+    if ctx.store.list_successful_summaries(date) and _digest(ctx, date) == "success":
+        poll.notion_page_id = _publish(ctx, date)
+        poll.refreshed = True
+    return poll
+
+
+def watch(
+    db: str,
+    date: str,
+    interval: float,
+    limit: int,
+    model: str,
+    concurrency: int = 1,
+    use_cache: bool = True,
+    max_attempts: int | None = 3,
+    fanout: bool = False,
+    video_filter: VideoFilter | None = None,
+    dedup: bool = True,
+    until: datetime | None = None,
+    max_polls: int | None = None,
+    stop: threading.Event | None = None,
+    on_poll: Callable[[WatchPoll], None] | None = None,
+) -> list[WatchPoll]:
+    # One context for the whole watch: HTTP sessions stay warm and the limiters, circuit
+    # breakers, Gemini cache and SQLite connection carry over from poll to poll.
+    stop = stop or threading.Event()
+    polls: list[WatchPoll] = []
+    with PipelineContext(db, model, use_cache, show_progress=False, command="watch", date=date) as ctx:
+        try:
+            while True:
+                out_of_budget = False
+                try:
+                    poll = _poll(ctx, date, len(polls) + 1, limit, concurrency, max_attempts, fanout, video_filter, dedup)
+                except BudgetExceededError as exc:
+                    # No later poll can succeed before the quota resets; end the watch with what we have.
+                    log.warning("watch %s: stopping, %s", date, exc)
+                    poll = WatchPoll(len(polls) + 1, error=str(exc))
+                    out_of_budget = True
+                except Exception as exc:  # a bad poll should not end the watch; the next one retries
+                    log.exception("watch %s: poll %d failed", date, len(polls) + 1)
+                    poll = WatchPoll(len(polls) + 1, error=str(exc))
+                polls.append(poll)
+                if on_poll is not None:
+                    on_poll(poll)
+                if out_of_budget:
+                    break
+                if max_polls is not None and len(polls) >= max_polls:
+                    break
+                if until is not None and datetime.now(until.tzinfo) + timedelta(seconds=interval) > until:
+                    break
+                if stop.wait(interval):
+                    break
+        except KeyboardInterrupt:
+            log.info("watch %s: stopped after %d polls", date, len(polls))
+    return polls
+
+
+def week_span(value: str) -> tuple[str, str, str]:
+    # An ISO week (2026-W07) or any date inside it -> (label, monday, sunday).
+    match = re.fullmatch(r"(\d{4})-W(\d{1,2})", value)
+    if match:
+        monday = date_type.fromisocalendar(int(match[1]), int(match[2]), 1)
+    else:
+        day = date_type.fromisoformat(value)
+        monday = day - timedelta(days=day.weekday())
+    year, week, _ = monday.isocalendar()
+    return f"{year}-W{week:02d}", monday.isoformat(), (monday + timedelta(days=6)).isoformat()
+
+
+def month_span(value: str) -> tuple[str, str, str]:
+    # 2026-02 or any date inside the month -> (label, first day, last day).
+    match = re.fullmatch(r"(\d{4})-(\d{2})(?:-\d{2})?", value)
+    if not match:
+        raise ValueError(f"expected YYYY-MM, got {value!r}")
+    first = date_type(int(match[1]), int(match[2]), 1)
+    following = (first + timedelta(days=31)).replace(day=1)
+    return f"{first:%Y-%m}", first.isoformat(), (following - timedelta(days=1)).isoformat()
+
+
+def _week_parts(start: str, end: str) -> list[tuple[str, str]]:
+    # ISO weeks clipped to [start, end]; a month is assembled from these.
+    parts = []
+    day, last = date_type.fromisoformat(start), date_type.fromisoformat(end)
+    while day <= last:
+        part_end = min(day + timedelta(days=6 - day.weekday()), last)
+        parts.append((day.isoformat(), part_end.isoformat()))
+        day = part_end + timedelta(days=1)
+    return parts
+
+
+def _cached_rollup(
+    ctx: PipelineContext, start: str, end: str, kind: str, period: str, input_hash: str, force: bool, inputs: Callable[[], list[dict]]
+) -> tuple[sqlite3.Row, bool]:
+    existing = ctx.store.get_rollup(start, end)
+    if not force and existing and existing["status"] == "success" and existing["input_hash"] == input_hash:
+        return existing, False
+    digest = ctx.gemini.build_rollup(period, inputs()).model_dump()
+    ctx.store.upsert_rollup(start, end, kind, period, json.dumps(digest, ensure_ascii=False), input_hash)
+    return ctx.store.get_rollup(start, end), True
+
+
+def _rollup_days(ctx: PipelineContext, start: str, end: str, kind: str, period: str, force: bool) -> tuple[sqlite3.Row | None, bool, int]:
+    dailies = ctx.store.list_successful_digests(start, end)
+    if not dailies:
+        return None, False, 0
+    input_hash = fingerprint({"model": ctx.model, "days": [[r["date"], r["digest_json"]] for r in dailies]})
+    row, rebuilt = _cached_rollup(
+        ctx, start, end, kind, period, input_hash, force, lambda: [json.loads(r["digest_json"]) for r in dailies]
+    )
+    return row, rebuilt, len(dailies)
+
+
+@_stage("rollup")
+def _rollup(ctx: PipelineContext, start: str, end: str, kind: str, period: str, force: bool = False) -> RollupResult:
+    result = RollupResult(period, start, end, "empty")
+    if kind == "week":
+        row, rebuilt, result.days = _rollup_days(ctx, start, end, "week", period, force)
+        result.rebuilt = int(rebuilt)
+    else:
+        # A month merges its (partial) ISO weeks, so a new day only rebuilds its own week and the merge.
+        parts = []
+        for part_start, part_end in _week_parts(start, end):
+            week_period, week_start, week_end = week_span(part_start)
+            full_week = (part_start, part_end) == (week_start, week_end)
+            part, rebuilt, days = _rollup_days(
+                ctx,
+                part_start,
+                part_end,
+                "week" if full_week else "part",
+                week_period if full_week else f"{part_start}~{part_end}",
+                force,
+            )
+            if part is not None:
+                parts.append(part)
+                result.days += days
+                result.rebuilt += int(rebuilt)
+        row = None
+        if parts:
+            input_hash = fingerprint({"model": ctx.model, "parts": [[p["start"], p["end"], p["input_hash"]] for p in parts]})
+            row, rebuilt = _cached_rollup(
+                ctx, start, end, "month", period, input_hash, force, lambda: [json.loads(p["digest_json"]) for p in parts]
+            )
+            result.rebuilt += int(rebuilt)
+    if row is not None:
+        result.status = "built" if result.rebuilt else "unchanged"
+        result.notion_page_id = row["notion_page_id"]
     return result
+
+
+@_stage("publish_rollup")
+def _publish_rollup(ctx: PipelineContext, start: str, end: str, force: bool = False) -> str:
+    row = ctx.store.get_rollup(start, end)
+    digest = json.loads(row["digest_json"])
+    title = f"{row['period']} {'Weekly' if row['kind'] == 'week' else 'Monthly'} Brief"
+    video_count = ctx.store.count_successful_summaries(start, end)
+    notion = ctx.notion
+    published_hash = fingerprint(notion.build_rollup_payload(title, start, end, digest, video_count))
+    if not force and row["notion_page_id"] and row["published_hash"] == published_hash:
+        log.info("notion %s: page %s already up to date", row["period"], row["notion_page_id"])
+        return row["notion_page_id"]
+    page_id = notion.upsert_rollup_page(title, start, end, digest, video_count, page_id=row["notion_page_id"])
+    ctx.store.set_rollup_page_id(start, end, page_id, published_hash)
+    return page_id
+
+
+def build_rollup(
+    db: str, kind: str, value: str, model: str, use_cache: bool = True, force: bool = False, publish: bool = False
+) -> RollupResult:
+    period, start, end = week_span(value) if kind == "week" else month_span(value)
+    with PipelineContext(db, model, use_cache, command="rollup", date=start) as ctx:
+        result = _rollup(ctx, start, end, kind, period, force=force)
+        if publish and result.status != "empty":
+            result.notion_page_id = _publish_rollup(ctx, start, end, force=force)
+        return result
@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+import json
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from dataclasses import dataclass, field
+from datetime import datetime
+from typing import TYPE_CHECKING, Iterator
+
+if TYPE_CHECKING:
+    from .storage import Storage
+
+# Upper bounds in milliseconds; the last bucket catches everything slower.
+LATENCY_BUCKETS_MS = (50, 100, 250, 500, 1000, 2500, 5000, 10000, 30000, 60000, 120000, float("inf"))
+
+
+@dataclass
+class ApiStats:
+    calls: int = 0
+    errors: int = 0
+    retries: int = 0
+    throttled: int = 0
+    total_ms: float = 0.0
+    histogram: list[int] = field(default_factory=lambda: [0] * len(LATENCY_BUCKETS_MS))
+
+    def observe(self, latency_ms: float) -> None:
+        self.calls += 1
+        self.total_ms += latency_ms
+        for i, bound in enumerate(LATENCY_BUCKETS_MS):
+            if latency_ms <= bound:
+                self.histogram[i] += 1
+                return
+
+
+class RunMetrics:
+    def __init__(self, command: str, date: str | None = None):
+        self.run_id = uuid.uuid4().hex
+        self.command = command
+        self.date = date
+        self.started_at = datetime.utcnow().isoformat()
+        self.stages: list[tuple[str | None, str, str, float]] = []
+        self.api: dict[str, ApiStats] = {}
+        self.tokens: list[tuple[str, str, int, int, int]] = []
+        # (kind, outcome) -> count; outcome is valid, local (fixed without a call), network or failed.
+        self.repairs: dict[tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    @contextmanager
+    def stage(self, name: str, date: str | None = None) -> Iterator[None]:
+        started_at = datetime.utcnow().isoformat()
+        began = time.perf_counter()
+        try:
+            yield
+        finally:
+            duration_ms = (time.perf_counter() - began) * 1000
+            with self._lock:
+                self.stages.append((date or self.date, name, started_at, duration_ms))
+
+    def record_call(self, api: str, latency_ms: float, status: int | None, attempt: int) -> None:
+        with self._lock:
+            stats = self.api.setdefault(api, ApiStats())
+            stats.observe(latency_ms)
+            if attempt:
+                stats.retries += 1
+            if status == 429:
+                stats.throttled += 1
+            if status is None or status >= 400:
+                stats.errors += 1
+
+    def record_tokens(self, kind: str, ref: str, usage: dict | None) -> None:
+        if not usage:
+            return
+        row = (
+            kind,
+            ref,
+            int(usage.get("promptTokenCount", 0)),
+            int(usage.get("candidatesTokenCount", 0)),
+            int(usage.get("totalTokenCount", 0)),
+        )
+        with self._lock:
+            self.tokens.append(row)
+
+    def record_repair(self, kind: str, outcome: str) -> None:
+        with self._lock:
+            self.repairs[(kind, outcome)] = self.repairs.get((kind, outcome), 0) + 1
+
+
+def percentile_from_histogram(histogram: list[int], q: float) -> float | None:
+    total = sum(histogram)
+    if not total:
+        return None
+    rank = q * total
+    seen = 0
+    for bound, count in zip(LATENCY_BUCKETS_MS, histogram):
+        seen += count
+        if seen >= rank:
+            return bound
+    return LATENCY_BUCKETS_MS[-1]
+
+
+def percentile(values: list[float], q: float) -> float | None:
+    if not values:
+        return None
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(q * len(ordered)))]
+
+
+def build_stats_report(store: Storage, start: str, end: str) -> dict[str, list[dict]]:
+    durations: dict[str, list[float]] = {}
+    for row in store.list_stage_durations(start, end):
+        durations.setdefault(row["stage"], []).append(row["duration_ms"])
+    stages = [
+        {"stage": stage, "count": len(values), "p50_ms": percentile(values, 0.5), "p95_ms": percentile(values, 0.95)}
+        for stage, values in sorted(durations.items())
+    ]
+
+    merged: dict[str, ApiStats] = {}
+    for row in store.list_api_calls(start, end):
+        agg = merged.setdefault(row["api"], ApiStats())
+        agg.calls += row["calls"]
+        agg.errors += row["errors"]
+        agg.retries += row["retries"]
+        agg.throttled += row["throttled"]
+        agg.total_ms += row["total_ms"]
+        agg.histogram = [a + b for a, b in zip(agg.histogram, json.loads(row["histogram"]))]
+    apis = [
+        {
+            "api": api,
+            "calls": a.calls,
+            "errors": a.errors,
+            "retries": a.retries,
+            "throttled": a.throttled,
+            "mean_ms": a.total_ms / a.calls if a.calls else None,
+            "p50_ms": percentile_from_histogram(a.histogram, 0.5),
+            "p95_ms": percentile_from_histogram(a.histogram, 0.95),
+        }
+        for api, a in sorted(merged.items())
+    ]
+
+    tokens = [
+        {
+            "day": row["day"],
+            "kind": row["kind"],
+            "prompt_tokens": row["prompt_tokens"],
+            "output_tokens": row["output_tokens"],
+            "total_tokens": row["total_tokens"],
+            "per_item": row["total_tokens"] / row["refs"] if row["refs"] else None,
+        }
+        for row in store.token_usage_by_day(start, end)
+    ]
+
+    failures = [
+        {
+            "date": row["date"],
+            "success": row["success"],
+            "failed": row["failed"],
+            "failure_rate": row["failed"] / (row["success"] + row["failed"]) if row["success"] + row["failed"] else None,
+        }
+        for row in store.summary_outcomes_by_date(start, end)
+    ]
+
+    outcomes: dict[str, dict[str, int]] = {}
+    for row in store.json_repairs_by_kind(start, end):
+        outcomes.setdefault(row["kind"], {})[row["outcome"]] = row["count"]
+    repairs = [
+        {
+            "kind": kind,
+            "responses": sum(counts.values()),
+            "valid": counts.get("valid", 0),
+            "local": counts.get("local", 0),
+            "network": counts.get("network", 0),
+            "failed": counts.get("failed", 0),
+            "round_trips_saved": counts.get("local", 0),
+        }
+        for kind, counts in sorted(outcomes.items())
+    ]
+    return {"stages": stages, "apis": apis, "tokens": tokens, "failures": failures, "repairs": repairs}
@@ -1,70 +1,166 @@
 from __future__ import annotations
 
-import random
-import time
-from typing import Any
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable
 
 try:
     import requests
 except ModuleNotFoundError:  # pragma: no cover
     from . import requests_compat as requests
 
+from .transport import Transport
+
+log = logging.getLogger(__name__)
+
+
+def daily_title(date: str) -> str:
+    return f"{date} Morning Brief"
+
 
 class NotionClient:
     BASE_URL = "https://api.notion.com/v1"
+    APPEND_CHUNK = 100  # Notion accepts at most 100 children per request
+    DELETE_WORKERS = 3
 
-    def __init__(self, token: str, database_id: str, notion_version: str = "2022-06-28", session: requests.Session | None = None):
+    def __init__(
+        self,
+        token: str,
+        database_id: str,
+        notion_version: str = "2022-06-28",
+        session: requests.Session | None = None,
+        transport: Transport | None = None,
+    ):
         self.database_id = database_id
         self.session = session or requests.Session()
+        self.transport = transport or Transport("notion", self.session)
         self.headers = {
             "Authorization": f"Bearer {token}",
             "Notion-Version": notion_version,
             "Content-Type": "application/json",
         }
 
-    def upsert_daily_page(self, date: str, digest: dict, video_count: int) -> str:
-        page = self.find_page_by_date(date)
-        properties = self._build_properties(date, digest, video_count)
-        children = self._build_children(digest)
+    def build_payload(self, date: str, digest: dict, video_count: int) -> dict:
+        return {
+            "properties": self._build_properties(date, digest, video_count),
+            "children": self._build_children(digest),
+        }
+
+    def upsert_daily_page(self, date: str, digest: dict, video_count: int, page_id: str | None = None) -> str:
+        built = self.build_payload(date, digest, video_count)
+        return self._upsert_page(built["properties"], built["children"], lambda: self.find_page_by_date(date), page_id)
+
+    def build_rollup_payload(self, title: str, start: str, end: str, digest: dict, video_count: int) -> dict:
+        properties = self._build_properties(start, digest, video_count)
+        properties["Name"] = {"title": [{"text": {"content": title}}]}
+        properties["Date"] = {"date": {"start": start, "end": end}}
+        return {"properties": properties, "children": self._build_children(digest)}
+
+    def upsert_rollup_page(
+        self, title: str, start: str, end: str, digest: dict, video_count: int, page_id: str | None = None
+    ) -> str:
+        # Rollups share the database with daily pages, so they are found by title rather than by Date.
+        built = self.build_rollup_payload(title, start, end, digest, video_count)
+        return self._upsert_page(built["properties"], built["children"], lambda: self.find_page_by_title(title), page_id)
+
+    def _upsert_page(self, properties: dict, children: list[dict], find: Callable[[], dict | None], page_id: str | None) -> str:
+        if page_id:
+            try:
+                self._request_with_retries("PATCH", f"/pages/{page_id}", json={"properties": properties})
+            except Exception as exc:
+                if _status_of(exc) not in (400, 404):
+                    raise
+                # Cached page was deleted or archived in Notion; fall back to the lookup.
+                log.info("cached Notion page %s is gone (%s); looking it up again", page_id, exc)
+                page_id = None
+            else:
+                self._sync_children(page_id, children)
+                return page_id
+        page = find()
         if page:
             page_id = page["id"]
             self._request_with_retries("PATCH", f"/pages/{page_id}", json={"properties": properties})
-            self._replace_children(page_id, children)
+            self._sync_children(page_id, children)
             return page_id
         payload = {
             "parent": {"database_id": self.database_id},
             "properties": properties,
-            "children": children,
+            "children": children[: self.APPEND_CHUNK],
         }
         created = self._request_with_retries("POST", "/pages", json=payload).json()
+        self._append_children(created["id"], children[self.APPEND_CHUNK :])
         return created["id"]
 
     def find_page_by_date(self, date: str) -> dict[str, Any] | None:
+        # Weekly and monthly pages in the same database have a Date range starting on a day too;
+        # the title tells the daily page apart.
         payload = {
-            "filter": {"property": "Date", "date": {"equals": date}},
+            "filter": {
+                "and": [
+                    {"property": "Date", "date": {"equals": date}},
+                    {"property": "Name", "title": {"equals": daily_title(date)}},
+                ]
+            },
             "page_size": 1,
         }
         resp = self._request_with_retries("POST", f"/databases/{self.database_id}/query", json=payload)
         results = resp.json().get("results", [])
         return results[0] if results else None
 
-    def _replace_children(self, page_id: str, new_children: list[dict]) -> None:
+    def find_page_by_title(self, title: str) -> dict[str, Any] | None:
+        payload = {
+            "filter": {"property": "Name", "title": {"equals": title}},
+            "page_size": 1,
+        }
+        resp = self._request_with_retries("POST", f"/databases/{self.database_id}/query", json=payload)
+        results = resp.json().get("results", [])
+        return results[0] if results else None
+
+    def _sync_children(self, page_id: str, new_children: list[dict]) -> None:
         existing = self._list_children(page_id)
-        for block in existing:
-            self._request_with_retries("DELETE", f"/blocks/{block['id']}")
-            time.sleep(random.uniform(0.5, 1.1))
-        self._request_with_retries("PATCH", f"/blocks/{page_id}/children", json={"children": new_children})
+        # Keep the longest prefix whose block types line up, patching text in place;
+        # everything after the first type mismatch is deleted and re-appended.
+        keep = 0
+        for old, new in zip(existing, new_children):
+            if old.get("type") != new["type"]:
+                break
+            if self._block_text(old) != self._block_text(new):
+                self._request_with_retries("PATCH", f"/blocks/{old['id']}", json={new["type"]: new[new["type"]]})
+            keep += 1
+        stale = existing[keep:]
+        if stale:
+            with ThreadPoolExecutor(max_workers=self.DELETE_WORKERS) as pool:
+                list(pool.map(lambda block: self._request_with_retries("DELETE", f"/blocks/{block['id']}"), stale))
+        self._append_children(page_id, new_children[keep:])
+
+    def _append_children(self, page_id: str, children: list[dict]) -> None:
+        for start in range(0, len(children), self.APPEND_CHUNK):
+            chunk = children[start : start + self.APPEND_CHUNK]
+            self._request_with_retries("PATCH", f"/blocks/{page_id}/children", json={"children": chunk})
 
     def _list_children(self, page_id: str) -> list[dict]:
-        url = f"/blocks/{page_id}/children?page_size=100"
-        data = self._request_with_retries("GET", url).json()
-        return data.get("results", [])
+        blocks: list[dict] = []
+        cursor = None
+        while True:
+            url = f"/blocks/{page_id}/children?page_size=100"
+            if cursor:
+                url += f"&start_cursor={cursor}"
+            data = self._request_with_retries("GET", url).json()
+            blocks.extend(data.get("results", []))
+            cursor = data.get("next_cursor")
+            if not data.get("has_more") or not cursor:
+                return blocks
+
+    @staticmethod
+    def _block_text(block: dict) -> list[str]:
+        rich_text = block.get(block.get("type", ""), {}).get("rich_text", [])
+        return [rt.get("plain_text") or rt.get("text", {}).get("content", "") for rt in rich_text]
 
     def _build_properties(self, date: str, digest: dict, video_count: int) -> dict:
         summary_text = digest["one_liner"] + "\n" + "\n".join(f"- {x}" for x in digest["consensus"])
         confidence = "medium"
         return {
-            "Name": {"title": [{"text": {"content": f"{date} Morning Brief"}}]},
+            "Name": {"title": [{"text": {"content": daily_title(date)}}]},
             "Date": {"date": {"start": date}},
             "VideoCount": {"number": video_count},
             "Summary": {"rich_text": [{"text": {"content": summary_text[:1900]}}]},
@@ -96,20 +192,9 @@ class NotionClient:
         blocks.extend(bullets(sources))
         return blocks
 
-    def _request_with_retries(self, method: str, path: str, json: dict | None = None, max_retries: int = 4) -> requests.Response:
-        for attempt in range(max_retries):
-            resp = self.session.request(
-                method,
-                f"{self.BASE_URL}{path}",
-                headers=self.headers,
-                json=json,
-                timeout=45,
-            )
-            if resp.status_code < 400:
-                return resp
-            if resp.status_code in (429, 500, 502, 503, 504):
-                time.sleep((2**attempt) + random.uniform(0.5, 1.5))
-                continue
-            resp.raise_for_status()
-        resp.raise_for_status()
-        return resp
+    def _request_with_retries(self, method: str, path: str, json: dict | None = None) -> requests.Response:
+        return self.transport.request(method, f"{self.BASE_URL}{path}", headers=self.headers, json=json, timeout=45)
+
+
+def _status_of(exc: Exception) -> int | None:
+    return getattr(getattr(exc, "response", None), "status_code", None)
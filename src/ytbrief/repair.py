@@ -0,0 +1,154 @@
+from __future__ import annotations
+
+import json
+import re
+from functools import lru_cache
+from typing import Any, TypeVar
+
+from pydantic import BaseModel, ValidationError
+
+M = TypeVar("M", bound=BaseModel)
+
+FENCE_RE = re.compile(r"```(?:json)?\s*(.*?)(?:```|$)", re.DOTALL | re.IGNORECASE)
+CLOSERS = {"{": "}", "[": "]"}
+# The OpenAPI subset Gemini accepts in generationConfig.responseSchema.
+GEMINI_SCHEMA_KEYS = ("enum", "required", "minItems", "maxItems", "description", "nullable", "format")
+
+
+def loads_lenient(text: str) -> Any:
+    # Undo the failures seen in practice: code fences, prose around the object, trailing commas
+    # and output cut off by the token limit (closed at the last complete member).
+    fenced = FENCE_RE.search(text)
+    if fenced:
+        text = fenced.group(1)
+    starts = [i for i in (text.find("{"), text.find("[")) if i >= 0]
+    if not starts:
+        raise ValueError("no JSON object in the response")
+    text = text[min(starts) :]
+    try:
+        return json.loads(text)
+    except ValueError:
+        pass
+    out: list[str] = []
+    stack: list[str] = []
+    cuts: list[tuple[int, tuple[str, ...]]] = []
+    in_string = escaped = False
+    for ch in text:
+        if in_string:
+            out.append(ch)
+            if escaped:
+                escaped = False
+            elif ch == "\\":
+                escaped = True
+            elif ch == '"':
+                in_string = False
+            continue
+        if ch == '"':
+            in_string = True
+        elif ch in CLOSERS:
+            # Cutting before an opening bracket drops a half-written item rather than leaving it empty.
+            cuts.append((len(out), tuple(stack)))
+            stack.append(CLOSERS[ch])
+        elif ch in "}]":
+            if not stack or stack[-1] != ch:
+                raise ValueError(f"unbalanced {ch!r} in the response")
+            _drop_trailing_comma(out)
+            stack.pop()
+            out.append(ch)
+            if not stack:
+                return json.loads("".join(out))  # anything after the object is prose
+            continue
+        elif ch == ",":
+            cuts.append((len(out), tuple(stack)))
+        out.append(ch)
+    if escaped:
+        out.pop()
+    candidates = [("".join(out) + ('"' if in_string else ""), tuple(stack))]
+    candidates += [("".join(out[:end]), open_) for end, open_ in reversed(cuts)]
+    for head, open_ in candidates:
+        body = head.rstrip().rstrip(",")
+        try:
+            return json.loads(body + "".join(reversed(open_)))
+        except ValueError:
+            continue
+    raise ValueError("could not close the truncated response")
+
+
+def _drop_trailing_comma(out: list[str]) -> None:
+    i = len(out) - 1
+    while i >= 0 and out[i].isspace():
+        i -= 1
+    if i >= 0 and out[i] == ",":
+        del out[i]
+
+
+@lru_cache(maxsize=None)
+def json_schema(model: type[BaseModel]) -> dict:
+    return model.model_json_schema()
+
+
+def _resolve(node: dict, defs: dict) -> dict:
+    ref = node.get("$ref")
+    return defs[ref.rsplit("/", 1)[-1]] if ref else node
+
+
+def coerce(value: Any, schema: dict, defs: dict | None = None) -> Any:
+    # Fix shape problems that do not need the model's judgement: surplus list items, enum casing,
+    # numbers where strings are expected, a bare item instead of a list, optional lists left out.
+    # Too few items or missing text is left for validation to reject.
+    defs = schema.get("$defs", {}) if defs is None else defs
+    schema = _resolve(schema, defs)
+    kind = schema.get("type")
+    if kind == "object" and isinstance(value, dict):
+        props = schema.get("properties", {})
+        out = {k: coerce(v, props[k], defs) if k in props else v for k, v in value.items()}
+        for name in schema.get("required", []):
+            prop = _resolve(props.get(name, {}), defs)
+            if name not in out and prop.get("type") == "array" and not prop.get("minItems"):
+                out[name] = []
+        return out
+    if kind == "array":
+        if value is None:
+            return value
+        items = value if isinstance(value, list) else [value]
+        items = [coerce(item, schema.get("items", {}), defs) for item in items]
+        limit = schema.get("maxItems")
+        return items[:limit] if limit is not None else items
+    if kind == "string":
+        if isinstance(value, (int, float)) and not isinstance(value, bool):
+            return str(value)
+        if isinstance(value, str) and "enum" in schema:
+            folded = value.strip().lower()
+            return folded if folded in schema["enum"] else value
+    return value
+
+
+def parse_model(model: type[M], text: str) -> tuple[M, str]:
+    # Returns the instance and "valid" or "local"; re-raises the original error if local repair fails.
+    try:
+        return model.model_validate_json(text), "valid"
+    except ValidationError as exc:
+        error = exc
+    try:
+        return model.model_validate(coerce(loads_lenient(text), json_schema(model))), "local"
+    except ValueError:  # pydantic's ValidationError is a ValueError too
+        raise error from None
+
+
+@lru_cache(maxsize=None)
+def response_schema(model: type[BaseModel]) -> dict:
+    schema = json_schema(model)
+    defs = schema.get("$defs", {})
+
+    def convert(node: dict) -> dict:
+        node = _resolve(node, defs)
+        out: dict[str, Any] = {"type": node["type"].upper()}
+        if "properties" in node:
+            out["properties"] = {k: convert(v) for k, v in node["properties"].items()}
+            out["propertyOrdering"] = list(node["properties"])
+        if "items" in node:
+            out["items"] = convert(node["items"])
+        out.update((k, node[k]) for k in GEMINI_SCHEMA_KEYS if k in node)
+        return out
+
+    return convert(schema)
@@ -1,19 +1,38 @@
 from __future__ import annotations
 
+import gzip
+import http.client
 import json as jsonlib
-import urllib.error
+import ssl
+import threading
 import urllib.parse
-import urllib.request
+import zlib
 
 
 class HTTPError(Exception):
+    def __init__(self, message: str, response=None):
+        super().__init__(message)
+        self.response = response
+
+
+class CompatConnectionError(ConnectionError):
     pass
 
 
 class Response:
-    def __init__(self, status_code: int, body: bytes):
+    def __init__(self, status_code: int, body: bytes, headers=None, url: str = ""):
         self.status_code = status_code
         self._body = body
+        self.headers = headers if headers is not None else {}
+        self.url = url
+
+    @property
+    def ok(self) -> bool:
+        return self.status_code < 400
+
+    @property
+    def content(self) -> bytes:
+        return self._body
 
     def json(self):
         return jsonlib.loads(self._body.decode("utf-8") or "{}")
@@ -24,31 +43,120 @@ class Response:
 
     def raise_for_status(self):
         if self.status_code >= 400:
-            raise HTTPError(f"HTTP {self.status_code}: {self.text}")
+            raise HTTPError(f"HTTP {self.status_code}: {self.text}", response=self)
+
+
+def _with_params(url: str, params: dict | None) -> str:
+    if not params:
+        return url
+    return f"{url}{'&' if '?' in url else '?'}{urllib.parse.urlencode(params)}"
+
+
+def _decode(body: bytes, encoding: str | None) -> bytes:
+    if encoding == "gzip":
+        return gzip.decompress(body)
+    if encoding == "deflate":
+        return zlib.decompress(body)
+    return body
+
+
+class _ConnectionPool:
+    def __init__(self, maxsize: int):
+        self.maxsize = maxsize
+        self._idle: dict[tuple[str, str, int], list[http.client.HTTPConnection]] = {}
+        self._lock = threading.Lock()
+        self._ssl_context = ssl.create_default_context()
+
+    def acquire(self, key: tuple[str, str, int], timeout: float) -> http.client.HTTPConnection:
+        with self._lock:
+            idle = self._idle.get(key)
+            conn = idle.pop() if idle else None
+        if conn is not None:
+            if conn.sock is not None:
+                conn.sock.settimeout(timeout)
+            return conn
+        scheme, host, port = key
+        if scheme == "https":
+            return http.client.HTTPSConnection(host, port, timeout=timeout, context=self._ssl_context)
+        return http.client.HTTPConnection(host, port, timeout=timeout)
+
+    def release(self, key: tuple[str, str, int], conn: http.client.HTTPConnection) -> None:
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            if len(idle) < self.maxsize:
+                idle.append(conn)
+                return
+        conn.close()
+
+    def close(self) -> None:
+        with self._lock:
+            conns = [c for idle in self._idle.values() for c in idle]
+            self._idle.clear()
+        for conn in conns:
+            conn.close()
 
 
 class Session:
-    def request(self, method, url, headers=None, params=None, json=None, timeout=30):
-        if params:
-            q = urllib.parse.urlencode(params)
-            url = f"{url}{'&' if '?' in url else '?'}{q}"
-        data = None
-        req_headers = headers or {}
+    def __init__(self, pool_maxsize: int = 10):
+        self.headers = {"Accept-Encoding": "gzip, deflate", "Connection": "keep-alive", "User-Agent": "ytbrief"}
+        self._pool = _ConnectionPool(pool_maxsize)
+
+    def request(self, method, url, headers=None, params=None, json=None, data=None, timeout=30):
+        url = _with_params(url, params)
+        parts = urllib.parse.urlsplit(url)
+        port = parts.port or (443 if parts.scheme == "https" else 80)
+        key = (parts.scheme, parts.hostname or "", port)
+        target = parts.path or "/"
+        if parts.query:
+            target += f"?{parts.query}"
+        req_headers = {**self.headers, **(headers or {})}
+        body = data
         if json is not None:
-            data = jsonlib.dumps(json).encode("utf-8")
-            req_headers = {**req_headers, "Content-Type": "application/json"}
-        req = urllib.request.Request(url=url, method=method, data=data, headers=req_headers)
-        try:
-            with urllib.request.urlopen(req, timeout=timeout) as resp:
-                return Response(resp.status, resp.read())
-        except urllib.error.HTTPError as exc:
-            return Response(exc.code, exc.read())
-
-    def get(self, url, params=None, timeout=30):
-        return self.request("GET", url, params=params, timeout=timeout)
-
-    def post(self, url, params=None, json=None, timeout=30):
-        if params:
-            q = urllib.parse.urlencode(params)
-            url = f"{url}{'&' if '?' in url else '?'}{q}"
-        return self.request("POST", url, json=json, timeout=timeout)
+            body = jsonlib.dumps(json).encode("utf-8")
+            req_headers["Content-Type"] = "application/json"
+        for attempt in range(2):
+            conn = self._pool.acquire(key, timeout)
+            reused = conn.sock is not None
+            try:
+                conn.request(method, target, body=body, headers=req_headers)
+                resp = conn.getresponse()
+                raw = resp.read()
+            except (http.client.RemoteDisconnected, ConnectionResetError, BrokenPipeError) as exc:
+                conn.close()
+                # The server dropped an idle keep-alive connection; retry once on a fresh one.
+                if reused and attempt == 0:
+                    continue
+                raise CompatConnectionError(str(exc)) from exc
+            except http.client.HTTPException as exc:
+                conn.close()
+                raise CompatConnectionError(str(exc)) from exc
+            except BaseException:
+                conn.close()
+                raise
+            if resp.will_close:
+                conn.close()
+            else:
+                self._pool.release(key, conn)
+            return Response(resp.status, _decode(raw, resp.getheader("Content-Encoding")), resp.headers, url)
+        raise CompatConnectionError(f"could not send {method} {url}")  # pragma: no cover
+
+    def get(self, url, params=None, headers=None, timeout=30):
+        return self.request("GET", url, headers=headers, params=params, timeout=timeout)
+
+    def post(self, url, params=None, json=None, headers=None, timeout=30):
+        return self.request("POST", url, headers=headers, params=params, json=json, timeout=timeout)
+
+    def patch(self, url, params=None, json=None, headers=None, timeout=30):
+        return self.request("PATCH", url, headers=headers, params=params, json=json, timeout=timeout)
+
+    def delete(self, url, params=None, headers=None, timeout=30):
+        return self.request("DELETE", url, headers=headers, params=params, timeout=timeout)
+
+    def close(self) -> None:
+        self._pool.close()
+
+    def __enter__(self) -> Session:
+        return self
+
+    def __exit__(self, *exc_info) -> None:
+        self.close()
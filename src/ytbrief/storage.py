@@ -1,18 +1,156 @@
 from __future__ import annotations
 
+import functools
+import hashlib
+import json
 import sqlite3
-from datetime import datetime
+import threading
+from datetime import date as date_type
+from datetime import datetime, timedelta
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, Iterator, TypeVar
+
+from .tracing import NULL_TRACER
+
+if TYPE_CHECKING:
+    from .metrics import RunMetrics
+
+T = TypeVar("T", bound=Callable)
+
+VIDEO_DEFAULTS = {"duration_seconds": None, "view_count": None, "live_broadcast_content": None}
+
+UPSERT_VIDEO_SQL = """
+    INSERT INTO videos(
+      video_id, date, title, channel, published_at, url, fetched_at,
+      duration_seconds, view_count, live_broadcast_content
+    )
+    VALUES (
+      :video_id, :date, :title, :channel, :published_at, :url, :fetched_at,
+      :duration_seconds, :view_count, :live_broadcast_content
+    )
+    ON CONFLICT(video_id) DO UPDATE SET
+      date=excluded.date,
+      title=excluded.title,
+      channel=excluded.channel,
+      published_at=excluded.published_at,
+      url=excluded.url,
+      fetched_at=excluded.fetched_at,
+      duration_seconds=COALESCE(excluded.duration_seconds, videos.duration_seconds),
+      view_count=COALESCE(excluded.view_count, videos.view_count),
+      live_broadcast_content=COALESCE(excluded.live_broadcast_content, videos.live_broadcast_content)
+"""
+
+UPSERT_VIDEO_SUMMARY_SQL = """
+    INSERT INTO video_summaries(video_id, date, summary_json, status, created_at, attempts)
+    VALUES (?, ?, ?, ?, ?, 1)
+    ON CONFLICT(video_id, date) DO UPDATE SET
+      summary_json=excluded.summary_json,
+      status=excluded.status,
+      created_at=excluded.created_at,
+      attempts=video_summaries.attempts + 1
+"""
+
+# Excludes videos clustered under another representative (see dedup.py); expects alias v.
+NOT_DUPLICATE_SQL = (
+    "NOT EXISTS (SELECT 1 FROM video_clusters c "
+    "WHERE c.video_id = v.video_id AND c.date = v.date AND c.representative_id != v.video_id)"
+)
+
+ENTITY_TABLES = ("ticker_mentions", "sector_moves", "key_events", "number_facts")
+
+ENTITY_INSERT_SQL = {
+    "ticker_mentions": "INSERT INTO ticker_mentions(video_id, date, ticker, context) VALUES (?, ?, ?, ?)",
+    "sector_moves": "INSERT INTO sector_moves(video_id, date, name, direction, why) VALUES (?, ?, ?, ?, ?)",
+    "key_events": "INSERT INTO key_events(video_id, date, event, why) VALUES (?, ?, ?, ?)",
+    "number_facts": "INSERT INTO number_facts(video_id, date, metric, value, context) VALUES (?, ?, ?, ?, ?)",
+}
+
+
+def summary_entities(video_id: str, date: str, summary_json: str) -> dict[str, list[tuple]]:
+    # Flattens the list fields of a VideoSummary into rows for the entity tables.
+    body = json.loads(summary_json)
+    return {
+        "ticker_mentions": [
+            (video_id, date, t["ticker"].strip().upper(), t.get("context", "")) for t in body.get("tickers_mentions", [])
+        ],
+        "sector_moves": [
+            (video_id, date, s["name"].strip(), s.get("direction"), s.get("why", "")) for s in body.get("sectors_assets", [])
+        ],
+        "key_events": [(video_id, date, e["event"].strip(), e.get("why", "")) for e in body.get("key_events", [])],
+        "number_facts": [
+            (video_id, date, n["metric"].strip(), n.get("value", ""), n.get("context", "")) for n in body.get("numbers", [])
+        ],
+    }
+
+
+def fingerprint(obj: object) -> str:
+    material = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(",", ":"))
+    return hashlib.sha256(material.encode("utf-8")).hexdigest()
+
+
+def configure_connection(conn: sqlite3.Connection) -> None:
+    # WAL lets readers (dashboards, the Gemini cache connection) proceed while a run is writing.
+    conn.execute("PRAGMA journal_mode=WAL")
+    conn.execute("PRAGMA synchronous=NORMAL")
+    conn.execute("PRAGMA busy_timeout=5000")
+    conn.execute("PRAGMA temp_store=MEMORY")
+    conn.execute("PRAGMA cache_size=-16000")
+
+
+def _day_after(day: str) -> str:
+    return (date_type.fromisoformat(day) + timedelta(days=1)).isoformat()
+
+
+def _locked(method: T) -> T:
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        with self.lock:
+            return method(self, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
+
+
+def _write(method: T) -> T:
+    # _locked plus a "sqlite" trace span named after the method, with the batch size when there is one.
+    @functools.wraps(method)
+    def wrapper(self, *args, **kwargs):
+        rows = next((len(a) for a in args if isinstance(a, list)), None)
+        with self.lock, self.tracer.span(method.__name__, "sqlite", **({} if rows is None else {"rows": rows})):
+            return method(self, *args, **kwargs)
+
+    return wrapper  # type: ignore[return-value]
 
 
 class Storage:
+    # One connection may be shared by several threads (backfill, streaming); every
+    # public method holds the lock, so writes are funnelled through a single writer.
     def __init__(self, db_path: str):
         self.db_path = Path(db_path)
-        self.conn = sqlite3.connect(self.db_path)
+        self.lock = threading.RLock()
+        self.tracer = NULL_TRACER
+        self.conn = sqlite3.connect(self.db_path, check_same_thread=False)
         self.conn.row_factory = sqlite3.Row
+        configure_connection(self.conn)
         self.init_schema()
 
+    @_locked
     def init_schema(self) -> None:
+        # PRAGMA user_version records the last migration applied. Every migration is idempotent,
+        # so databases created before versioning (user_version 0) replay them safely.
+        version = self.conn.execute("PRAGMA user_version").fetchone()[0]
+        if version > len(self.MIGRATIONS):
+            raise RuntimeError(f"{self.db_path} has schema version {version}; this ytbrief supports up to {len(self.MIGRATIONS)}")
+        for target, migrate in enumerate(self.MIGRATIONS[version:], start=version + 1):
+            migrate(self)
+            self.conn.execute(f"PRAGMA user_version = {target}")
+            self.conn.commit()
+
+    @property
+    @_locked
+    def schema_version(self) -> int:
+        return self.conn.execute("PRAGMA user_version").fetchone()[0]
+
+    def _migrate_base_tables(self) -> None:
         self.conn.executescript(
             """
             CREATE TABLE IF NOT EXISTS videos(
@@ -22,7 +160,10 @@ class Storage:
                 channel TEXT,
                 published_at TEXT,
                 url TEXT,
-                fetched_at TEXT
+                fetched_at TEXT,
+                duration_seconds INTEGER,
+                view_count INTEGER,
+                live_broadcast_content TEXT
             );
 
             CREATE TABLE IF NOT EXISTS video_summaries(
@@ -31,6 +172,7 @@ class Storage:
                 summary_json TEXT,
                 status TEXT,
                 created_at TEXT,
+                attempts INTEGER NOT NULL DEFAULT 0,
                 PRIMARY KEY(video_id, date)
             );
 
@@ -39,78 +181,656 @@ class Storage:
                 digest_json TEXT,
                 status TEXT,
                 created_at TEXT,
-                notion_page_id TEXT
+                notion_page_id TEXT,
+                input_hash TEXT,
+                published_hash TEXT
+            );
+
+            CREATE TABLE IF NOT EXISTS runs(
+                run_id TEXT PRIMARY KEY,
+                command TEXT,
+                date TEXT,
+                started_at TEXT,
+                finished_at TEXT,
+                status TEXT
+            );
+
+            CREATE TABLE IF NOT EXISTS run_stages(
+                run_id TEXT,
+                date TEXT,
+                stage TEXT,
+                started_at TEXT,
+                duration_ms REAL
+            );
+
+            CREATE TABLE IF NOT EXISTS api_calls(
+                run_id TEXT,
+                api TEXT,
+                calls INTEGER,
+                errors INTEGER,
+                retries INTEGER,
+                throttled INTEGER,
+                total_ms REAL,
+                histogram TEXT,
+                PRIMARY KEY(run_id, api)
+            );
+
+            CREATE TABLE IF NOT EXISTS token_usage(
+                run_id TEXT,
+                kind TEXT,
+                ref TEXT,
+                prompt_tokens INTEGER,
+                output_tokens INTEGER,
+                total_tokens INTEGER
             );
             """
         )
-        self.conn.commit()
+        self._ensure_column("video_summaries", "attempts", "INTEGER NOT NULL DEFAULT 0")
+        self._ensure_column("videos", "duration_seconds", "INTEGER")
+        self._ensure_column("videos", "view_count", "INTEGER")
+        self._ensure_column("videos", "live_broadcast_content", "TEXT")
+        self._ensure_column("daily_digests", "input_hash", "TEXT")
+        self._ensure_column("daily_digests", "published_hash", "TEXT")
 
-    def upsert_video(self, row: dict) -> None:
-        self.conn.execute(
+    def _migrate_entity_tables(self) -> None:
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS ticker_mentions(
+                video_id TEXT,
+                date TEXT,
+                ticker TEXT,
+                context TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_ticker_mentions_ticker_date ON ticker_mentions(ticker, date);
+            CREATE INDEX IF NOT EXISTS idx_ticker_mentions_video ON ticker_mentions(video_id, date);
+
+            CREATE TABLE IF NOT EXISTS sector_moves(
+                video_id TEXT,
+                date TEXT,
+                name TEXT,
+                direction TEXT,
+                why TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_sector_moves_name_date ON sector_moves(name, date);
+            CREATE INDEX IF NOT EXISTS idx_sector_moves_video ON sector_moves(video_id, date);
+
+            CREATE TABLE IF NOT EXISTS key_events(
+                video_id TEXT,
+                date TEXT,
+                event TEXT,
+                why TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_key_events_date ON key_events(date);
+            CREATE INDEX IF NOT EXISTS idx_key_events_video ON key_events(video_id, date);
+
+            CREATE TABLE IF NOT EXISTS number_facts(
+                video_id TEXT,
+                date TEXT,
+                metric TEXT,
+                value TEXT,
+                context TEXT
+            );
+            CREATE INDEX IF NOT EXISTS idx_number_facts_metric_date ON number_facts(metric, date);
+            CREATE INDEX IF NOT EXISTS idx_number_facts_video ON number_facts(video_id, date);
             """
-            INSERT INTO videos(video_id, date, title, channel, published_at, url, fetched_at)
-            VALUES (:video_id, :date, :title, :channel, :published_at, :url, :fetched_at)
-            ON CONFLICT(video_id) DO UPDATE SET
-              date=excluded.date,
-              title=excluded.title,
-              channel=excluded.channel,
-              published_at=excluded.published_at,
-              url=excluded.url,
-              fetched_at=excluded.fetched_at
-            """,
-            row,
         )
-        self.conn.commit()
+        self.rebuild_entities()
+
+    def _migrate_query_indexes(self) -> None:
+        # Matched to the per-date reads: list_videos_by_date (date, ORDER BY published_at),
+        # list_successful_summaries / summary_outcomes_by_date (date, status), and the stats
+        # queries that select runs by start time and join their child tables on run_id.
+        self.conn.executescript(
+            """
+            CREATE INDEX IF NOT EXISTS idx_videos_date_published ON videos(date, published_at);
+            CREATE INDEX IF NOT EXISTS idx_video_summaries_date_status ON video_summaries(date, status);
+            CREATE INDEX IF NOT EXISTS idx_runs_started_at ON runs(started_at);
+            CREATE INDEX IF NOT EXISTS idx_run_stages_run ON run_stages(run_id);
+            CREATE INDEX IF NOT EXISTS idx_token_usage_run ON token_usage(run_id);
+            """
+        )
+
+    def _migrate_rollups(self) -> None:
+        # Weekly/monthly digests and the partial-week spans months are assembled from, keyed by
+        # their inclusive date span so a full ISO week inside a month is shared with --week.
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS rollups(
+                start TEXT,
+                end TEXT,
+                kind TEXT,
+                period TEXT,
+                digest_json TEXT,
+                status TEXT,
+                input_hash TEXT,
+                created_at TEXT,
+                notion_page_id TEXT,
+                published_hash TEXT,
+                PRIMARY KEY(start, end)
+            );
+            """
+        )
+
+    def _migrate_video_clusters(self) -> None:
+        # Near-duplicate clusters per date; a video whose representative_id is another video is
+        # not summarized and resolves to the representative's summary.
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS video_clusters(
+                video_id TEXT,
+                date TEXT,
+                representative_id TEXT,
+                simhash TEXT,
+                PRIMARY KEY(video_id, date)
+            );
+            CREATE INDEX IF NOT EXISTS idx_video_clusters_representative ON video_clusters(date, representative_id);
+            """
+        )
+
+    def _migrate_api_usage(self) -> None:
+        # Ledger of quota spent per API and quota day (Pacific time, when YouTube and Gemini reset).
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS api_usage(
+                day TEXT,
+                api TEXT,
+                calls INTEGER DEFAULT 0,
+                units INTEGER DEFAULT 0,
+                prompt_tokens INTEGER DEFAULT 0,
+                output_tokens INTEGER DEFAULT 0,
+                exhausted INTEGER DEFAULT 0,
+                updated_at TEXT,
+                PRIMARY KEY(day, api)
+            );
+            """
+        )
+
+    def _migrate_watermarks(self) -> None:
+        # Latest publishedAt seen per date and source, so watch polls only search newer uploads.
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS watermarks(
+                date TEXT,
+                source TEXT,
+                value TEXT,
+                updated_at TEXT,
+                PRIMARY KEY(date, source)
+            );
+            """
+        )
+
+    def _migrate_exports(self) -> None:
+        # Where each export target stopped, so `export --incremental` only writes newer summaries.
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS exports(
+                target TEXT PRIMARY KEY,
+                format TEXT,
+                flatten INTEGER,
+                last_created_at TEXT,
+                rows INTEGER,
+                updated_at TEXT
+            );
+            """
+        )
+
+    def _migrate_json_repairs(self) -> None:
+        # How each Gemini response was validated per run: valid as returned, repaired locally,
+        # repaired by a second call, or failed.
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS json_repairs(
+                run_id TEXT,
+                kind TEXT,
+                outcome TEXT,
+                count INTEGER,
+                PRIMARY KEY(run_id, kind, outcome)
+            );
+            """
+        )
+
+    def _migrate_gemini_cache(self) -> None:
+        # Gemini responses keyed by model, prompt and generation config; ResponseCache reads and evicts them.
+        self.conn.executescript(
+            """
+            CREATE TABLE IF NOT EXISTS gemini_cache(
+                key TEXT PRIMARY KEY,
+                model TEXT,
+                response TEXT,
+                size INTEGER,
+                created_at REAL,
+                accessed_at REAL
+            );
+            CREATE INDEX IF NOT EXISTS idx_gemini_cache_accessed ON gemini_cache(accessed_at);
+            """
+        )
+
+    MIGRATIONS = (
+        _migrate_base_tables,
+        _migrate_entity_tables,
+        _migrate_query_indexes,
+        _migrate_rollups,
+        _migrate_video_clusters,
+        _migrate_api_usage,
+        _migrate_watermarks,
+        _migrate_exports,
+        _migrate_json_repairs,
+        _migrate_gemini_cache,
+    )
+
+    def _ensure_column(self, table: str, column: str, decl: str) -> None:
+        columns = {r["name"] for r in self.conn.execute(f"PRAGMA table_info({table})")}
+        if column not in columns:
+            self.conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} {decl}")
+
+    def upsert_video(self, row: dict) -> None:
+        self.upsert_videos([row])
+
+    @_write
+    def upsert_videos(self, rows: list[dict]) -> None:
+        with self.conn:
+            self.conn.executemany(UPSERT_VIDEO_SQL, [{**VIDEO_DEFAULTS, **row} for row in rows])
+
+    @_locked
+    def list_videos_by_date(self, date: str, representatives_only: bool = False) -> list[sqlite3.Row]:
+        if not representatives_only:
+            cur = self.conn.execute("SELECT * FROM videos WHERE date = ? ORDER BY published_at", (date,))
+            return cur.fetchall()
+        cur = self.conn.execute(
+            f"SELECT v.* FROM videos v WHERE v.date = ? AND {NOT_DUPLICATE_SQL} ORDER BY v.published_at", (date,)
+        )
+        return cur.fetchall()
 
-    def list_videos_by_date(self, date: str) -> list[sqlite3.Row]:
-        cur = self.conn.execute("SELECT * FROM videos WHERE date = ? ORDER BY published_at", (date,))
+    @_locked
+    def list_pending_videos(self, date: str, max_attempts: int | None = None) -> list[sqlite3.Row]:
+        cur = self.conn.execute(
+            "SELECT v.* FROM videos v "
+            "LEFT JOIN video_summaries vs ON vs.video_id = v.video_id AND vs.date = v.date "
+            "WHERE v.date = ? AND (vs.video_id IS NULL OR (vs.status != 'success' AND (? IS NULL OR vs.attempts < ?))) "
+            f"AND {NOT_DUPLICATE_SQL} "
+            "ORDER BY v.published_at",
+            (date, max_attempts, max_attempts),
+        )
         return cur.fetchall()
 
     def upsert_video_summary(self, video_id: str, date: str, summary_json: str, status: str) -> None:
-        self.conn.execute(
-            """
-            INSERT INTO video_summaries(video_id, date, summary_json, status, created_at)
-            VALUES (?, ?, ?, ?, ?)
-            ON CONFLICT(video_id, date) DO UPDATE SET
-              summary_json=excluded.summary_json,
-              status=excluded.status,
-              created_at=excluded.created_at
-            """,
-            (video_id, date, summary_json, status, datetime.utcnow().isoformat()),
+        self.upsert_video_summaries([(video_id, date, summary_json, status)])
+
+    @_write
+    def upsert_video_summaries(self, rows: list[tuple[str, str, str, str]]) -> None:
+        now = datetime.utcnow().isoformat()
+        with self.conn:
+            self.conn.executemany(UPSERT_VIDEO_SUMMARY_SQL, [(*row, now) for row in rows])
+            self._replace_entities(rows)
+
+    def _replace_entities(self, rows: list[tuple[str, str, str, str]]) -> None:
+        keys = [(video_id, date) for video_id, date, _, _ in rows]
+        inserts: dict[str, list[tuple]] = {table: [] for table in ENTITY_TABLES}
+        for video_id, date, summary_json, status in rows:
+            if status != "success":
+                continue
+            for table, entity_rows in summary_entities(video_id, date, summary_json).items():
+                inserts[table].extend(entity_rows)
+        for table in ENTITY_TABLES:
+            self.conn.executemany(f"DELETE FROM {table} WHERE video_id = ? AND date = ?", keys)
+            self.conn.executemany(ENTITY_INSERT_SQL[table], inserts[table])
+
+    @_write
+    def rebuild_entities(self) -> int:
+        rows = self.conn.execute(
+            "SELECT video_id, date, summary_json, status FROM video_summaries WHERE status = 'success'"
+        ).fetchall()
+        with self.conn:
+            for table in ENTITY_TABLES:
+                self.conn.execute(f"DELETE FROM {table}")
+            self._replace_entities([tuple(r) for r in rows])
+        return len(rows)
+
+    @_locked
+    def ticker_mentions_by_date(self, ticker: str, start: str, end: str) -> list[sqlite3.Row]:
+        cur = self.conn.execute(
+            "SELECT date, COUNT(*) AS mentions, COUNT(DISTINCT video_id) AS videos FROM ticker_mentions "
+            "WHERE ticker = ? AND date BETWEEN ? AND ? GROUP BY date ORDER BY date",
+            (ticker.strip().upper(), start, end),
         )
-        self.conn.commit()
+        return cur.fetchall()
+
+    @_locked
+    def sector_moves_by_date(self, name: str, start: str, end: str, direction: str | None = None) -> list[sqlite3.Row]:
+        cur = self.conn.execute(
+            "SELECT date, direction, COUNT(*) AS mentions, COUNT(DISTINCT video_id) AS videos FROM sector_moves "
+            "WHERE name = ? AND date BETWEEN ? AND ? AND (? IS NULL OR direction = ?) "
+            "GROUP BY date, direction ORDER BY date, direction",
+            (name.strip(), start, end, direction, direction),
+        )
+        return cur.fetchall()
 
+    @_locked
+    def list_number_facts(self, metric: str, start: str, end: str) -> list[sqlite3.Row]:
+        cur = self.conn.execute(
+            "SELECT date, value, context, video_id FROM number_facts "
+            "WHERE metric = ? AND date BETWEEN ? AND ? ORDER BY date, video_id",
+            (metric.strip(), start, end),
+        )
+        return cur.fetchall()
+
+    @_locked
+    def search_key_events(self, text: str, start: str, end: str) -> list[sqlite3.Row]:
+        cur = self.conn.execute(
+            "SELECT date, event, why, video_id FROM key_events "
+            "WHERE date BETWEEN ? AND ? AND event LIKE '%' || ? || '%' ORDER BY date, video_id",
+            (start, end, text.strip()),
+        )
+        return cur.fetchall()
+
+    @_locked
     def list_successful_summaries(self, date: str) -> list[sqlite3.Row]:
         cur = self.conn.execute(
             "SELECT vs.*, v.title, v.url, v.channel FROM video_summaries vs "
             "JOIN videos v ON v.video_id = vs.video_id "
-            "WHERE vs.date = ? AND vs.status = 'success'",
+            "WHERE vs.date = ? AND vs.status = 'success' "
+            f"AND {NOT_DUPLICATE_SQL} "
+            "ORDER BY v.published_at, vs.video_id",
             (date,),
         )
         return cur.fetchall()
 
-    def upsert_daily_digest(self, date: str, digest_json: str, status: str, notion_page_id: str | None = None) -> None:
+    @_locked
+    def successful_video_ids(self, date: str) -> set[str]:
+        cur = self.conn.execute("SELECT video_id FROM video_summaries WHERE date = ? AND status = 'success'", (date,))
+        return {r["video_id"] for r in cur.fetchall()}
+
+    @_write
+    def replace_video_clusters(self, date: str, rows: list[tuple[str, str, str]]) -> None:
+        with self.conn:
+            self.conn.execute("DELETE FROM video_clusters WHERE date = ?", (date,))
+            self.conn.executemany(
+                "INSERT INTO video_clusters(video_id, date, representative_id, simhash) VALUES (?, ?, ?, ?)",
+                [(video_id, date, rep, simhash) for video_id, rep, simhash in rows],
+            )
+
+    @_write
+    def add_video_clusters(self, date: str, rows: list[tuple[str, str, str]]) -> None:
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO video_clusters(video_id, date, representative_id, simhash) VALUES (?, ?, ?, ?)",
+                [(video_id, date, rep, simhash) for video_id, rep, simhash in rows],
+            )
+
+    @_locked
+    def list_video_clusters(self, date: str) -> list[sqlite3.Row]:
+        cur = self.conn.execute(
+            "SELECT c.*, v.title, v.channel, v.duration_seconds FROM video_clusters c "
+            "JOIN videos v ON v.video_id = c.video_id "
+            "WHERE c.date = ? ORDER BY c.representative_id, c.video_id != c.representative_id, c.video_id",
+            (date,),
+        )
+        return cur.fetchall()
+
+    @_locked
+    def summary_for_video(self, video_id: str, date: str) -> sqlite3.Row | None:
+        # Near-duplicates have no summary of their own; follow the link to their representative.
+        cur = self.conn.execute(
+            "SELECT * FROM video_summaries WHERE date = ? AND video_id = "
+            "COALESCE((SELECT representative_id FROM video_clusters WHERE video_id = ? AND date = ?), ?)",
+            (date, video_id, date, video_id),
+        )
+        return cur.fetchone()
+
+    @_write
+    def upsert_daily_digest(
+        self, date: str, digest_json: str, status: str, notion_page_id: str | None = None, input_hash: str | None = None
+    ) -> None:
         self.conn.execute(
             """
-            INSERT INTO daily_digests(date, digest_json, status, created_at, notion_page_id)
-            VALUES (?, ?, ?, ?, ?)
+            INSERT INTO daily_digests(date, digest_json, status, created_at, notion_page_id, input_hash)
+            VALUES (?, ?, ?, ?, ?, ?)
             ON CONFLICT(date) DO UPDATE SET
               digest_json=excluded.digest_json,
               status=excluded.status,
               created_at=excluded.created_at,
-              notion_page_id=COALESCE(excluded.notion_page_id, daily_digests.notion_page_id)
+              notion_page_id=COALESCE(excluded.notion_page_id, daily_digests.notion_page_id),
+              input_hash=excluded.input_hash
             """,
-            (date, digest_json, status, datetime.utcnow().isoformat(), notion_page_id),
+            (date, digest_json, status, datetime.utcnow().isoformat(), notion_page_id, input_hash),
         )
         self.conn.commit()
 
+    @_locked
     def get_daily_digest(self, date: str) -> sqlite3.Row | None:
         cur = self.conn.execute("SELECT * FROM daily_digests WHERE date = ?", (date,))
         return cur.fetchone()
 
-    def set_notion_page_id(self, date: str, page_id: str) -> None:
-        self.conn.execute("UPDATE daily_digests SET notion_page_id = ? WHERE date = ?", (page_id, date))
+    @_write
+    def set_notion_page_id(self, date: str, page_id: str, published_hash: str | None = None) -> None:
+        self.conn.execute(
+            "UPDATE daily_digests SET notion_page_id = ?, published_hash = ? WHERE date = ?", (page_id, published_hash, date)
+        )
+        self.conn.commit()
+
+    @_locked
+    def list_successful_digests(self, start: str, end: str) -> list[sqlite3.Row]:
+        cur = self.conn.execute(
+            "SELECT date, digest_json, input_hash FROM daily_digests WHERE date BETWEEN ? AND ? AND status = 'success' ORDER BY date",
+            (start, end),
+        )
+        return cur.fetchall()
+
+    @_locked
+    def count_successful_summaries(self, start: str, end: str) -> int:
+        cur = self.conn.execute(
+            "SELECT COUNT(*) FROM video_summaries WHERE date BETWEEN ? AND ? AND status = 'success'", (start, end)
+        )
+        return cur.fetchone()[0]
+
+    @_write
+    def upsert_rollup(self, start: str, end: str, kind: str, period: str, digest_json: str, input_hash: str) -> None:
+        self.conn.execute(
+            """
+            INSERT INTO rollups(start, end, kind, period, digest_json, status, input_hash, created_at)
+            VALUES (?, ?, ?, ?, ?, 'success', ?, ?)
+            ON CONFLICT(start, end) DO UPDATE SET
+              kind=excluded.kind,
+              period=excluded.period,
+              digest_json=excluded.digest_json,
+              status=excluded.status,
+              input_hash=excluded.input_hash,
+              created_at=excluded.created_at
+            """,
+            (start, end, kind, period, digest_json, input_hash, datetime.utcnow().isoformat()),
+        )
+        self.conn.commit()
+
+    @_locked
+    def get_rollup(self, start: str, end: str) -> sqlite3.Row | None:
+        cur = self.conn.execute("SELECT * FROM rollups WHERE start = ? AND end = ?", (start, end))
+        return cur.fetchone()
+
+    @_write
+    def set_rollup_page_id(self, start: str, end: str, page_id: str, published_hash: str) -> None:
+        self.conn.execute(
+            "UPDATE rollups SET notion_page_id = ?, published_hash = ? WHERE start = ? AND end = ?",
+            (page_id, published_hash, start, end),
+        )
         self.conn.commit()
 
+    @_locked
+    def list_finished_dates(self, start: str, end: str) -> set[str]:
+        cur = self.conn.execute(
+            "SELECT date FROM daily_digests WHERE date BETWEEN ? AND ? AND status = 'success' AND notion_page_id IS NOT NULL",
+            (start, end),
+        )
+        return {r["date"] for r in cur.fetchall()}
+
+    @_write
+    def save_run_metrics(self, metrics: RunMetrics, status: str) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO runs(run_id, command, date, started_at, finished_at, status) VALUES (?, ?, ?, ?, ?, ?)",
+                (metrics.run_id, metrics.command, metrics.date, metrics.started_at, datetime.utcnow().isoformat(), status),
+            )
+            self.conn.executemany(
+                "INSERT INTO run_stages(run_id, date, stage, started_at, duration_ms) VALUES (?, ?, ?, ?, ?)",
+                [(metrics.run_id, *stage) for stage in metrics.stages],
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO api_calls(run_id, api, calls, errors, retries, throttled, total_ms, histogram) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (metrics.run_id, api, a.calls, a.errors, a.retries, a.throttled, a.total_ms, json.dumps(a.histogram))
+                    for api, a in metrics.api.items()
+                ],
+            )
+            self.conn.executemany(
+                "INSERT INTO token_usage(run_id, kind, ref, prompt_tokens, output_tokens, total_tokens) VALUES (?, ?, ?, ?, ?, ?)",
+                [(metrics.run_id, *row) for row in metrics.tokens],
+            )
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO json_repairs(run_id, kind, outcome, count) VALUES (?, ?, ?, ?)",
+                [(metrics.run_id, kind, outcome, count) for (kind, outcome), count in metrics.repairs.items()],
+            )
+
+    @_locked
+    def list_stage_durations(self, start: str, end: str) -> list[sqlite3.Row]:
+        cur = self.conn.execute(
+            "SELECT s.stage, s.duration_ms FROM run_stages s JOIN runs r ON r.run_id = s.run_id "
+            "WHERE r.started_at >= ? AND r.started_at < ?",
+            (start, _day_after(end)),
+        )
+        return cur.fetchall()
+
+    @_locked
+    def list_api_calls(self, start: str, end: str) -> list[sqlite3.Row]:
+        cur = self.conn.execute(
+            "SELECT a.* FROM api_calls a JOIN runs r ON r.run_id = a.run_id WHERE r.started_at >= ? AND r.started_at < ?",
+            (start, _day_after(end)),
+        )
+        return cur.fetchall()
+
+    @_locked
+    def token_usage_by_day(self, start: str, end: str) -> list[sqlite3.Row]:
+        cur = self.conn.execute(
+            "SELECT substr(r.started_at, 1, 10) AS day, t.kind, SUM(t.prompt_tokens) AS prompt_tokens, "
+            "SUM(t.output_tokens) AS output_tokens, SUM(t.total_tokens) AS total_tokens, COUNT(DISTINCT t.ref) AS refs "
+            "FROM token_usage t JOIN runs r ON r.run_id = t.run_id "
+            "WHERE r.started_at >= ? AND r.started_at < ? GROUP BY day, t.kind ORDER BY day, t.kind",
+            (start, _day_after(end)),
+        )
+        return cur.fetchall()
+
+    @_locked
+    def json_repairs_by_kind(self, start: str, end: str) -> list[sqlite3.Row]:
+        cur = self.conn.execute(
+            "SELECT j.kind, j.outcome, SUM(j.count) AS count FROM json_repairs j JOIN runs r ON r.run_id = j.run_id "
+            "WHERE r.started_at >= ? AND r.started_at < ? GROUP BY j.kind, j.outcome",
+            (start, _day_after(end)),
+        )
+        return cur.fetchall()
+
+    @_locked
+    def average_tokens(self, kind: str, recent: int = 200) -> float | None:
+        cur = self.conn.execute(
+            "SELECT AVG(total_tokens) AS tokens FROM "
+            "(SELECT total_tokens FROM token_usage WHERE kind = ? ORDER BY rowid DESC LIMIT ?)",
+            (kind, recent),
+        )
+        return cur.fetchone()["tokens"]
+
+    @_write
+    def add_api_usage(
+        self, day: str, api: str, calls: int = 0, units: int = 0, prompt_tokens: int = 0, output_tokens: int = 0
+    ) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO api_usage(day, api, calls, units, prompt_tokens, output_tokens, updated_at) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(day, api) DO UPDATE SET calls = calls + excluded.calls, units = units + excluded.units, "
+                "prompt_tokens = prompt_tokens + excluded.prompt_tokens, "
+                "output_tokens = output_tokens + excluded.output_tokens, updated_at = excluded.updated_at",
+                (day, api, calls, units, prompt_tokens, output_tokens, datetime.utcnow().isoformat()),
+            )
+
+    @_write
+    def mark_api_exhausted(self, day: str, api: str) -> None:
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO api_usage(day, api, exhausted, updated_at) VALUES (?, ?, 1, ?) "
+                "ON CONFLICT(day, api) DO UPDATE SET exhausted = 1, updated_at = excluded.updated_at",
+                (day, api, datetime.utcnow().isoformat()),
+            )
+
+    @_locked
+    def get_api_usage(self, day: str, api: str) -> sqlite3.Row | None:
+        cur = self.conn.execute("SELECT * FROM api_usage WHERE day = ? AND api = ?", (day, api))
+        return cur.fetchone()
+
+    @_locked
+    def list_api_usage(self, start: str, end: str) -> list[sqlite3.Row]:
+        cur = self.conn.execute("SELECT * FROM api_usage WHERE day BETWEEN ? AND ? ORDER BY day, api", (start, end))
+        return cur.fetchall()
+
+    @_locked
+    def get_watermark(self, date: str, source: str) -> str | None:
+        row = self.conn.execute("SELECT value FROM watermarks WHERE date = ? AND source = ?", (date, source)).fetchone()
+        return row["value"] if row else None
+
+    @_write
+    def advance_watermark(self, date: str, source: str, value: str) -> None:
+        # Never moves backwards, so an overlapping or out-of-order poll cannot re-open old ground.
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO watermarks(date, source, value, updated_at) VALUES (?, ?, ?, ?) "
+                "ON CONFLICT(date, source) DO UPDATE SET value = MAX(value, excluded.value), updated_at = excluded.updated_at",
+                (date, source, value, datetime.utcnow().isoformat()),
+            )
+
+    def iter_export_rows(self, start: str, end: str, since: str | None = None) -> Iterator[sqlite3.Row]:
+        # Streams from its own connection instead of fetchall() on the shared one: the cursor holds
+        # one WAL snapshot and pulls rows one at a time, so memory stays flat and writers are not
+        # blocked. Walking idx_video_summaries_date_status keeps SQLite from sorting the range.
+        conn = sqlite3.connect(self.db_path)
+        conn.row_factory = sqlite3.Row
+        try:
+            yield from conn.execute(
+                "SELECT vs.video_id, vs.date, vs.status, vs.attempts, vs.created_at, v.title, v.channel, v.url, "
+                "v.published_at, v.duration_seconds, v.view_count, c.representative_id, vs.summary_json "
+                "FROM video_summaries vs "
+                "LEFT JOIN videos v ON v.video_id = vs.video_id "
+                "LEFT JOIN video_clusters c ON c.video_id = vs.video_id AND c.date = vs.date "
+                "WHERE vs.date BETWEEN ? AND ? AND (? IS NULL OR vs.created_at > ?) ORDER BY vs.date",
+                (start, end, since, since),
+            )
+        finally:
+            conn.close()
+
+    @_locked
+    def get_export_state(self, target: str) -> sqlite3.Row | None:
+        return self.conn.execute("SELECT * FROM exports WHERE target = ?", (target,)).fetchone()
+
+    @_write
+    def set_export_state(
+        self, target: str, fmt: str, flatten: bool, last_created_at: str | None, rows: int, appended: bool
+    ) -> None:
+        # A full export starts the target over; an appended one moves it forward.
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO exports(target, format, flatten, last_created_at, rows, updated_at) VALUES (?, ?, ?, ?, ?, ?) "
+                "ON CONFLICT(target) DO UPDATE SET format = excluded.format, flatten = excluded.flatten, "
+                "last_created_at = CASE WHEN ? THEN COALESCE(excluded.last_created_at, exports.last_created_at) "
+                "ELSE excluded.last_created_at END, "
+                "rows = CASE WHEN ? THEN exports.rows + excluded.rows ELSE excluded.rows END, updated_at = excluded.updated_at",
+                (target, fmt, int(flatten), last_created_at, rows, datetime.utcnow().isoformat(), appended, appended),
+            )
+
+    @_locked
+    def summary_outcomes_by_date(self, start: str, end: str) -> list[sqlite3.Row]:
+        cur = self.conn.execute(
+            "SELECT date, SUM(status = 'success') AS success, SUM(status != 'success') AS failed "
+            "FROM video_summaries WHERE date BETWEEN ? AND ? GROUP BY date ORDER BY date",
+            (start, end),
+        )
+        return cur.fetchall()
+
+    @_locked
     def close(self) -> None:
         self.conn.close()
@@ -0,0 +1,103 @@
+from __future__ import annotations
+
+import json
+import os
+import threading
+import time
+from pathlib import Path
+from typing import Any
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def __enter__(self) -> dict[str, Any]:
+        return {}
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        return None
+
+
+_NULL_SPAN = _NullSpan()
+
+
+class NullTracer:
+    # Default on every client and Storage: span() hands back one shared no-op context manager,
+    # so untraced runs pay a method call per span and nothing else.
+    enabled = False
+
+    def span(self, name: str, cat: str, **args: Any) -> _NullSpan:
+        return _NULL_SPAN
+
+    def save(self) -> None:
+        return None
+
+
+NULL_TRACER = NullTracer()
+
+
+class _Span:
+    __slots__ = ("tracer", "name", "cat", "args", "began")
+
+    def __init__(self, tracer: Tracer, name: str, cat: str, args: dict[str, Any]):
+        self.tracer = tracer
+        self.name = name
+        self.cat = cat
+        self.args = args
+
+    def __enter__(self) -> dict[str, Any]:
+        self.began = time.perf_counter_ns()
+        return self.args
+
+    def __exit__(self, exc_type, exc, tb) -> None:
+        ended = time.perf_counter_ns()
+        if exc_type is not None:
+            self.args["error"] = exc_type.__name__
+        self.tracer._complete(self.name, self.cat, self.began, ended, self.args)
+
+
+class Tracer:
+    # Chrome Trace Event format ("X" complete events, microsecond timestamps), which
+    # chrome://tracing and ui.perfetto.dev open directly. One track per thread.
+    enabled = True
+
+    def __init__(self, path: str):
+        self.path = Path(path)
+        self.pid = os.getpid()
+        self.origin = time.perf_counter_ns()
+        self.events: list[dict[str, Any]] = []
+        self.threads: dict[int, str] = {}
+        self._lock = threading.Lock()
+
+    def span(self, name: str, cat: str, **args: Any) -> _Span:
+        return _Span(self, name, cat, args)
+
+    def _complete(self, name: str, cat: str, began: int, ended: int, args: dict[str, Any]) -> None:
+        thread = threading.current_thread()
+        event = {
+            "name": name,
+            "cat": cat,
+            "ph": "X",
+            "ts": (began - self.origin) / 1000,
+            "dur": (ended - began) / 1000,
+            "pid": self.pid,
+            "tid": thread.ident,
+            "args": args,
+        }
+        with self._lock:
+            self.events.append(event)
+            self.threads.setdefault(thread.ident, thread.name)
+
+    def trace_events(self) -> list[dict[str, Any]]:
+        with self._lock:
+            events = sorted(self.events, key=lambda e: e["ts"])
+            threads = dict(self.threads)
+        names = [
+            {"name": "thread_name", "ph": "M", "pid": self.pid, "tid": tid, "args": {"name": name}}
+            for tid, name in threads.items()
+        ]
+        return [{"name": "process_name", "ph": "M", "pid": self.pid, "args": {"name": "ytbrief"}}, *names, *events]
+
+    def save(self) -> None:
+        payload = {"traceEvents": self.trace_events(), "displayTimeUnit": "ms"}
+        self.path.write_text(json.dumps(payload, ensure_ascii=False, default=str), encoding="utf-8")
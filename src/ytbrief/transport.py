@@ -0,0 +1,287 @@
+from __future__ import annotations
+
+import logging
+import random
+import threading
+import time
+from dataclasses import dataclass
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import TYPE_CHECKING, Any
+from urllib.parse import urlsplit
+
+from .tracing import NULL_TRACER
+
+if TYPE_CHECKING:
+    from .budget import Budget
+    from .metrics import RunMetrics
+
+log = logging.getLogger(__name__)
+
+
+class CircuitOpenError(RuntimeError):
+    pass
+
+
+class BudgetExceededError(RuntimeError):
+    pass
+
+
+# YouTube reports a spent daily quota as 403 with one of these reasons.
+DAILY_QUOTA_REASONS = frozenset({"quotaExceeded", "dailyLimitExceeded"})
+
+
+@dataclass
+class TransportPolicy:
+    rate: float  # sustained requests per second
+    burst: int = 1
+    max_retries: int = 3
+    max_concurrency: int = 4
+    min_concurrency: int = 1
+    failure_threshold: int = 5
+    cooldown: float = 60.0
+    max_backoff: float = 60.0
+    retry_statuses: tuple[int, ...] = (429, 500, 502, 503, 504)
+
+
+DEFAULT_POLICIES: dict[str, TransportPolicy] = {
+    "youtube": TransportPolicy(rate=5.0, burst=5, max_retries=3, max_concurrency=4),
+    # Free-tier Gemini quotas are counted per minute; keep well under them by default.
+    "gemini": TransportPolicy(rate=1.0, burst=2, max_retries=3, max_concurrency=4),
+    # Notion documents an average of 3 requests per second per integration.
+    "notion": TransportPolicy(rate=3.0, burst=3, max_retries=4, max_concurrency=3),
+}
+
+
+class TokenBucket:
+    def __init__(self, rate: float, capacity: int):
+        self.rate = rate
+        self.capacity = max(1, capacity)
+        self._tokens = float(self.capacity)
+        self._updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self) -> float:
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return waited
+                delay = (1 - self._tokens) / self.rate
+            time.sleep(delay)
+            waited += delay
+
+
+class AIMDLimiter:
+    def __init__(self, initial: int, minimum: int, maximum: int):
+        self.minimum = max(1, minimum)
+        self.maximum = max(self.minimum, maximum)
+        self.limit = float(min(max(initial, self.minimum), self.maximum))
+        self.in_flight = 0
+        self._cond = threading.Condition()
+
+    def acquire(self) -> None:
+        with self._cond:
+            while self.in_flight >= int(self.limit):
+                self._cond.wait()
+            self.in_flight += 1
+
+    def release(self, throttled: bool = False) -> None:
+        with self._cond:
+            self.in_flight -= 1
+            if throttled:
+                self.limit = max(self.minimum, self.limit / 2)
+            else:
+                self.limit = min(self.maximum, self.limit + 1 / self.limit)
+            self._cond.notify_all()
+
+
+class CircuitBreaker:
+    def __init__(self, threshold: int, cooldown: float):
+        self.threshold = threshold
+        self.cooldown = cooldown
+        self.failures = 0
+        self.opened_at: float | None = None
+        self._lock = threading.Lock()
+
+    @property
+    def is_open(self) -> bool:
+        with self._lock:
+            return self.opened_at is not None and time.monotonic() - self.opened_at < self.cooldown
+
+    def record_success(self) -> None:
+        with self._lock:
+            self.failures = 0
+            self.opened_at = None
+
+    def record_failure(self) -> None:
+        with self._lock:
+            self.failures += 1
+            if self.failures >= self.threshold:
+                self.opened_at = time.monotonic()
+
+
+def retry_after_seconds(resp: Any) -> float | None:
+    headers = getattr(resp, "headers", None) or {}
+    value = headers.get("Retry-After")
+    if not value:
+        return None
+    try:
+        return max(0.0, float(value))
+    except ValueError:
+        pass
+    try:
+        when = parsedate_to_datetime(value)
+    except (TypeError, ValueError):
+        return None
+    if when.tzinfo is None:
+        when = when.replace(tzinfo=timezone.utc)
+    return max(0.0, (when - datetime.now(timezone.utc)).total_seconds())
+
+
+def _dicts(items: Any) -> list[dict]:
+    return [item for item in items if isinstance(item, dict)] if isinstance(items, list) else []
+
+
+def daily_quota_exhausted(resp: Any) -> bool:
+    # Per-minute throttling is worth retrying; a spent daily quota is not until it resets.
+    if resp.status_code not in (403, 429):
+        return False
+    try:
+        body = resp.json()
+    except (AttributeError, ValueError):
+        return False
+    # Error bodies are not always Google's shape (e.g. {"error": "..."} from a proxy); ignore what is not.
+    error = body.get("error") if isinstance(body, dict) else None
+    if not isinstance(error, dict):
+        return False
+    reasons = {e.get("reason") for e in _dicts(error.get("errors"))}
+    if DAILY_QUOTA_REASONS & reasons:
+        return True
+    # Gemini: 429 RESOURCE_EXHAUSTED with a QuotaFailure naming a per-day quota.
+    return any(
+        "PerDay" in str(violation.get("quotaId", ""))
+        for detail in _dicts(error.get("details"))
+        for violation in _dicts(detail.get("violations"))
+    )
+
+
+class Transport:
+    def __init__(self, name: str, session: Any, policy: TransportPolicy | None = None):
+        self.name = name
+        self.session = session
+        self.policy = policy or DEFAULT_POLICIES[name]
+        self.bucket = TokenBucket(self.policy.rate, self.policy.burst)
+        self.limiter = AIMDLimiter(self.policy.max_concurrency, self.policy.min_concurrency, self.policy.max_concurrency)
+        self.breaker = CircuitBreaker(self.policy.failure_threshold, self.policy.cooldown)
+        self.metrics: RunMetrics | None = None
+        self.budget: Budget | None = None
+        self.tracer = NULL_TRACER
+        self._lock = threading.Lock()
+        self.counters: dict[str, float] = {
+            "requests": 0,
+            "retries": 0,
+            "throttled": 0,
+            "server_errors": 0,
+            "connection_errors": 0,
+            "circuit_rejections": 0,
+            "quota_exhausted": 0,
+            "rate_limit_wait_s": 0.0,
+            "backoff_s": 0.0,
+        }
+
+    def _count(self, key: str, amount: float = 1) -> None:
+        with self._lock:
+            self.counters[key] += amount
+
+    def stats(self) -> dict[str, float]:
+        with self._lock:
+            snapshot = dict(self.counters)
+        snapshot["concurrency_limit"] = round(self.limiter.limit, 2)
+        snapshot["circuit_open"] = self.breaker.is_open
+        return snapshot
+
+    def _observe(self, began: float, status: int | None, attempt: int) -> None:
+        if self.metrics is not None:
+            self.metrics.record_call(self.name, (time.perf_counter() - began) * 1000, status, attempt)
+
+    def _backoff(self, attempt: int, resp: Any = None) -> None:
+        delay = retry_after_seconds(resp) if resp is not None else None
+        if delay is None:
+            delay = (2**attempt) + random.uniform(0.5, 1.5)
+        delay = min(delay, self.policy.max_backoff)
+        self._count("backoff_s", delay)
+        with self.tracer.span(f"{self.name} backoff", "http", attempt=attempt, delay_s=round(delay, 3)):
+            time.sleep(delay)
+
+    def request(self, method: str, url: str, *, headers: dict | None = None, params: dict | None = None, json: Any = None, timeout: float = 30, cost: int = 1) -> Any:
+        kwargs: dict[str, Any] = {"timeout": timeout}
+        if headers is not None:
+            kwargs["headers"] = headers
+        if params is not None:
+            kwargs["params"] = params
+        if json is not None:
+            kwargs["json"] = json
+        last_attempt = self.policy.max_retries - 1
+        endpoint = urlsplit(url).path
+        for attempt in range(self.policy.max_retries):
+            if self.breaker.is_open:
+                self._count("circuit_rejections")
+                raise CircuitOpenError(f"{self.name} API circuit is open after repeated failures")
+            if self.budget is not None:
+                self.budget.spend(self.name, cost)
+            if attempt:
+                self._count("retries")
+            # The span includes rate-limit and concurrency waits; queued_ms says how much of it that was.
+            name = f"{self.name} {method} {endpoint}"
+            with self.tracer.span(name, "http", method=method, endpoint=endpoint, attempt=attempt) as span:
+                queued = time.perf_counter()
+                self._count("rate_limit_wait_s", self.bucket.acquire())
+                self.limiter.acquire()
+                self._count("requests")
+                throttled = False
+                began = time.perf_counter()
+                span["queued_ms"] = round((began - queued) * 1000, 3)
+                try:
+                    resp = self.session.request(method, url, **kwargs)
+                    throttled = resp.status_code == 429
+                    span["status"] = resp.status_code
+                    self._observe(began, resp.status_code, attempt)
+                except OSError:
+                    self._observe(began, None, attempt)
+                    self._count("connection_errors")
+                    self.breaker.record_failure()
+                    if attempt == last_attempt:
+                        raise
+                    resp = None
+                finally:
+                    self.limiter.release(throttled)
+            if resp is None:
+                self._backoff(attempt)
+                continue
+            if resp.status_code < 400:
+                self.breaker.record_success()
+                return resp
+            if daily_quota_exhausted(resp):
+                self._count("quota_exhausted")
+                if self.budget is not None:
+                    self.budget.exhaust(self.name)
+                raise BudgetExceededError(f"{self.name} API daily quota exhausted (HTTP {resp.status_code})")
+            if resp.status_code not in self.policy.retry_statuses:
+                self.breaker.record_success()
+                break
+            if throttled:
+                self._count("throttled")
+            else:
+                self._count("server_errors")
+                self.breaker.record_failure()
+            if attempt == last_attempt:
+                break
+            self._backoff(attempt, resp)
+        log.debug("%s %s %s failed with HTTP %s", self.name, method, url, resp.status_code)
+        resp.raise_for_status()
+        return resp
@@ -1,8 +1,12 @@
 from __future__ import annotations
 
-import random
-import time
+import logging
+import re
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from dataclasses import dataclass
 from datetime import datetime, timedelta
+from typing import Iterator
 from zoneinfo import ZoneInfo
 
 try:
@@ -10,6 +14,10 @@ try:
 except ModuleNotFoundError:  # pragma: no cover
     from . import requests_compat as requests
 
+from .transport import Transport
+
+log = logging.getLogger(__name__)
+
 KOREAN_KEYWORDS = [
     "모닝브리핑",
     "장전 시황",
@@ -20,29 +28,135 @@ KOREAN_KEYWORDS = [
     "시장 브리핑",
 ]
 
+SEARCH_QUOTA_UNITS = 100
+VIDEOS_QUOTA_UNITS = 1
+RRF_K = 60
+
+_DURATION_RE = re.compile(r"P(?:(\d+)D)?(?:T(?:(\d+)H)?(?:(\d+)M)?(?:(\d+)S)?)?$")
+
+
+def parse_duration(value: str | None) -> int | None:
+    match = _DURATION_RE.match(value or "")
+    if not match:
+        return None
+    days, hours, minutes, seconds = (int(g or 0) for g in match.groups())
+    return ((days * 24 + hours) * 60 + minutes) * 60 + seconds
+
+
+@dataclass
+class VideoFilter:
+    min_duration: int | None = 61  # YouTube Shorts are 60 s or less
+    max_duration: int | None = 90 * 60
+    min_views: int | None = None
+    allow_live: bool = False
+
+    def reject_reason(self, row: dict) -> str | None:
+        live = row.get("live_broadcast_content")
+        if not self.allow_live and live in ("live", "upcoming"):
+            return live
+        duration = row.get("duration_seconds")
+        if duration is not None:
+            if self.min_duration is not None and duration < self.min_duration:
+                return "too_short"
+            if self.max_duration is not None and duration > self.max_duration:
+                return "too_long"
+        views = row.get("view_count")
+        if self.min_views is not None and views is not None and views < self.min_views:
+            return "too_few_views"
+        return None
+
 
 class YouTubeClient:
     BASE_URL = "https://www.googleapis.com/youtube/v3/search"
+    VIDEOS_URL = "https://www.googleapis.com/youtube/v3/videos"
+    FANOUT_WORKERS = 4
 
-    def __init__(self, api_key: str, session: requests.Session | None = None):
+    def __init__(self, api_key: str, session: requests.Session | None = None, transport: Transport | None = None):
         self.api_key = api_key
         self.session = session or requests.Session()
+        self.transport = transport or Transport("youtube", self.session)
+        self.quota_units = 0
+        self._quota_lock = threading.Lock()
 
     @staticmethod
-    def seoul_date_window(date_str: str) -> tuple[str, str]:
+    def seoul_date_window(date_str: str, published_after: str | None = None) -> tuple[str, str]:
         seoul = ZoneInfo("Asia/Seoul")
         start = datetime.fromisoformat(date_str).replace(tzinfo=seoul)
         end = start + timedelta(days=1)
+        if published_after:
+            # Incremental polls only ask for what was uploaded since the last watermark.
+            start = max(start, datetime.fromisoformat(published_after.replace("Z", "+00:00")))
         return start.isoformat(), end.isoformat()
 
-    def search_morning_briefs(self, date_str: str, limit: int = 20) -> list[dict]:
-        published_after, published_before = self.seoul_date_window(date_str)
+    def search_morning_briefs(
+        self, date_str: str, limit: int = 20, fanout: bool = False, published_after: str | None = None
+    ) -> list[dict]:
+        window = self.seoul_date_window(date_str, published_after)
+        queries = list(KOREAN_KEYWORDS) if fanout else [" OR ".join(KOREAN_KEYWORDS)]
+        units_before = self.quota_units
+        if len(queries) == 1:
+            ranked_lists = [self._search_query(queries[0], window, limit)]
+        else:
+            with ThreadPoolExecutor(max_workers=min(len(queries), self.FANOUT_WORKERS)) as pool:
+                ranked_lists = list(pool.map(lambda q: self._search_query(q, window, limit), queries))
+        items = self._merge_ranked(ranked_lists, limit)
+        log.info(
+            "youtube search strategy=%s queries=%d results=%d quota_units=%d",
+            "fanout" if fanout else "combined",
+            len(queries),
+            len(items),
+            self.quota_units - units_before,
+        )
+        now = datetime.utcnow().isoformat()
+        return [self._to_row(item, date_str, now) for item in items]
+
+    def iter_morning_briefs(
+        self, date_str: str, limit: int = 20, fanout: bool = False, published_after: str | None = None
+    ) -> Iterator[list[dict]]:
+        if fanout:
+            # Fan-out results are only meaningful once merged and re-ranked.
+            yield self.search_morning_briefs(date_str, limit=limit, fanout=True, published_after=published_after)
+            return
+        window = self.seoul_date_window(date_str, published_after)
         query = " OR ".join(KOREAN_KEYWORDS)
+        for page in self._iter_search_pages(query, window, limit):
+            now = datetime.utcnow().isoformat()
+            yield [self._to_row(item, date_str, now) for item in page]
+
+    def enrich_videos(self, rows: list[dict]) -> list[dict]:
+        by_id = {r["video_id"]: r for r in rows}
+        ids = list(by_id)
+        for start in range(0, len(ids), 50):
+            params = {
+                "part": "snippet,contentDetails,statistics",
+                "id": ",".join(ids[start : start + 50]),
+                "maxResults": 50,
+                "key": self.api_key,
+            }
+            data = self._request_with_retries(self.VIDEOS_URL, params=params, cost=VIDEOS_QUOTA_UNITS).json()
+            self._spend(VIDEOS_QUOTA_UNITS)
+            for item in data.get("items", []):
+                row = by_id.get(item.get("id"))
+                if row is None:
+                    continue
+                views = item.get("statistics", {}).get("viewCount")
+                row["duration_seconds"] = parse_duration(item.get("contentDetails", {}).get("duration"))
+                row["view_count"] = int(views) if views is not None else None
+                row["live_broadcast_content"] = item.get("snippet", {}).get("liveBroadcastContent")
+        return rows
+
+    def _search_query(self, query: str, window: tuple[str, str], limit: int) -> list[dict]:
+        items: list[dict] = []
+        for page in self._iter_search_pages(query, window, limit):
+            items.extend(page)
+        return items
+
+    def _iter_search_pages(self, query: str, window: tuple[str, str], limit: int) -> Iterator[list[dict]]:
+        published_after, published_before = window
         params = {
             "part": "snippet",
             "q": query,
             "type": "video",
-            "maxResults": min(limit, 50),
             "order": "relevance",
             "videoCaption": "closedCaption",
             "publishedAfter": published_after,
@@ -51,34 +165,51 @@ class YouTubeClient:
             "regionCode": "KR",
             "relevanceLanguage": "ko",
         }
-        resp = self._request_with_retries(self.BASE_URL, params=params)
-        items = resp.json().get("items", [])
-        results = []
-        now = datetime.utcnow().isoformat()
-        for item in items[:limit]:
-            vid = item["id"]["videoId"]
-            snippet = item["snippet"]
-            results.append(
-                {
-                    "video_id": vid,
-                    "date": date_str,
-                    "title": snippet.get("title", ""),
-                    "channel": snippet.get("channelTitle", ""),
-                    "published_at": snippet.get("publishedAt", ""),
-                    "url": f"https://www.youtube.com/watch?v={vid}",
-                    "fetched_at": now,
-                }
-            )
-        return results
-
-    def _request_with_retries(self, url: str, params: dict, max_retries: int = 3) -> requests.Response:
-        for attempt in range(max_retries):
-            r = self.session.get(url, params=params, timeout=30)
-            if r.status_code < 400:
-                return r
-            if r.status_code in (429, 500, 502, 503, 504):
-                time.sleep((2**attempt) + random.uniform(0.5, 1.5))
-                continue
-            r.raise_for_status()
-        r.raise_for_status()
-        return r
+        remaining = limit
+        page_token = None
+        while remaining > 0:
+            params["maxResults"] = min(remaining, 50)
+            if page_token:
+                params["pageToken"] = page_token
+            data = self._request_with_retries(self.BASE_URL, params=params, cost=SEARCH_QUOTA_UNITS).json()
+            self._spend(SEARCH_QUOTA_UNITS)
+            page = data.get("items", [])[:remaining]
+            remaining -= len(page)
+            yield page
+            page_token = data.get("nextPageToken")
+            if not page_token or not page:
+                break
+
+    @staticmethod
+    def _merge_ranked(ranked_lists: list[list[dict]], limit: int) -> list[dict]:
+        # Reciprocal rank fusion: videos ranking well for several keywords float to the top.
+        scores: dict[str, float] = {}
+        first: dict[str, dict] = {}
+        for ranked in ranked_lists:
+            for rank, item in enumerate(ranked):
+                vid = item["id"]["videoId"]
+                scores[vid] = scores.get(vid, 0.0) + 1.0 / (RRF_K + rank + 1)
+                first.setdefault(vid, item)
+        order = sorted(first, key=lambda vid: -scores[vid])
+        return [first[vid] for vid in order[:limit]]
+
+    @staticmethod
+    def _to_row(item: dict, date_str: str, fetched_at: str) -> dict:
+        vid = item["id"]["videoId"]
+        snippet = item["snippet"]
+        return {
+            "video_id": vid,
+            "date": date_str,
+            "title": snippet.get("title", ""),
+            "channel": snippet.get("channelTitle", ""),
+            "published_at": snippet.get("publishedAt", ""),
+            "url": f"https://www.youtube.com/watch?v={vid}",
+            "fetched_at": fetched_at,
+        }
+
+    def _spend(self, units: int) -> None:
+        with self._quota_lock:
+            self.quota_units += units
+
+    def _request_with_retries(self, url: str, params: dict, cost: int = 1) -> requests.Response:
+        return self.transport.request("GET", url, params=params, timeout=30, cost=cost)
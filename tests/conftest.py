@@ -0,0 +1,141 @@
+import json
+from types import SimpleNamespace
+from typing import Callable, Iterable
+
+import pytest
+
+
+class FakeGemini:
+    # Test double for ytbrief.gemini_client.GeminiClient. Every client the pipeline creates during a
+    # test shares this one instance's state, which is fresh for each test.
+    def __init__(self):
+        self.calls: list[tuple] = []  # ("summarize", url), ("digest", date, n) or ("rollup", period, one_liners)
+        # Optional hooks: return the model's dict, or raise to fail the call.
+        self.summary: Callable[[str], dict] = lambda url: {"one_liner": url}
+        self.digest: Callable[[str, list[dict]], dict] = lambda date, per_video: {
+            "one_liner": date,
+            "consensus": [],
+            "sources": [p["source"] for p in per_video],
+        }
+        self.rollup: Callable[[str, list[dict]], dict] = lambda period, digests: {
+            "date": period,
+            "one_liner": period,
+            "sources": [s for d in digests for s in d["sources"]],
+        }
+
+    @property
+    def urls(self) -> list[str]:
+        return [call[1] for call in self.calls if call[0] == "summarize"]
+
+    def client(self, api_key, model, cache=None):
+        return _FakeGeminiClient(self, cache)
+
+
+class FakeYouTube:
+    # Test double for ytbrief.youtube_client.YouTubeClient. `pages(date, published_after)` yields the
+    # search result pages; searches stop once `limit` rows have been returned, like the real client.
+    def __init__(self):
+        self.clients = 0
+        self.searches: list[tuple[str, str | None]] = []  # (date, published_after)
+        self.pages: Callable[[str, str | None], Iterable[list[dict]]] = lambda date, published_after: []
+
+    def client(self, api_key):
+        self.clients += 1
+        return _FakeYouTubeClient(self)
+
+
+class FakeNotion:
+    # Test double for ytbrief.notion_client.NotionClient; pages are named after their date or period start.
+    def __init__(self):
+        self.upserts: list[tuple] = []  # ("daily", date, video_count, page_id) or ("rollup", title, video_count, page_id)
+
+    def client(self, token, database_id, notion_version):
+        return _FakeNotionClient(self)
+
+
+class _FakeGeminiClient:
+    def __init__(self, fake: FakeGemini, cache):
+        self.fake = fake
+        self.transport = SimpleNamespace(stats=dict)
+        self.cache = cache
+
+    def summarize_video(self, url):
+        self.fake.calls.append(("summarize", url))
+        body = self.fake.summary(url)
+        return SimpleNamespace(model_dump_json=lambda ensure_ascii=False: json.dumps(body, ensure_ascii=ensure_ascii))
+
+    def build_daily_digest(self, date, per_video):
+        self.fake.calls.append(("digest", date, len(per_video)))
+        digest = self.fake.digest(date, per_video)
+        return SimpleNamespace(model_dump=lambda: digest)
+
+    def build_rollup(self, period, digests):
+        self.fake.calls.append(("rollup", period, [d["one_liner"] for d in digests]))
+        rollup = self.fake.rollup(period, digests)
+        return SimpleNamespace(model_dump=lambda: rollup)
+
+
+class _FakeYouTubeClient:
+    def __init__(self, fake: FakeYouTube):
+        self.fake = fake
+        self.transport = SimpleNamespace(stats=dict)
+
+    def iter_morning_briefs(self, date, limit=20, fanout=False, published_after=None):
+        self.fake.searches.append((date, published_after))
+        for page in self.fake.pages(date, published_after):
+            page = page[:limit]
+            limit -= len(page)
+            yield page
+            if limit <= 0:
+                return
+
+    def search_morning_briefs(self, date, limit=20, fanout=False, published_after=None):
+        return [row for page in self.iter_morning_briefs(date, limit, fanout, published_after) for row in page]
+
+    def enrich_videos(self, rows):
+        return rows
+
+
+class _FakeNotionClient:
+    def __init__(self, fake: FakeNotion):
+        self.fake = fake
+        self.transport = SimpleNamespace(stats=dict)
+
+    def build_payload(self, date, digest, video_count):
+        return {"digest": digest, "video_count": video_count}
+
+    def upsert_daily_page(self, date, digest, video_count, page_id=None):
+        self.fake.upserts.append(("daily", date, video_count, page_id))
+        return page_id or f"page-{date}"
+
+    def build_rollup_payload(self, title, start, end, digest, video_count):
+        return {"title": title, "digest": digest, "video_count": video_count}
+
+    def upsert_rollup_page(self, title, start, end, digest, video_count, page_id=None):
+        self.fake.upserts.append(("rollup", title, video_count, page_id))
+        return page_id or f"page-{start}"
+
+
+@pytest.fixture
+def fake_gemini(monkeypatch):
+    fake = FakeGemini()
+    monkeypatch.setenv("GEMINI_API_KEY", "k")
+    monkeypatch.setattr("ytbrief.gemini_client.GeminiClient", fake.client)
+    return fake
+
+
+@pytest.fixture
+def fake_youtube(monkeypatch):
+    fake = FakeYouTube()
+    monkeypatch.setenv("YOUTUBE_API_KEY", "k")
+    monkeypatch.setattr("ytbrief.youtube_client.YouTubeClient", fake.client)
+    return fake
+
+
+@pytest.fixture
+def fake_notion(monkeypatch):
+    fake = FakeNotion()
+    monkeypatch.setenv("NOTION_TOKEN", "k")
+    monkeypatch.setenv("NOTION_DATABASE_ID", "db")
+    monkeypatch.setattr("ytbrief.notion_client.NotionClient", fake.client)
+    return fake
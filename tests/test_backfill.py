@@ -0,0 +1,40 @@
+from ytbrief import logic
+from ytbrief.storage import Storage
+
+
+def _pages(date, published_after):
+    if date == "2026-02-03":
+        raise RuntimeError("quota")
+    yield [
+        {
+            "video_id": f"{date}-v",
+            "date": date,
+            "title": "t",
+            "channel": "ch",
+            "published_at": f"{date}T01:00:00Z",
+            "url": f"https://youtube.com/watch?v={date}",
+            "fetched_at": "now",
+        }
+    ]
+
+
+def test_backfill_runs_dates_in_parallel_and_resumes(tmp_path, fake_youtube, fake_gemini, fake_notion):
+    fake_youtube.pages = _pages
+    db = str(tmp_path / "t.db")
+    store = Storage(db)
+    store.upsert_daily_digest("2026-02-01", "{}", "success", notion_page_id="old-page")
+    store.close()
+
+    statuses = logic.backfill(db, "2026-02-01", "2026-02-04", 5, "m", workers=3, use_cache=False)
+
+    assert [(s.date, s.status) for s in statuses] == [
+        ("2026-02-01", "skipped"),
+        ("2026-02-02", "done"),
+        ("2026-02-03", "failed"),
+        ("2026-02-04", "done"),
+    ]
+    assert statuses[1].result.notion_page_id == "page-2026-02-02"
+    assert fake_youtube.clients == 1
+
+    rerun = logic.backfill(db, "2026-02-01", "2026-02-04", 5, "m", workers=3, use_cache=False)
+    assert [s.status for s in rerun] == ["skipped", "skipped", "failed", "skipped"]
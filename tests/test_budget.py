@@ -0,0 +1,105 @@
+import json
+
+import pytest
+
+from ytbrief import logic
+from ytbrief.budget import Budget, BudgetLimits, plan_run, quota_day
+from ytbrief.storage import Storage
+from ytbrief.transport import BudgetExceededError, Transport, TransportPolicy
+
+
+class QuotaResponse:
+    status_code = 403
+    headers = {}
+
+    def json(self):
+        return {"error": {"code": 403, "errors": [{"reason": "quotaExceeded", "domain": "youtube.quota"}]}}
+
+    def raise_for_status(self):
+        raise RuntimeError(403)
+
+
+class CountingSession:
+    def __init__(self):
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        return QuotaResponse()
+
+
+def test_spent_quota_fails_fast_and_is_remembered(tmp_path):
+    store = Storage(str(tmp_path / "t.db"))
+    session = CountingSession()
+    transport = Transport("youtube", session, TransportPolicy(rate=1000, burst=10, max_retries=3))
+    transport.budget = Budget(store, BudgetLimits(youtube_units=10_000))
+
+    with pytest.raises(BudgetExceededError):
+        transport.request("GET", "https://example.test/search", cost=100)
+    assert session.calls == 1  # no retry ladder
+    assert store.get_api_usage(quota_day(), "youtube")["exhausted"] == 1
+
+    # A second client sharing the database refuses before touching the network.
+    other = Transport("youtube", session, TransportPolicy(rate=1000, burst=10))
+    other.budget = Budget(store, BudgetLimits(youtube_units=10_000))
+    with pytest.raises(BudgetExceededError):
+        other.request("GET", "https://example.test/search", cost=100)
+    assert session.calls == 1
+    store.close()
+
+
+def test_ledger_limits_and_reserve(tmp_path):
+    store = Storage(str(tmp_path / "t.db"))
+    budget = Budget(store, BudgetLimits(youtube_units=1000), reserve=0.2)
+    for _ in range(8):
+        budget.spend("youtube", 100)
+    with pytest.raises(BudgetExceededError):
+        budget.spend("youtube", 100)
+    # The morning run, without a reserve, still has the held-back units.
+    morning = Budget(store, BudgetLimits(youtube_units=1000))
+    assert morning.available()["youtube_units"] == 200
+    morning.record_tokens("gemini", {"promptTokenCount": 1200, "candidatesTokenCount": 300})
+    row = store.get_api_usage(quota_day(), "youtube")
+    assert (row["calls"], row["units"]) == (8, 800)
+    assert store.get_api_usage(quota_day(), "gemini")["prompt_tokens"] == 1200
+    store.close()
+
+
+def _video(vid, views):
+    return {
+        "video_id": vid,
+        "date": "2026-02-19",
+        "title": f"브리핑 {vid}",
+        "channel": f"ch-{vid}",
+        "published_at": f"2026-02-19T0{vid[-1]}:00:00Z",
+        "url": f"https://youtube.com/watch?v={vid}",
+        "fetched_at": "now",
+        "view_count": views,
+    }
+
+
+def test_planner_defers_fetch_and_caps_summaries(tmp_path):
+    store = Storage(str(tmp_path / "t.db"))
+    budget = Budget(store, BudgetLimits(youtube_units=150, gemini_requests=4))
+    plan = plan_run(store, budget, "2026-02-19", limit=20)
+    assert (plan.fetch, plan.youtube_units, plan.gemini_requests, plan.summarize_cap, plan.deferred) == (True, 101, 21, 3, 17)
+
+    budget.spend("youtube", 100)
+    with pytest.raises(BudgetExceededError):
+        plan_run(store, budget, "2026-02-19", limit=20)
+    store.upsert_videos([_video("v1", 10), _video("v2", 20)])
+    plan = plan_run(store, budget, "2026-02-19", limit=20)
+    assert (plan.fetch, plan.videos_to_summarize, plan.summarize_cap) == (False, 2, None)
+    store.close()
+
+
+def test_tight_gemini_budget_summarizes_most_watched_first(tmp_path, monkeypatch, fake_gemini):
+    monkeypatch.setenv("GEMINI_DAILY_REQUESTS", "3")
+    db = str(tmp_path / "t.db")
+    store = Storage(db)
+    store.upsert_videos([_video("v1", 10), _video("v2", 500), _video("v3", 40), _video("v4", 90)])
+
+    assert logic.summarize_videos(db, "2026-02-19", "m") == (2, 0)
+    assert fake_gemini.urls == ["https://youtube.com/watch?v=v2", "https://youtube.com/watch?v=v4"]
+    assert [r["video_id"] for r in store.list_pending_videos("2026-02-19")] == ["v1", "v3"]
+    store.close()
@@ -0,0 +1,86 @@
+import json
+
+from ytbrief import logic
+from ytbrief.dedup import Deduper, fingerprint_video, hamming, normalize_title, simhash
+from ytbrief.storage import Storage
+
+TITLE = "[모닝브리핑] 2월 19일 미국 증시 마감, 엔비디아 실적 앞두고 반도체 강세"
+SAME_STORY = (
+    "미국 증시 마감, 엔비디아 실적 앞두고 반도체 강세 #shorts",
+    "[재업로드] 2/19(목) 미국 증시 마감 엔비디아 실적 앞두고 반도체 강세",
+    "2026.02.19 모닝브리핑 | 미국증시 마감, 엔비디아 실적 앞두고 반도체 강세 (풀버전)",
+)
+OTHER_STORIES = (
+    "[모닝브리핑] 2월 19일 미국 증시 마감, 테슬라 급락에 기술주 약세",
+    "[장전시황] 2월 19일 코스피 2600선 회복, 외국인 순매수 전환",
+    "[모닝브리핑] 2월 19일 환율 1450원 돌파, 달러 강세 지속",
+)
+
+
+def _video(vid, title, channel="ch", duration=600, views=100):
+    return {
+        "video_id": vid,
+        "date": "2026-02-19",
+        "title": title,
+        "channel": channel,
+        "published_at": f"2026-02-19T0{vid[-1]}:00:00Z",
+        "url": f"https://youtube.com/watch?v={vid}",
+        "fetched_at": "now",
+        "duration_seconds": duration,
+        "view_count": views,
+    }
+
+
+def test_reuploads_are_near_duplicates_and_other_briefings_are_not():
+    base = simhash(normalize_title(TITLE))
+    assert all(hamming(base, simhash(normalize_title(t))) <= 6 for t in SAME_STORY)
+    assert all(hamming(base, simhash(normalize_title(t))) > 14 for t in OTHER_STORIES)
+
+    deduper = Deduper()
+    first = deduper.add(fingerprint_video(_video("v0", TITLE)))
+    # A reworded cut on another channel only joins the cluster if the lengths agree.
+    reworded = "엔비디아 실적 앞두고 반도체 강세, 미국 증시 마감"
+    assert deduper.add(fingerprint_video(_video("v1", reworded, channel="other", duration=3000))) == "v1"
+    assert deduper.add(fingerprint_video(_video("v2", SAME_STORY[1], channel="other"))) == first
+    assert deduper.add(fingerprint_video(_video("v3", "#shorts"))) == "v3"
+
+
+def test_installments_of_one_briefing_stay_apart():
+    part_one = fingerprint_video(_video("v0", f"{TITLE} 1부", duration=1500))
+    part_two = fingerprint_video(_video("v1", f"{TITLE} 2부", duration=2400))
+    assert hamming(part_one.simhash, part_two.simhash) <= 14  # close enough to cluster on the channel alone
+
+    deduper = Deduper()
+    assert deduper.add(part_one) == "v0"
+    assert deduper.add(part_two) == "v1"
+    assert deduper.add(fingerprint_video(_video("v2", f"{SAME_STORY[1]} 2부", channel="other", duration=2400))) == "v1"
+
+
+def test_only_representatives_are_summarized(tmp_path, fake_gemini):
+    db = str(tmp_path / "t.db")
+    store = Storage(db)
+    store.upsert_videos(
+        [
+            _video("v0", SAME_STORY[0], duration=55, views=5000),
+            _video("v1", TITLE, views=900),
+            _video("v2", SAME_STORY[1], channel="other", views=50),
+            _video("v3", OTHER_STORIES[1]),
+        ]
+    )
+
+    assert logic.summarize_videos(db, "2026-02-19", "m") == (2, 0)
+    # The full-length cut represents its cluster, not the more-watched #shorts clip.
+    assert sorted(fake_gemini.urls) == ["https://youtube.com/watch?v=v1", "https://youtube.com/watch?v=v3"]
+    clusters = {r["video_id"]: r["representative_id"] for r in store.list_video_clusters("2026-02-19")}
+    assert clusters == {"v0": "v1", "v1": "v1", "v2": "v1", "v3": "v3"}
+    assert [r["video_id"] for r in store.list_successful_summaries("2026-02-19")] == ["v1", "v3"]
+    assert json.loads(store.summary_for_video("v2", "2026-02-19")["summary_json"])["one_liner"].endswith("v1")
+
+    # A rerun keeps the summarized representative and sends nothing new to Gemini.
+    store.upsert_videos([_video("v4", SAME_STORY[2], views=10**6)])
+    assert logic.summarize_videos(db, "2026-02-19", "m") == (0, 0)
+    assert store.summary_for_video("v4", "2026-02-19")["video_id"] == "v1"
+
+    assert logic.summarize_videos(db, "2026-02-19", "m", dedup=False) == (3, 0)
+    assert store.list_video_clusters("2026-02-19") == []
+    store.close()
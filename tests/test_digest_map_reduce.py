@@ -0,0 +1,78 @@
+import json
+import threading
+
+from ytbrief.gemini_client import GeminiClient, estimate_tokens
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, text):
+        self.text = text
+
+    def json(self):
+        return {"candidates": [{"content": {"parts": [{"text": self.text}]}}]}
+
+
+class DigestTransport:
+    def __init__(self):
+        self.prompts = []
+        self._lock = threading.Lock()
+
+    def request(self, method, url, **kwargs):
+        prompt = kwargs["json"]["contents"][0]["parts"][0]["text"]
+        with self._lock:
+            n = len(self.prompts)
+            self.prompts.append(prompt)
+        digest = {
+            "date": "2026-02-19",
+            "one_liner": f"d{n}",
+            "consensus": ["a", "b", "c"],
+            "differences": ["a", "b", "c"],
+            "checklist": ["a", "b", "c"],
+            "top_topics": [],
+            "sources": [{"title": "t", "url": f"u{n}", "channel": "ch"}],
+        }
+        return FakeResponse(json.dumps(digest))
+
+
+def _summaries(n):
+    return [{"one_liner": "반도체 강세 " * 40, "source": {"title": f"t{i}", "url": f"v{i}", "channel": "ch"}} for i in range(n)]
+
+
+def test_small_digest_is_single_call():
+    transport = DigestTransport()
+    client = GeminiClient("k", transport=transport)
+    client.build_daily_digest("2026-02-19", _summaries(3))
+    assert len(transport.prompts) == 1
+
+
+def test_large_digest_switches_to_map_reduce():
+    summaries = _summaries(12)
+    per_item = estimate_tokens(json.dumps(summaries[0], ensure_ascii=False))
+    transport = DigestTransport()
+    client = GeminiClient("k", transport=transport, digest_token_budget=(per_item + 2) * 8)
+    digest = client.build_daily_digest("2026-02-19", summaries)
+
+    map_prompts = [p for p in transport.prompts if "summaries=" in p]
+    merge_prompts = [p for p in transport.prompts if "partial_digests=" in p]
+    assert len(map_prompts) == 3 and len(merge_prompts) == 1
+    assert all(estimate_tokens(p) <= client.digest_token_budget for p in transport.prompts)
+    assert len(digest.sources) == 3
+
+
+def test_oversized_summaries_are_digested_one_at_a_time():
+    summaries = [
+        {"one_liner": "반도체 강세 " * 400, "source": {"title": f"t{i}", "url": f"v{i}", "channel": "ch"}} for i in range(3)
+    ]
+    client = GeminiClient("k", transport=DigestTransport())
+    one_prompt = estimate_tokens(client._digest_prompt("2026-02-19", summaries[:1]))
+    transport = DigestTransport()
+    # Every summary takes more than half the budget, so no two share a chunk.
+    client = GeminiClient("k", transport=transport, digest_token_budget=one_prompt)
+    digest = client.build_daily_digest("2026-02-19", summaries)
+
+    map_prompts = [p for p in transport.prompts if "summaries=" in p]
+    assert len(map_prompts) == 3 and len(transport.prompts) == 4
+    assert all(estimate_tokens(p) <= client.digest_token_budget for p in transport.prompts)
+    assert len(digest.sources) == 3
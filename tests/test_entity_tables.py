@@ -0,0 +1,68 @@
+import json
+import sqlite3
+
+from typer.testing import CliRunner
+
+from ytbrief.cli import app
+from ytbrief.storage import Storage
+
+
+def _summary(ticker: str, sector: str, direction: str) -> str:
+    return json.dumps(
+        {
+            "one_liner": "x",
+            "key_events": [{"event": "FOMC 의사록", "why": "금리"}],
+            "sectors_assets": [{"name": sector, "direction": direction, "why": "수급"}],
+            "numbers": [{"metric": "코스피", "value": "2,650", "context": "종가"}],
+            "tickers_mentions": [{"ticker": ticker, "context": "실적"}],
+        },
+        ensure_ascii=False,
+    )
+
+
+def test_entities_are_indexed_at_write_time(tmp_path):
+    store = Storage(str(tmp_path / "t.db"))
+    store.upsert_video_summaries(
+        [
+            ("a", "2026-02-02", _summary("nvda", "반도체", "down"), "success"),
+            ("b", "2026-02-02", _summary("NVDA", "반도체", "up"), "success"),
+            ("c", "2026-02-03", _summary("TSLA", "반도체", "down"), "success"),
+        ]
+    )
+    assert [(r["date"], r["mentions"]) for r in store.ticker_mentions_by_date("nvda", "2026-02-01", "2026-02-28")] == [
+        ("2026-02-02", 2)
+    ]
+    down = store.sector_moves_by_date("반도체", "2026-02-01", "2026-02-28", direction="down")
+    assert [(r["date"], r["mentions"]) for r in down] == [("2026-02-02", 1), ("2026-02-03", 1)]
+    assert [r["value"] for r in store.list_number_facts("코스피", "2026-02-03", "2026-02-03")] == ["2,650"]
+    assert len(store.search_key_events("FOMC", "2026-02-01", "2026-02-28")) == 3
+
+    # A re-summarized video replaces its rows; a failed one drops them.
+    store.upsert_video_summaries(
+        [("a", "2026-02-02", _summary("AAPL", "은행", "up"), "success"), ("b", "2026-02-02", "{}", "failed")]
+    )
+    assert store.ticker_mentions_by_date("NVDA", "2026-02-01", "2026-02-28") == []
+    assert len(store.ticker_mentions_by_date("AAPL", "2026-02-01", "2026-02-28")) == 1
+    plan = store.conn.execute(
+        "EXPLAIN QUERY PLAN SELECT date FROM ticker_mentions WHERE ticker = 'AAPL' AND date BETWEEN '2026-02-01' AND '2026-02-28'"
+    ).fetchall()
+    assert "idx_ticker_mentions_ticker_date" in " ".join(str(tuple(r)) for r in plan)
+    store.close()
+
+
+def test_existing_summaries_are_backfilled_once(tmp_path):
+    db = tmp_path / "old.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE video_summaries(video_id TEXT, date TEXT, summary_json TEXT, status TEXT, created_at TEXT, PRIMARY KEY(video_id, date))")
+    conn.execute("INSERT INTO video_summaries VALUES ('a', '2026-01-05', ?, 'success', 'now')", (_summary("NVDA", "반도체", "down"),))
+    conn.execute("INSERT INTO video_summaries VALUES ('b', '2026-01-05', '{\"error\": \"x\"}', 'failed', 'now')")
+    conn.commit()
+    conn.close()
+
+    store = Storage(str(db))
+    assert [r["videos"] for r in store.ticker_mentions_by_date("NVDA", "2026-01-01", "2026-01-31")] == [1]
+    store.close()
+
+    result = CliRunner().invoke(app, ["query", "--ticker", "NVDA", "--from", "2026-01-01", "--to", "2026-01-31", "--db", str(db)])
+    assert result.exit_code == 0, result.output
+    assert "2026-01-05" in result.output and "days=1 mentions=1" in result.output
@@ -0,0 +1,117 @@
+import csv
+import json
+import sys
+
+import pytest
+
+from ytbrief.export import export_history
+from ytbrief.storage import Storage
+
+SUMMARY = {
+    "one_liner": "반도체 강세",
+    "market_drivers": ["금리", "환율", "수급"],
+    "key_events": [{"event": "FOMC", "why": "금리 경로"}],
+    "sectors_assets": [],
+    "numbers": [],
+    "tickers_mentions": [{"ticker": "NVDA", "context": "실적"}],
+    "what_to_watch": ["CPI", "옵션 만기", "실적"],
+    "confidence": "high",
+}
+
+
+def _add(store, vid, date, status="success"):
+    store.upsert_videos(
+        [{"video_id": vid, "date": date, "title": vid, "channel": "ch", "published_at": f"{date}T00:00:00Z",
+          "url": f"u-{vid}", "fetched_at": "now", "view_count": 7}]
+    )
+    body = SUMMARY if status == "success" else {"error": "boom"}
+    store.upsert_video_summary(vid, date, json.dumps(body, ensure_ascii=False), status)
+
+
+def test_jsonl_export_streams_flattens_and_resumes(tmp_path):
+    store = Storage(str(tmp_path / "t.db"))
+    for vid, date in (("a", "2026-02-18"), ("b", "2026-02-19"), ("c", "2026-02-25")):
+        _add(store, vid, date)
+    _add(store, "d", "2026-02-19", status="failed")
+    out = tmp_path / "history.jsonl"
+
+    result = export_history(store, "2026-02-18", "2026-02-20", str(out), "jsonl", flatten=True, incremental=True)
+    rows = [json.loads(line) for line in out.read_text(encoding="utf-8").splitlines()]
+    assert (result.rows, result.since) == (3, None)
+    assert [r["date"] for r in rows] == ["2026-02-18", "2026-02-19", "2026-02-19"]
+    success = next(r for r in rows if r["video_id"] == "b")
+    assert success["market_drivers"] == ["금리", "환율", "수급"] and success["view_count"] == 7
+    assert next(r for r in rows if r["video_id"] == "d")["error"] == "boom"
+
+    # Only the new summary is appended on the next incremental run.
+    _add(store, "e", "2026-02-20")
+    again = export_history(store, "2026-02-18", "2026-02-20", str(out), "jsonl", flatten=True, incremental=True)
+    assert (again.rows, again.since) == (1, result.last_created_at)
+    assert [json.loads(line)["video_id"] for line in out.read_text(encoding="utf-8").splitlines()][-1] == "e"
+    assert export_history(store, "2026-02-18", "2026-02-20", str(out), "jsonl", flatten=True, incremental=True).rows == 0
+    with pytest.raises(ValueError):
+        export_history(store, "2026-02-18", "2026-02-20", str(out), "jsonl", flatten=False, incremental=True)
+    store.close()
+
+
+def test_csv_export_keeps_one_header_when_appending(tmp_path):
+    store = Storage(str(tmp_path / "t.db"))
+    _add(store, "a", "2026-02-18")
+    out = tmp_path / "history.csv"
+    export_history(store, "2026-02-01", "2026-02-28", str(out), "csv", incremental=True)
+    _add(store, "b", "2026-02-19")
+    export_history(store, "2026-02-01", "2026-02-28", str(out), "csv", incremental=True)
+    with out.open(encoding="utf-8", newline="") as handle:
+        rows = list(csv.DictReader(handle))
+    assert [r["video_id"] for r in rows] == ["a", "b"]
+    assert json.loads(rows[0]["summary_json"])["one_liner"] == "반도체 강세"
+    store.close()
+
+
+def test_parquet_without_pyarrow_fails_before_writing(tmp_path, monkeypatch):
+    monkeypatch.setitem(sys.modules, "pyarrow", None)
+    store = Storage(str(tmp_path / "t.db"))
+    _add(store, "a", "2026-02-18")
+    with pytest.raises(RuntimeError, match="pyarrow"):
+        export_history(store, "2026-02-01", "2026-02-28", str(tmp_path / "parquet"), "parquet")
+    assert not (tmp_path / "parquet").exists()
+    assert store.get_export_state(str((tmp_path / "parquet").resolve())) is None
+    store.close()
+
+
+def test_parquet_export_writes_typed_date_partitions(tmp_path):
+    pa = pytest.importorskip("pyarrow")
+    pq = pytest.importorskip("pyarrow.parquet")
+    store = Storage(str(tmp_path / "t.db"))
+    _add(store, "a", "2026-02-18")
+    _add(store, "b", "2026-02-19")
+    _add(store, "c", "2026-02-19", status="failed")
+    out = tmp_path / "history"
+
+    first = export_history(store, "2026-02-01", "2026-02-28", str(out), "parquet", flatten=True, incremental=True)
+    assert (first.rows, first.files) == (3, 2)
+    assert sorted(p.name for p in out.iterdir()) == ["date=2026-02-18", "date=2026-02-19"]
+
+    (part,) = (out / "date=2026-02-19").iterdir()
+    table = pq.read_table(part)
+    assert table.schema.field("view_count").type == pa.int64()
+    assert table.schema.field("market_drivers").type == pa.list_(pa.string())
+    assert table.schema.field("tickers_mentions").type == pa.string()
+    assert "date" not in table.schema.names  # carried by the partition directory
+    rows = {r["video_id"]: r for r in table.to_pylist()}
+    assert rows["b"]["market_drivers"] == ["금리", "환율", "수급"]
+    assert json.loads(rows["b"]["tickers_mentions"]) == [{"ticker": "NVDA", "context": "실적"}]
+    assert rows["c"]["error"] == "boom" and rows["c"]["market_drivers"] is None
+
+    # The incremental run adds a new part file next to the first one instead of rewriting it.
+    _add(store, "d", "2026-02-19")
+    second = export_history(store, "2026-02-01", "2026-02-28", str(out), "parquet", flatten=True, incremental=True)
+    assert (second.rows, second.files) == (1, 1)
+    parts = sorted((out / "date=2026-02-19").iterdir())
+    assert len(parts) == 2 and part in parts
+    dataset = pq.read_table(out)
+    assert dataset.num_rows == 4
+    assert sorted(dataset.column("date").to_pylist()) == ["2026-02-18"] + ["2026-02-19"] * 3
+    with pytest.raises(ValueError):
+        export_history(store, "2026-02-01", "2026-02-28", str(out), "parquet", flatten=True)
+    store.close()
@@ -0,0 +1,71 @@
+import json
+
+from ytbrief.cache import ResponseCache
+from ytbrief.gemini_client import GeminiClient
+from ytbrief.storage import Storage
+
+SUMMARY = {
+    "one_liner": "x",
+    "market_drivers": ["a", "b", "c"],
+    "key_events": [],
+    "sectors_assets": [],
+    "numbers": [],
+    "tickers_mentions": [],
+    "what_to_watch": ["w1", "w2", "w3"],
+    "confidence": "high",
+}
+
+
+class FakeResponse:
+    status_code = 200
+
+    def json(self):
+        return {"candidates": [{"content": {"parts": [{"text": json.dumps(SUMMARY)}]}}]}
+
+
+class CountingTransport:
+    def __init__(self):
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        return FakeResponse()
+
+
+def test_summary_served_from_cache_without_network(tmp_path):
+    cache = ResponseCache(str(tmp_path / "t.db"))
+    transport = CountingTransport()
+    client = GeminiClient("k", model="m", transport=transport, cache=cache)
+    first = client.summarize_video("https://youtube.com/watch?v=abc")
+    second = client.summarize_video("https://youtube.com/watch?v=abc")
+    assert first == second
+    assert transport.calls == 1
+    assert cache.stats()["hits"] == 1
+
+    other_model = GeminiClient("k", model="other", transport=transport, cache=cache)
+    other_model.summarize_video("https://youtube.com/watch?v=abc")
+    assert transport.calls == 2
+    cache.close()
+
+
+def test_cache_ttl_and_size_eviction(tmp_path):
+    cache = ResponseCache(str(tmp_path / "t.db"), ttl=3600, max_bytes=10)
+    cache.put("a", "m", "12345")
+    cache.put("b", "m", "12345")
+    assert cache.get("a") == "12345"
+    cache.put("c", "m", "12345")  # over budget: least recently used "b" goes
+    assert cache.get("b") is None
+    assert cache.get("a") == "12345"
+
+    cache.ttl = -1
+    assert cache.get("a") is None
+    cache.close()
+
+
+def test_cache_table_comes_from_the_storage_migrations(tmp_path):
+    cache = ResponseCache(str(tmp_path / "t.db"))
+    version = cache.conn.execute("PRAGMA user_version").fetchone()[0]
+    indexes = {r[1] for r in cache.conn.execute("PRAGMA index_list(gemini_cache)")}
+    cache.close()
+    assert version == len(Storage.MIGRATIONS)
+    assert "idx_gemini_cache_accessed" in indexes
@@ -0,0 +1,86 @@
+import json
+
+import pytest
+from pydantic import ValidationError
+
+from ytbrief.gemini_client import GeminiClient
+from ytbrief.metrics import RunMetrics
+from ytbrief.repair import loads_lenient, response_schema
+from ytbrief.schemas import DailyDigest, VideoSummary
+
+SUMMARY = {
+    "one_liner": "x",
+    "market_drivers": ["a", "b", "c"],
+    "key_events": [{"event": "FOMC", "why": "금리"}],
+    "sectors_assets": [{"name": "반도체", "direction": "up", "why": "AI"}],
+    "numbers": [],
+    "tickers_mentions": [],
+    "what_to_watch": ["w1", "w2", "w3"],
+    "confidence": "high",
+}
+
+
+def test_lenient_loads_undoes_fences_commas_and_truncation():
+    assert loads_lenient('Here you go:\n```json\n{"a": [1, 2,], "b": {"c": "d",},}\n```') == {"a": [1, 2], "b": {"c": "d"}}
+    assert loads_lenient('{"a": "x"} Hope this helps!') == {"a": "x"}
+    # Cut off mid-string and mid-member by the output token limit.
+    assert loads_lenient('{"a": ["x", "y"], "b": "trunc') == {"a": ["x", "y"], "b": "trunc"}
+    assert loads_lenient('{"a": ["x", "y"], "b": [{"c": 1}, {"c"') == {"a": ["x", "y"], "b": [{"c": 1}]}
+    with pytest.raises(ValueError):
+        loads_lenient("I cannot watch videos.")
+
+
+def test_response_schema_is_the_gemini_subset():
+    schema = response_schema(VideoSummary)
+    assert schema["type"] == "OBJECT" and schema["propertyOrdering"][0] == "one_liner"
+    assert schema["properties"]["market_drivers"] == {"type": "ARRAY", "items": {"type": "STRING"}, "minItems": 3, "maxItems": 3}
+    direction = schema["properties"]["sectors_assets"]["items"]["properties"]["direction"]
+    assert direction == {"type": "STRING", "enum": ["up", "down", "mixed"]}
+    assert "$ref" not in json.dumps(schema) and "title" not in response_schema(DailyDigest)
+
+
+class ScriptedTransport:
+    def __init__(self, *texts):
+        self.texts = list(texts)
+        self.payloads = []
+
+    def request(self, method, url, **kwargs):
+        self.payloads.append(kwargs["json"])
+        text = self.texts.pop(0)
+
+        class Response:
+            status_code = 200
+
+            def json(self):
+                return {"candidates": [{"content": {"parts": [{"text": text}]}}]}
+
+        return Response()
+
+
+def test_trivial_failures_are_repaired_without_a_second_call():
+    sloppy = dict(SUMMARY, market_drivers=["a", "b", "c", "d"], confidence="High ")
+    sloppy["numbers"] = [{"metric": "코스피", "value": 2650.5, "context": "종가"}]
+    transport = ScriptedTransport("```json\n" + json.dumps(sloppy, ensure_ascii=False)[:-1] + ",\n")
+    client = GeminiClient("k", model="m", transport=transport)
+    client.metrics = RunMetrics("summarize")
+
+    summary = client.summarize_video("https://youtube.com/watch?v=abc")
+
+    assert len(transport.payloads) == 1
+    assert transport.payloads[0]["generationConfig"]["responseSchema"] == response_schema(VideoSummary)
+    assert summary.market_drivers == ["a", "b", "c"] and summary.confidence == "high"
+    assert summary.numbers[0].value == "2650.5"
+    assert client.metrics.repairs == {("summary", "local"): 1}
+
+
+def test_unfixable_output_still_gets_one_network_repair():
+    short = dict(SUMMARY, market_drivers=["a"])
+    transport = ScriptedTransport(json.dumps(short), json.dumps(SUMMARY), json.dumps(short), "{}")
+    client = GeminiClient("k", model="m", transport=transport)
+    client.metrics = RunMetrics("summarize")
+
+    assert client.summarize_video("u1").market_drivers == ["a", "b", "c"]
+    with pytest.raises(ValidationError):
+        client.summarize_video("u2")
+    assert len(transport.payloads) == 4
+    assert client.metrics.repairs == {("summary", "network"): 1, ("summary", "failed"): 1}
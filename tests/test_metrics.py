@@ -0,0 +1,50 @@
+from datetime import datetime
+
+from ytbrief.metrics import RunMetrics, build_stats_report, percentile, percentile_from_histogram
+from ytbrief.storage import Storage
+
+
+def test_percentiles():
+    assert percentile([], 0.5) is None
+    assert percentile([5, 1, 3, 2, 4], 0.5) == 3
+    assert percentile(list(range(1, 101)), 0.95) == 96
+    # 9 fast calls in the 50ms bucket, 1 slow call in the 1000ms bucket
+    assert percentile_from_histogram([9, 0, 0, 0, 1] + [0] * 7, 0.5) == 50
+    assert percentile_from_histogram([9, 0, 0, 0, 1] + [0] * 7, 0.95) == 1000
+
+
+def test_run_metrics_are_persisted_and_reported(tmp_path):
+    store = Storage(str(tmp_path / "t.db"))
+    metrics = RunMetrics("run", "2026-02-01")
+    for ms in (40, 45, 900):
+        metrics.record_call("gemini", ms, 200, 0)
+    metrics.record_call("gemini", 30, 429, 1)
+    with metrics.stage("fetch"):
+        pass
+    metrics.record_tokens("summary", "v1", {"promptTokenCount": 100, "candidatesTokenCount": 20, "totalTokenCount": 120})
+    metrics.record_tokens("summary", "v2", {"promptTokenCount": 200, "candidatesTokenCount": 40, "totalTokenCount": 240})
+    metrics.record_tokens("summary_repair", "v2", None)
+    for outcome in ("valid", "local", "local", "network"):
+        metrics.record_repair("summary", outcome)
+    store.save_run_metrics(metrics, "success")
+    store.upsert_video_summaries(
+        [
+            ("v1", "2026-02-01", "{}", "success"),
+            ("v2", "2026-02-01", "{}", "failed"),
+        ]
+    )
+
+    today = datetime.utcnow().date().isoformat()
+    report = build_stats_report(store, "2026-01-01", today)
+    store.close()
+
+    assert [s["stage"] for s in report["stages"]] == ["fetch"]
+    (gemini,) = report["apis"]
+    assert (gemini["calls"], gemini["errors"], gemini["retries"], gemini["throttled"]) == (4, 1, 1, 1)
+    assert gemini["p50_ms"] == 50 and gemini["p95_ms"] == 1000
+    (tokens,) = report["tokens"]
+    assert tokens["kind"] == "summary" and tokens["total_tokens"] == 360 and tokens["per_item"] == 180
+    (failures,) = report["failures"]
+    assert failures["date"] == "2026-02-01" and failures["failure_rate"] == 0.5
+    (repairs,) = report["repairs"]
+    assert (repairs["responses"], repairs["network"], repairs["round_trips_saved"]) == (4, 1, 2)
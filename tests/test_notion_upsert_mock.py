@@ -46,3 +46,100 @@ def test_notion_upsert_updates_existing_page():
     methods = [c[0] for c in session.calls]
     assert "DELETE" in methods
     assert "PATCH" in methods
+
+
+class PagedBlocksSession:
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def request(self, method, url, headers=None, json=None, timeout=45):
+        self.calls.append((method, url, json))
+        if url.endswith("/query"):
+            return FakeResponse(200, {"results": [{"id": "page1"}]})
+        if "/blocks/page1/children" in url and method == "GET":
+            idx = int(url.split("start_cursor=")[1]) if "start_cursor=" in url else 0
+            more = idx + 1 < len(self.pages)
+            return FakeResponse(200, {"results": self.pages[idx], "has_more": more, "next_cursor": str(idx + 1) if more else None})
+        return FakeResponse(200, {"id": "page1"})
+
+
+def test_notion_sync_only_patches_changed_blocks():
+    client = NotionClient("token", "db1", session=PagedBlocksSession([]))
+    digest = {
+        "one_liner": "요약",
+        "consensus": ["a", "b", "c"],
+        "differences": ["d1", "d2", "d3"],
+        "checklist": ["c1", "c2", "c3"],
+        "top_topics": [],
+        "sources": [],
+    }
+    existing = [{"id": f"b{i}", **block} for i, block in enumerate(client._build_children(digest))]
+    existing.append({"id": "extra", "type": "paragraph", "paragraph": {"rich_text": []}})
+    session = PagedBlocksSession([existing[:5], existing[5:]])
+    client.session = session
+    client.transport.session = session
+
+    digest["consensus"] = ["a", "B", "c"]
+    client.upsert_daily_page("2026-02-19", digest, video_count=3)
+
+    block_calls = [(m, u) for m, u, _ in session.calls if "/blocks/" in u and m != "GET"]
+    assert block_calls == [
+        ("PATCH", "https://api.notion.com/v1/blocks/b4"),
+        ("DELETE", "https://api.notion.com/v1/blocks/extra"),
+    ]
+    assert sum(1 for m, u, _ in session.calls if m == "GET") == 2
+
+
+def test_rollup_page_is_found_by_title_with_a_date_range():
+    session = FakeSession()
+    client = NotionClient("token", "db1", session=session)
+    digest = {"one_liner": "주간", "consensus": ["a", "b", "c"], "differences": [], "checklist": [], "top_topics": [], "sources": []}
+    page_id = client.upsert_rollup_page("2026-W07 Weekly Brief", "2026-02-09", "2026-02-15", digest, video_count=40)
+    assert page_id == "page1"
+    query = next(body for method, url, body in session.calls if url.endswith("/query"))
+    assert query["filter"] == {"property": "Name", "title": {"equals": "2026-W07 Weekly Brief"}}
+    patch = next(body for method, url, body in session.calls if url.endswith("/pages/page1"))
+    assert patch["properties"]["Date"] == {"date": {"start": "2026-02-09", "end": "2026-02-15"}}
+
+
+class DatabaseSession:
+    # Answers database queries by evaluating the Date/Name filters against a list of pages.
+    def __init__(self, pages):
+        self.pages = pages
+        self.calls = []
+
+    def _matches(self, page, condition):
+        if "and" in condition:
+            return all(self._matches(page, c) for c in condition["and"])
+        if condition["property"] == "Date":
+            return page["start"] == condition["date"]["equals"]
+        return page["title"] == condition["title"]["equals"]
+
+    def request(self, method, url, headers=None, json=None, timeout=45):
+        self.calls.append((method, url, json))
+        if url.endswith("/query"):
+            hits = [{"id": p["id"]} for p in self.pages if self._matches(p, json["filter"])]
+            return FakeResponse(200, {"results": hits[: json["page_size"]]})
+        if method == "GET":
+            return FakeResponse(200, {"results": []})
+        return FakeResponse(200, {"id": "created"})
+
+
+def test_daily_lookup_skips_rollup_pages_starting_on_the_same_day():
+    pages = [
+        {"id": "weekly", "title": "2026-W07 Weekly Brief", "start": "2026-02-09"},
+        {"id": "daily", "title": "2026-02-09 Morning Brief", "start": "2026-02-09"},
+    ]
+    session = DatabaseSession(pages)
+    client = NotionClient("token", "db1", session=session)
+    digest = {"one_liner": "요약", "consensus": ["a", "b", "c"], "differences": [], "checklist": [], "top_topics": [], "sources": []}
+
+    assert client.upsert_daily_page("2026-02-09", digest, video_count=3) == "daily"
+    assert not any("weekly" in url for _, url, _ in session.calls)
+
+    # With only the monthly page on the 1st, the daily page is created instead of hijacking it.
+    session = DatabaseSession([{"id": "monthly", "title": "2026-02 Monthly Brief", "start": "2026-02-01"}])
+    client = NotionClient("token", "db1", session=session)
+    assert client.upsert_daily_page("2026-02-01", digest, video_count=3) == "created"
+    assert not any("monthly" in url for _, url, _ in session.calls)
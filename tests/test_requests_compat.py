@@ -0,0 +1,74 @@
+import gzip
+import json
+import socket
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from ytbrief.requests_compat import CompatConnectionError, Session
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    disable_nagle_algorithm = True
+    peers = set()
+
+    def _reply(self, payload):
+        Handler.peers.add(self.client_address)
+        body = json.dumps(payload).encode("utf-8")
+        if "gzip" in self.headers.get("Accept-Encoding", ""):
+            body = gzip.compress(body)
+            self.send_response(200)
+            self.send_header("Content-Encoding", "gzip")
+        else:
+            self.send_response(200)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def do_GET(self):
+        self._reply({"path": self.path})
+
+    def do_POST(self):
+        length = int(self.headers["Content-Length"])
+        self._reply({"path": self.path, "body": json.loads(self.rfile.read(length))})
+
+    def log_message(self, *args):
+        pass
+
+
+def test_session_reuses_connections_and_decodes_gzip():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    base = f"http://127.0.0.1:{server.server_port}"
+    try:
+        with Session() as session:
+            for _ in range(5):
+                resp = session.get(f"{base}/search", params={"q": "모닝브리핑"})
+                assert resp.status_code == 200
+            assert resp.json()["path"] == "/search?q=%EB%AA%A8%EB%8B%9D%EB%B8%8C%EB%A6%AC%ED%95%91"
+            posted = session.post(f"{base}/gen?x=1", params={"key": "k"}, json={"a": 1}).json()
+            assert posted == {"path": "/gen?x=1&key=k", "body": {"a": 1}}
+        assert len(Handler.peers) == 1
+    finally:
+        server.shutdown()
+        server.server_close()
+
+
+def test_dropped_connection_raises_a_builtin_connection_error():
+    listener = socket.create_server(("127.0.0.1", 0))
+
+    def drop():
+        conn, _ = listener.accept()
+        conn.recv(1024)
+        conn.close()
+
+    threading.Thread(target=drop, daemon=True).start()
+    try:
+        with Session() as session, pytest.raises(ConnectionError) as info:
+            session.get(f"http://127.0.0.1:{listener.getsockname()[1]}/")
+        assert isinstance(info.value, CompatConnectionError)
+    finally:
+        listener.close()
@@ -0,0 +1,41 @@
+import json
+
+from ytbrief import logic
+from ytbrief.storage import Storage
+
+
+def _daily(store, date):
+    digest = {"one_liner": date, "sources": [{"title": date, "url": f"u-{date}", "channel": "c"}]}
+    store.upsert_daily_digest(date, json.dumps(digest), "success")
+    store.upsert_video_summary(f"v-{date}", date, "{}", "success")
+
+
+def test_rollups_reuse_cached_spans(tmp_path, fake_gemini, fake_notion):
+    db = str(tmp_path / "t.db")
+    store = Storage(db)
+    for date in ("2026-02-02", "2026-02-03", "2026-02-04"):
+        _daily(store, date)
+
+    week = logic.build_rollup(db, "week", "2026-02-03", "m")
+    assert (week.period, week.start, week.end, week.status, week.days) == ("2026-W06", "2026-02-02", "2026-02-08", "built", 3)
+    assert fake_gemini.calls == [("rollup", "2026-W06", ["2026-02-02", "2026-02-03", "2026-02-04"])]
+    assert logic.build_rollup(db, "week", "2026-W06", "m").status == "unchanged"
+    assert len(fake_gemini.calls) == 1
+
+    # The month reuses the cached W06 rollup and only builds the new week plus the merge.
+    _daily(store, "2026-02-10")
+    month = logic.build_rollup(db, "month", "2026-02", "m", publish=True)
+    assert (month.status, month.days, month.rebuilt, month.notion_page_id) == ("built", 4, 2, "page-2026-02-01")
+    assert [c[1] for c in fake_gemini.calls[1:]] == ["2026-W07", "2026-02"]
+    assert fake_gemini.calls[-1][2] == ["2026-W06", "2026-W07"]
+    assert fake_notion.upserts == [("rollup", "2026-02 Monthly Brief", 4, None)]
+    assert json.loads(store.get_rollup("2026-02-01", "2026-02-28")["digest_json"])["sources"][-1]["url"] == "u-2026-02-10"
+
+    again = logic.build_rollup(db, "month", "2026-02", "m", publish=True)
+    assert (again.status, again.rebuilt) == ("unchanged", 0)
+    assert len(fake_gemini.calls) == 3 and len(fake_notion.upserts) == 1
+
+    _daily(store, "2026-02-27")
+    assert logic.build_rollup(db, "month", "2026-02", "m").rebuilt == 2
+    assert [c[1] for c in fake_gemini.calls[3:]] == ["2026-02-23~2026-02-28", "2026-02"]
+    store.close()
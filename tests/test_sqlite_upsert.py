@@ -1,4 +1,7 @@
 import json
+import sqlite3
+
+import pytest
 
 from ytbrief.storage import Storage
 
@@ -31,3 +34,74 @@ def test_sqlite_upsert(tmp_path):
     assert json.loads(rows[0]["summary_json"])["one_liner"] == "y"
 
     store.close()
+
+
+def test_list_pending_videos_skips_success_and_caps_attempts(tmp_path):
+    store = Storage(str(tmp_path / "t.db"))
+    for vid in ("ok", "bad", "new"):
+        store.upsert_video(
+            {
+                "video_id": vid,
+                "date": "2026-02-19",
+                "title": vid,
+                "channel": "ch",
+                "published_at": "2026-02-19T01:00:00Z",
+                "url": f"https://youtube.com/watch?v={vid}",
+                "fetched_at": "now",
+            }
+        )
+    store.upsert_video_summary("ok", "2026-02-19", "{}", "success")
+    store.upsert_video_summary("bad", "2026-02-19", "{}", "failed")
+    store.upsert_video_summary("bad", "2026-02-19", "{}", "failed")
+
+    assert sorted(r["video_id"] for r in store.list_pending_videos("2026-02-19")) == ["bad", "new"]
+    assert [r["video_id"] for r in store.list_pending_videos("2026-02-19", max_attempts=2)] == ["new"]
+    store.close()
+
+
+def test_bulk_upserts_in_wal_mode(tmp_path):
+    store = Storage(str(tmp_path / "t.db"))
+    assert store.conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+    rows = [
+        {
+            "video_id": f"v{i}",
+            "date": "2026-02-19",
+            "title": f"t{i}",
+            "channel": "ch",
+            "published_at": f"2026-02-19T0{i}:00:00Z",
+            "url": f"https://youtube.com/watch?v=v{i}",
+            "fetched_at": "now",
+        }
+        for i in range(5)
+    ]
+    store.upsert_videos(rows)
+    store.upsert_video_summaries([(r["video_id"], "2026-02-19", "{}", "success") for r in rows])
+    assert len(store.list_videos_by_date("2026-02-19")) == 5
+    assert len(store.list_successful_summaries("2026-02-19")) == 5
+    store.close()
+
+
+def test_schema_migrations_are_versioned(tmp_path):
+    db = tmp_path / "legacy.db"
+    conn = sqlite3.connect(db)
+    conn.execute("CREATE TABLE videos(video_id TEXT PRIMARY KEY, date TEXT, title TEXT, channel TEXT, published_at TEXT, url TEXT, fetched_at TEXT)")
+    conn.commit()
+    conn.close()
+
+    store = Storage(str(db))
+    assert store.schema_version == len(Storage.MIGRATIONS)
+    columns = {r["name"] for r in store.conn.execute("PRAGMA table_info(videos)")}
+    assert "duration_seconds" in columns
+
+    def plan(sql: str, *params) -> str:
+        return " ".join(r["detail"] for r in store.conn.execute("EXPLAIN QUERY PLAN " + sql, params))
+
+    assert "idx_videos_date_published" in plan("SELECT * FROM videos WHERE date = ? ORDER BY published_at", "2026-02-19")
+    assert "TEMP B-TREE" not in plan("SELECT * FROM videos WHERE date = ? ORDER BY published_at", "2026-02-19")
+    assert "idx_video_summaries_date_status" in plan(
+        "SELECT * FROM video_summaries WHERE date = ? AND status = 'success'", "2026-02-19"
+    )
+    store.conn.execute("PRAGMA user_version = 99")
+    store.close()
+    with pytest.raises(RuntimeError, match="schema version 99"):
+        Storage(str(db))
@@ -0,0 +1,59 @@
+import json
+
+from ytbrief import logic
+from ytbrief.notion_client import NotionClient
+from ytbrief.storage import Storage
+
+DIGEST = {
+    "date": "2026-02-19",
+    "one_liner": "요약",
+    "consensus": ["a", "b", "c"],
+    "differences": ["d1", "d2", "d3"],
+    "checklist": ["c1", "c2", "c3"],
+    "top_topics": ["반도체"],
+    "sources": [{"title": "t", "url": "u", "channel": "ch"}],
+}
+
+
+class FakeNotion(NotionClient):
+    upserts = []
+
+    def __init__(self, token, database_id, notion_version):
+        super().__init__(token, database_id, notion_version, session=object())
+
+    def upsert_daily_page(self, date, digest, video_count, page_id=None):
+        FakeNotion.upserts.append(page_id)
+        return "page1"
+
+
+def test_unchanged_inputs_skip_gemini_and_notion(tmp_path, monkeypatch, fake_gemini):
+    db = str(tmp_path / "t.db")
+    store = Storage(db)
+    store.upsert_video(
+        {
+            "video_id": "v1",
+            "date": "2026-02-19",
+            "title": "t",
+            "channel": "ch",
+            "published_at": "2026-02-19T01:00:00Z",
+            "url": "u",
+            "fetched_at": "now",
+        }
+    )
+    store.upsert_video_summary("v1", "2026-02-19", json.dumps({"one_liner": "x"}), "success")
+    store.close()
+    for key in ("NOTION_TOKEN", "NOTION_DATABASE_ID"):
+        monkeypatch.setenv(key, "x")
+    fake_gemini.digest = lambda date, per_video: dict(DIGEST)
+    monkeypatch.setattr("ytbrief.notion_client.NotionClient", FakeNotion)
+
+    for _ in range(2):
+        assert logic.create_digest(db, "2026-02-19", "m", use_cache=False) == "success"
+        assert logic.publish_notion(db, "2026-02-19") == "page1"
+    assert len(fake_gemini.calls) == 1
+    assert FakeNotion.upserts == [None]
+
+    logic.create_digest(db, "2026-02-19", "m", use_cache=False, force=True)
+    logic.publish_notion(db, "2026-02-19", force=True)
+    assert len(fake_gemini.calls) == 2
+    assert FakeNotion.upserts == [None, "page1"]
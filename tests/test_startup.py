@@ -0,0 +1,37 @@
+import os
+import subprocess
+import sys
+from pathlib import Path
+
+SRC = Path(__file__).resolve().parents[1] / "src"
+# Loaded only by the commands that need them; see cli.py.
+LAZY = ("pydantic", "requests", "dotenv", "ytbrief.logic", "ytbrief.schemas", "ytbrief.gemini_client", "ytbrief.youtube_client")
+# Before imports were deferred, `import ytbrief.cli` took ~300ms; it is now ~70ms, mostly typer and rich.
+BUDGET_MS = 200
+
+
+def _importtime(module: str) -> dict[str, int]:
+    env = {**os.environ, "PYTHONPATH": str(SRC)}
+    proc = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"], env=env, capture_output=True, text=True, check=True
+    )
+    timings = {}
+    for line in proc.stderr.splitlines():
+        if line.startswith("import time:") and "cumulative" not in line:
+            _, cumulative, name = (part.strip() for part in line[len("import time:") :].split("|"))
+            timings[name] = int(cumulative)
+    return timings
+
+
+def test_cli_import_stays_lazy_and_within_budget():
+    _importtime("ytbrief.cli")  # compile bytecode outside the measured run
+    timings = min((_importtime("ytbrief.cli") for _ in range(3)), key=lambda t: t["ytbrief.cli"])
+    loaded = [name for name in timings if name in LAZY or name.split(".")[0] in LAZY]
+    assert loaded == []
+    assert timings["ytbrief.cli"] / 1000 < BUDGET_MS
+
+
+def test_logic_import_does_not_load_pydantic_or_clients():
+    timings = _importtime("ytbrief.logic")
+    assert not [name for name in timings if name.split(".")[0] in ("pydantic", "requests")]
+    assert "ytbrief.gemini_client" not in timings
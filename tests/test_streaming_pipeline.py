@@ -0,0 +1,61 @@
+import threading
+
+from ytbrief import logic
+
+DIGEST = {
+    "date": "2026-02-19",
+    "one_liner": "요약",
+    "consensus": ["a", "b", "c"],
+    "differences": ["d1", "d2", "d3"],
+    "checklist": ["c1", "c2", "c3"],
+    "top_topics": [],
+    "sources": [],
+}
+
+
+def _row(vid):
+    return {
+        "video_id": vid,
+        "date": "2026-02-19",
+        "title": vid,
+        "channel": "ch",
+        "published_at": f"2026-02-19T01:00:0{vid[-1]}Z",
+        "url": f"https://youtube.com/watch?v={vid}",
+        "fetched_at": "now",
+    }
+
+
+def _digest(date, per_video):
+    return dict(DIGEST, sources=[p["source"] for p in per_video])
+
+
+def test_streaming_run_overlaps_discovery_and_summaries(tmp_path, fake_youtube, fake_gemini, fake_notion):
+    first_summary_done = threading.Event()
+
+    def pages(date, published_after):
+        yield [_row("v0"), _row("v1")]
+        # the second page is only discovered after page one is already being summarized
+        assert first_summary_done.wait(timeout=5)
+        yield [_row("v2")]
+
+    def summary(url):
+        first_summary_done.set()
+        return {"one_liner": url}
+
+    fake_youtube.pages = pages
+    fake_gemini.summary = summary
+    fake_gemini.digest = _digest
+
+    result = logic.run_pipeline(str(tmp_path / "t.db"), "2026-02-19", 10, "m", concurrency=2, use_cache=False, stream=True)
+    assert (result.found, result.summarized_success, result.summarized_failed) == (3, 3, 0)
+    assert result.digest_status == "success"
+    assert result.notion_page_id == "page-2026-02-19"
+
+
+def test_streaming_run_counts_and_summarizes_repeated_videos_once(tmp_path, fake_youtube, fake_gemini, fake_notion):
+    fake_youtube.pages = lambda date, published_after: [[_row("v0"), _row("v1")], [_row("v1"), _row("v2"), _row("v2")]]
+    fake_gemini.digest = _digest
+
+    result = logic.run_pipeline(str(tmp_path / "t.db"), "2026-02-19", 10, "m", use_cache=False, stream=True)
+    assert (result.found, result.summarized_success) == (3, 3)
+    assert sorted(fake_gemini.urls) == [f"https://youtube.com/watch?v=v{i}" for i in range(3)]
@@ -0,0 +1,40 @@
+import time
+
+from ytbrief import logic
+from ytbrief.storage import Storage
+
+
+def _summary(url):
+    # later videos finish first to exercise out-of-order completion
+    time.sleep(0.05 if url.endswith("v0") else 0.0)
+    if url.endswith("v2"):
+        raise ValueError("boom")
+    return {"one_liner": url}
+
+
+def test_concurrent_summarize_keeps_order_and_failures(tmp_path, fake_gemini):
+    db = str(tmp_path / "t.db")
+    store = Storage(db)
+    for i in range(4):
+        store.upsert_video(
+            {
+                "video_id": f"v{i}",
+                "date": "2026-02-19",
+                "title": f"t{i}",
+                "channel": "ch",
+                "published_at": f"2026-02-19T0{i}:00:00Z",
+                "url": f"https://youtube.com/watch?v=v{i}",
+                "fetched_at": "now",
+            }
+        )
+    store.close()
+    fake_gemini.summary = _summary
+
+    ok, failed = logic.summarize_videos(db, "2026-02-19", "m", concurrency=4)
+    assert (ok, failed) == (3, 1)
+
+    store = Storage(db)
+    rows = store.conn.execute("SELECT video_id, status FROM video_summaries ORDER BY rowid").fetchall()
+    assert [r["video_id"] for r in rows] == ["v0", "v1", "v2", "v3"]
+    assert [r["status"] for r in rows] == ["success", "success", "failed", "success"]
+    store.close()
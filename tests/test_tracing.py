@@ -0,0 +1,63 @@
+import json
+
+from ytbrief import logic
+from ytbrief.tracing import NULL_TRACER, Tracer
+from ytbrief.transport import Transport, TransportPolicy
+
+
+class Response:
+    headers = {}
+
+    def __init__(self, status_code):
+        self.status_code = status_code
+
+
+class FlakySession:
+    def __init__(self, *statuses):
+        self.statuses = list(statuses)
+
+    def request(self, method, url, **kwargs):
+        return Response(self.statuses.pop(0))
+
+
+def test_http_attempts_are_spans_with_status_and_retry(tmp_path):
+    tracer = Tracer(str(tmp_path / "trace.json"))
+    transport = Transport("youtube", FlakySession(503, 200), TransportPolicy(rate=1000, burst=10, max_backoff=0.001))
+    transport.tracer = tracer
+    transport.request("GET", "https://example.test/youtube/v3/search", params={"key": "secret"})
+
+    spans = [(e["name"], e["args"].get("attempt"), e["args"].get("status")) for e in tracer.events]
+    assert spans == [
+        ("youtube GET /youtube/v3/search", 0, 503),
+        ("youtube backoff", 0, None),
+        ("youtube GET /youtube/v3/search", 1, 200),
+    ]
+    assert "secret" not in json.dumps(tracer.trace_events())
+
+
+def test_traced_context_writes_a_chrome_trace(tmp_path):
+    path = tmp_path / "trace.json"
+    with logic.PipelineContext(str(tmp_path / "t.db"), command="run", date="2026-02-19", trace=str(path)) as ctx:
+        ctx.store.upsert_videos(
+            [
+                {"video_id": vid, "date": "2026-02-19", "title": title, "channel": "ch", "published_at": "t", "url": vid, "fetched_at": "now"}
+                for vid, title in (("a", "코스피 반등"), ("b", "환율 급등"))
+            ]
+        )
+        logic._dedup(ctx, "2026-02-19")
+
+    events = json.loads(path.read_text(encoding="utf-8"))["traceEvents"]
+    complete = {(e["cat"], e["name"]): e for e in events if e["ph"] == "X"}
+    assert complete[("sqlite", "upsert_videos")]["args"] == {"rows": 2}
+    stage = complete[("stage", "dedup")]
+    write = complete[("sqlite", "replace_video_clusters")]
+    assert stage["ts"] <= write["ts"] and write["ts"] + write["dur"] <= stage["ts"] + stage["dur"]
+    assert ("sqlite", "save_run_metrics") in complete
+    assert {"name": "MainThread"} in [e["args"] for e in events if e["ph"] == "M"]
+
+
+def test_tracing_is_off_by_default(tmp_path):
+    with logic.PipelineContext(str(tmp_path / "t.db")) as ctx:
+        assert ctx.tracer is NULL_TRACER and ctx.store.tracer is NULL_TRACER
+        assert NULL_TRACER.span("a", "b") is NULL_TRACER.span("c", "d")
+    assert all(p.name.startswith("t.db") for p in tmp_path.iterdir())  # no trace file
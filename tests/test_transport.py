@@ -0,0 +1,75 @@
+import pytest
+
+from ytbrief import transport as transport_mod
+from ytbrief.transport import CircuitOpenError, Transport, TransportPolicy
+
+
+class FakeResponse:
+    def __init__(self, status_code, headers=None):
+        self.status_code = status_code
+        self.headers = headers or {}
+
+    def raise_for_status(self):
+        raise RuntimeError(self.status_code)
+
+
+class ScriptedSession:
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = 0
+
+    def request(self, method, url, **kwargs):
+        self.calls += 1
+        return self.responses.pop(0)
+
+
+@pytest.fixture
+def sleeps(monkeypatch):
+    recorded = []
+    monkeypatch.setattr(transport_mod.time, "sleep", recorded.append)
+    return recorded
+
+
+def test_retry_after_header_is_honored(sleeps):
+    session = ScriptedSession([FakeResponse(429, {"Retry-After": "7"}), FakeResponse(200)])
+    t = Transport("x", session, TransportPolicy(rate=1000, burst=10, max_concurrency=4))
+    assert t.request("GET", "http://x").status_code == 200
+    assert sleeps == [7.0]
+    stats = t.stats()
+    assert stats["throttled"] == 1 and stats["retries"] == 1
+    assert stats["concurrency_limit"] < 4
+
+
+def test_circuit_opens_after_repeated_server_errors(sleeps):
+    session = ScriptedSession([FakeResponse(503)] * 4)
+    policy = TransportPolicy(rate=1000, burst=10, max_retries=2, failure_threshold=2)
+    t = Transport("x", session, policy)
+    with pytest.raises(RuntimeError):
+        t.request("GET", "http://x")
+    with pytest.raises(CircuitOpenError):
+        t.request("GET", "http://x")
+    assert session.calls == 2
+    assert t.stats()["circuit_rejections"] == 1
+
+
+class JsonResponse(FakeResponse):
+    def __init__(self, status_code, body):
+        super().__init__(status_code)
+        self.body = body
+
+    def json(self):
+        return self.body
+
+
+def test_non_google_error_bodies_are_retried_not_crashed(sleeps):
+    session = ScriptedSession(
+        [
+            JsonResponse(429, {"error": "injected"}),
+            JsonResponse(429, {"error": {"errors": ["quota"], "details": [{"violations": "x"}, "y"]}}),
+            JsonResponse(503, ["not", "a", "dict"]),
+            FakeResponse(200),
+        ]
+    )
+    t = Transport("x", session, TransportPolicy(rate=1000, burst=10, max_retries=4))
+    assert t.request("GET", "http://x").status_code == 200
+    assert session.calls == 4 and t.stats()["quota_exhausted"] == 0
@@ -0,0 +1,95 @@
+from datetime import datetime
+
+from ytbrief import logic
+from ytbrief.storage import Storage
+from ytbrief.transport import BudgetExceededError
+from ytbrief.youtube_client import YouTubeClient
+
+DATE = "2026-02-19"
+UPLOADS = [
+    # (poll it first shows up in, video_id, title, publishedAt)
+    (1, "a", "미국 증시 마감 엔비디아 실적 앞두고 반도체 강세", "2026-02-18T21:05:00Z"),
+    (1, "b", "코스피 2600선 회복 외국인 순매수 전환", "2026-02-18T21:40:00Z"),
+    (3, "c", "환율 1450원 돌파 달러 강세 지속", "2026-02-18T23:10:00Z"),
+]
+
+
+def _uploads(fake_youtube):
+    # The n-th search sees the uploads that exist by poll n and fall inside its publishedAfter window.
+    def pages(date, published_after):
+        poll = len(fake_youtube.searches)
+        since = datetime.fromisoformat(YouTubeClient.seoul_date_window(date, published_after)[0])
+        yield [
+            {
+                "video_id": vid,
+                "date": date,
+                "title": title,
+                "channel": f"ch-{vid}",
+                "published_at": published,
+                "url": f"https://youtube.com/watch?v={vid}",
+                "fetched_at": "now",
+            }
+            for first_poll, vid, title, published in UPLOADS
+            if first_poll <= poll and datetime.fromisoformat(published.replace("Z", "+00:00")) >= since
+        ]
+
+    return pages
+
+
+def test_watch_searches_past_the_watermark_and_refreshes_only_on_new_videos(
+    tmp_path, fake_youtube, fake_gemini, fake_notion
+):
+    fake_youtube.pages = _uploads(fake_youtube)
+    db = str(tmp_path / "t.db")
+
+    polls = logic.watch(db, DATE, 0, 20, "m", max_polls=3)
+
+    assert [(p.found, p.summarized_success, p.refreshed) for p in polls] == [(2, 2, True), (1, 0, False), (2, 1, True)]
+    # Polls 2 and 3 start 30 minutes before the newest upload seen so far.
+    assert [since for _, since in fake_youtube.searches] == [
+        None,
+        "2026-02-18T21:10:00+00:00",
+        "2026-02-18T21:10:00+00:00",
+    ]
+    assert fake_gemini.calls == [
+        ("summarize", "https://youtube.com/watch?v=a"),
+        ("summarize", "https://youtube.com/watch?v=b"),
+        ("digest", DATE, 2),
+        ("summarize", "https://youtube.com/watch?v=c"),
+        ("digest", DATE, 3),
+    ]
+    assert len(fake_notion.upserts) == 2
+    store = Storage(db)
+    assert store.get_watermark(DATE, logic.WATERMARK_SOURCE) == "2026-02-18T23:10:00Z"
+    store.close()
+
+
+def test_watch_ends_cleanly_when_the_daily_budget_runs_out(tmp_path, fake_youtube, fake_gemini, fake_notion):
+    uploads = _uploads(fake_youtube)
+
+    def pages(date, published_after):
+        if len(fake_youtube.searches) > 1:
+            raise BudgetExceededError("youtube API daily quota exhausted (HTTP 403)")
+        return uploads(date, published_after)
+
+    fake_youtube.pages = pages
+    seen = []
+
+    polls = logic.watch(str(tmp_path / "t.db"), DATE, 0, 20, "m", max_polls=5, on_poll=seen.append)
+
+    assert seen == polls
+    assert [(p.found, p.error) for p in polls] == [(2, None), (0, "youtube API daily quota exhausted (HTTP 403)")]
+
+
+def test_watch_keeps_the_watermark_while_search_hits_the_limit(tmp_path, fake_youtube, fake_gemini, fake_notion):
+    fake_youtube.pages = _uploads(fake_youtube)
+    db = str(tmp_path / "t.db")
+
+    # Three uploads match by poll 3 but only two fit under --limit, so the search is never exhaustive.
+    polls = logic.watch(db, DATE, 0, 2, "m", max_polls=3)
+
+    assert [p.found for p in polls] == [2, 2, 2]
+    assert [since for _, since in fake_youtube.searches] == [None, None, None]
+    store = Storage(db)
+    assert store.get_watermark(DATE, logic.WATERMARK_SOURCE) is None
+    store.close()
@@ -0,0 +1,89 @@
+from ytbrief.youtube_client import KOREAN_KEYWORDS, VideoFilter, YouTubeClient, parse_duration
+
+
+def _item(vid):
+    return {"id": {"videoId": vid}, "snippet": {"title": vid, "channelTitle": "ch", "publishedAt": "2026-02-19T00:00:00Z"}}
+
+
+class FakeResponse:
+    status_code = 200
+
+    def __init__(self, payload):
+        self._payload = payload
+
+    def json(self):
+        return self._payload
+
+
+class PagedTransport:
+    def __init__(self, pages_by_query):
+        self.pages_by_query = pages_by_query
+        self.calls = []
+
+    def request(self, method, url, params=None, **kwargs):
+        self.calls.append(dict(params))
+        pages = self.pages_by_query.get(params["q"], [[]])
+        idx = int(params.get("pageToken", 0))
+        payload = {"items": pages[idx]}
+        if idx + 1 < len(pages):
+            payload["nextPageToken"] = str(idx + 1)
+        return FakeResponse(payload)
+
+
+def test_combined_search_follows_next_page_token():
+    combined = " OR ".join(KOREAN_KEYWORDS)
+    pages = [[_item(f"a{i}") for i in range(50)], [_item(f"b{i}") for i in range(50)], [_item("c0")]]
+    transport = PagedTransport({combined: pages})
+    client = YouTubeClient("k", transport=transport)
+    rows = client.search_morning_briefs("2026-02-19", limit=100)
+    assert len(rows) == 100
+    assert [c["maxResults"] for c in transport.calls] == [50, 50]
+    assert client.quota_units == 200
+
+
+def test_fanout_merges_dedups_and_ranks():
+    transport = PagedTransport(
+        {
+            KOREAN_KEYWORDS[0]: [[_item("x"), _item("shared")]],
+            KOREAN_KEYWORDS[1]: [[_item("shared"), _item("y")]],
+        }
+    )
+    client = YouTubeClient("k", transport=transport)
+    rows = client.search_morning_briefs("2026-02-19", limit=10, fanout=True)
+    ids = [r["video_id"] for r in rows]
+    assert ids[0] == "shared"
+    assert sorted(ids) == ["shared", "x", "y"]
+    assert client.quota_units == 100 * len(KOREAN_KEYWORDS)
+
+
+def test_enrich_videos_and_filter():
+    class VideosTransport:
+        def __init__(self):
+            self.calls = []
+
+        def request(self, method, url, params=None, **kwargs):
+            self.calls.append(params["id"].split(","))
+            items = [
+                {
+                    "id": vid,
+                    "snippet": {"liveBroadcastContent": "upcoming" if vid == "v1" else "none"},
+                    "contentDetails": {"duration": "PT45S" if vid == "v2" else "PT12M30S"},
+                    "statistics": {"viewCount": "1500"},
+                }
+                for vid in params["id"].split(",")
+            ]
+            return FakeResponse({"items": items})
+
+    transport = VideosTransport()
+    client = YouTubeClient("k", transport=transport)
+    rows = [{"video_id": f"v{i}"} for i in range(120)]
+    client.enrich_videos(rows)
+    assert [len(c) for c in transport.calls] == [50, 50, 20]
+    assert rows[0]["duration_seconds"] == 750 and rows[0]["view_count"] == 1500
+
+    video_filter = VideoFilter()
+    assert video_filter.reject_reason(rows[0]) is None
+    assert video_filter.reject_reason(rows[1]) == "upcoming"
+    assert video_filter.reject_reason(rows[2]) == "too_short"
+    assert VideoFilter(min_views=2000).reject_reason(rows[0]) == "too_few_views"
+    assert parse_duration("PT3H") == 10800